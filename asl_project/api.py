@@ -1,7 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import numpy as np
-import tensorflow as tf
+
+from model_bundle import load_bundle, ALPHABET_BUNDLE, WORD_BUNDLE
 
 # ---------------- APP ----------------
 app = FastAPI()
@@ -16,14 +17,14 @@ app.add_middleware(
 )
 
 # ---------------- LOAD MODELS ----------------
-alphabet_model = tf.keras.models.load_model("asl_alphabet_model.h5")
-word_model = tf.keras.models.load_model("asl_dynamic_word_lstm.h5")
-
-# ---------------- LOAD LABELS ----------------
-with open("labels.txt") as f:
-    WORD_LABELS = [line.strip() for line in f.readlines()]
+# Bundles carry their own labels and input shape (see model_bundle.py)
+alphabet_bundle = load_bundle(ALPHABET_BUNDLE)
+word_bundle = load_bundle(WORD_BUNDLE)
 
-ALPHABET_LABELS = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+alphabet_model = alphabet_bundle.model
+word_model = word_bundle.model
+ALPHABET_LABELS = alphabet_bundle.labels
+WORD_LABELS = word_bundle.labels
 
 # ---------------- ROUTES ----------------
 @app.get("/")
@@ -49,10 +50,10 @@ def predict(payload: dict):
 
     # -------- ALPHABET --------
     if mode == "alphabet":
-        if landmarks.shape != (63,):
+        if landmarks.shape != alphabet_bundle.input_shape:
             return {"error": "Alphabet expects 63 values"}
 
-        x = landmarks.reshape(1, 63)
+        x = landmarks.reshape((1,) + alphabet_bundle.input_shape)
         preds = alphabet_model.predict(x, verbose=0)
         label = ALPHABET_LABELS[int(np.argmax(preds))]
 
@@ -60,10 +61,10 @@ def predict(payload: dict):
 
     # -------- WORD --------
     if mode == "word":
-        if landmarks.shape != (30, 63):
-            return {"error": "Word expects 30 frames of 63 landmarks"}
+        if landmarks.shape != word_bundle.input_shape:
+            return {"error": f"Word expects {word_bundle.sequence_length} frames of 63 landmarks"}
 
-        x = landmarks.reshape(1, 30, 63)
+        x = landmarks.reshape((1,) + word_bundle.input_shape)
         preds = word_model.predict(x, verbose=0)
         label = WORD_LABELS[int(np.argmax(preds))]
 
@@ -0,0 +1,110 @@
+"""
+Compare the frame-folder and direct-video ingestion paths of extract_dynamic_landmarks.py
+For each video: split it into a *_frames folder of JPEGs (what the old workflow
+required), then time and measure the bytes read by
+  - frames: load_frames + sample_frames + cv2.imread of the sampled JPEGs
+  - video:  frame_count + read_frames of the sampled indices
+Only decoding is measured; MediaPipe cost is the same for both paths.
+
+Usage:
+    python benchmark_video_ingest.py dynamic_words/HELLO/clip1.mp4 [more videos ...]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+
+from video_frames import frame_count, read_frames, sample_indices
+
+SEQUENCE_LENGTH = 30
+
+
+def read_bytes():
+    """Bytes this process has read so far (Linux /proc, else None)"""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def measure(fn):
+    before = read_bytes()
+    started = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - started
+    after = read_bytes()
+    return seconds, (after - before) if before is not None else None
+
+
+def split_to_frames(video_path, folder):
+    """The pre-split step the frame-folder path needs: every frame as a JPEG"""
+    cap = cv2.VideoCapture(video_path)
+    index = 0
+    while True:
+        ok, image = cap.read()
+        if not ok:
+            break
+        cv2.imwrite(os.path.join(folder, f"frame_{index:05d}.jpg"), image)
+        index += 1
+    cap.release()
+    return index
+
+
+def load_frames(folder):
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".jpg"))
+
+
+def benchmark(video_path, sequence_length):
+    folder = tempfile.mkdtemp(suffix="_frames")
+    try:
+        split_seconds = time.perf_counter()
+        frames_written = split_to_frames(video_path, folder)
+        split_seconds = time.perf_counter() - split_seconds
+        folder_bytes = sum(os.path.getsize(p) for p in load_frames(folder))
+
+        def frames_path():
+            frames = load_frames(folder)
+            sampled = [frames[i] for i in sample_indices(len(frames), sequence_length)]
+            return [cv2.imread(p) for p in sampled]
+
+        def video_path_read():
+            indices = sample_indices(frame_count(video_path), sequence_length)
+            return list(read_frames(video_path, sorted(set(indices))))
+
+        frames_seconds, frames_read = measure(frames_path)
+        video_seconds, video_read = measure(video_path_read)
+    finally:
+        shutil.rmtree(folder)
+
+    def mb(value):
+        return f"{value / 1e6:8.2f} MB" if value is not None else "     n/a"
+
+    print(f"\n{video_path}: {frames_written} frames, {os.path.getsize(video_path) / 1e6:.2f} MB video")
+    print(f"   pre-split (old workflow):   {split_seconds * 1000:8.1f} ms, {mb(folder_bytes)} of JPEGs stored")
+    print(f"   frames path (sampled read): {frames_seconds * 1000:8.1f} ms, {mb(frames_read)} read")
+    print(f"   video path (seek/grab):     {video_seconds * 1000:8.1f} ms, {mb(video_read)} read")
+    return {
+        "split": split_seconds, "frames": frames_seconds, "video": video_seconds,
+        "stored": folder_bytes,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Frame-folder vs direct video ingestion")
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("--sequence-length", type=int, default=SEQUENCE_LENGTH)
+    args = parser.parse_args()
+
+    results = [benchmark(path, args.sequence_length) for path in args.videos]
+    if len(results) > 1:
+        total = {name: sum(r[name] for r in results) for name in results[0]}
+        print(f"\nTotal over {len(results)} videos: pre-split {total['split']:.2f}s + frames {total['frames']:.2f}s "
+              f"vs video {total['video']:.2f}s; {total['stored'] / 1e6:.1f} MB of JPEGs not needed")
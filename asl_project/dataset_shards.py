@@ -0,0 +1,308 @@
+"""
+Sharded extraction across machines (or local processes standing in for them)
+
+1. plan: walk dataset/ (alphabet) or dynamic_words/ (words) once and write a
+   manifest listing every image / clip with its label and shard. A file's shard
+   is a stable hash of its path relative to the dataset root, so adding files
+   never moves existing ones to another shard.
+2. Each node runs the usual extraction script on its shard only:
+       python extract_landmarks.py --manifest alphabet.manifest.json --shard 2
+       python extract_dynamic_landmarks.py --manifest words.manifest.json --shard 2
+   which writes a partial output (asl_landmarks.shard-2-of-4/, X_dynamic.shard-2-of-4/)
+   plus a shard.json recording how many manifest items it processed.
+3. merge: check every partial against the manifest (same manifest, every item
+   processed, row counts consistent), then write the normal outputs in manifest
+   order with label indices from the full label list, i.e. exactly what a
+   single-node run over the same listing produces.
+
+run-local does 2 and 3 with one process per shard on this machine.
+
+Usage:
+    python dataset_shards.py plan alphabet 4            # -> alphabet.manifest.json
+    python dataset_shards.py plan words 4               # -> words.manifest.json
+    python dataset_shards.py run-local alphabet.manifest.json
+    python dataset_shards.py merge alphabet.manifest.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from video_frames import VideoClip
+
+MANIFEST_FORMAT = 1
+SHARD_INFO_FILE = "shard.json"
+POSITIONS_FILE = "positions.npy"  # Alphabet partials: manifest position of every row
+WORDS_X_FILE = "X.npy"
+
+KINDS = {
+    "alphabet": {"script": "extract_landmarks.py", "root": "dataset"},
+    "words": {"script": "extract_dynamic_landmarks.py", "root": "dynamic_words"},
+}
+
+
+def shard_of(relative_path, shards):
+    """Stable shard for a path relative to the dataset root (same on every OS and run)"""
+    key = relative_path.replace(os.sep, "/").encode()
+    return int(hashlib.sha256(key).hexdigest()[:8], 16) % shards
+
+
+def default_manifest_path(kind):
+    return f"{kind}.manifest.json"
+
+
+def partial_path(base, manifest, shard):
+    """Where a node writes its partial output, e.g. asl_landmarks.shard-2-of-4"""
+    return f"{base}.shard-{shard}-of-{manifest['shards']}"
+
+
+# ---------------- MANIFEST ----------------
+def build_manifest(kind, root, shards):
+    """Walk the dataset once -> manifest dict (items in the extraction scripts' walk order)"""
+    if kind == "alphabet":
+        from extract_landmarks import list_images
+
+        items = [
+            {"label": label, "path": os.path.relpath(path, root)}
+            for label, path in list_images(root)
+        ]
+        labels = sorted({item["label"] for item in items})
+    else:
+        from extract_dynamic_landmarks import list_clips
+
+        labels = sorted(
+            d for d in os.listdir(root)
+            if os.path.isdir(os.path.join(root, d)) and not d.startswith(".")
+        )
+        items = []
+        for label_index, source in list_clips(root, {label: i for i, label in enumerate(labels)}):
+            if isinstance(source, VideoClip):
+                item = {"path": os.path.relpath(source.path, root), "indices": list(source.indices)}
+            else:
+                item = {
+                    "path": os.path.relpath(os.path.dirname(source[0]), root),
+                    "frames": [os.path.relpath(frame, root) for frame in source],
+                }
+            items.append({"label": labels[label_index], **item})
+
+    for item in items:
+        item["shard"] = shard_of(item["path"], shards)
+
+    listing = json.dumps([kind, labels, items], sort_keys=True)
+    return {
+        "format": MANIFEST_FORMAT,
+        "kind": kind,
+        "root": root,
+        "shards": shards,
+        "labels": labels,
+        "count": len(items),
+        "shardCounts": [sum(item["shard"] == shard for item in items) for shard in range(shards)],
+        "fingerprint": hashlib.sha256(listing.encode()).hexdigest()[:16],
+        "items": items,
+    }
+
+
+def save_manifest(path, manifest):
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+
+
+def load_manifest(path, kind=None):
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"Unsupported manifest format in {path}: {manifest.get('format')}")
+    if kind is not None and manifest["kind"] != kind:
+        raise ValueError(f"{path} is a {manifest['kind']} manifest, expected {kind}")
+    return manifest
+
+
+def shard_items(manifest, shard):
+    """(manifest position, item) for every item of one shard, in manifest order"""
+    if not 0 <= shard < manifest["shards"]:
+        raise ValueError(f"Shard {shard} out of range, the manifest has {manifest['shards']} shards")
+    return [(position, item) for position, item in enumerate(manifest["items"]) if item["shard"] == shard]
+
+
+def alphabet_items(manifest, shard, root=None):
+    """(manifest positions, (label, image path) items for extract_landmarks.process_image)"""
+    root = root or manifest["root"]
+    selected = shard_items(manifest, shard)
+    return (
+        [position for position, _ in selected],
+        [(item["label"], os.path.join(root, item["path"])) for _, item in selected],
+    )
+
+
+def word_clips(manifest, shard, root=None):
+    """(label index, frame paths or VideoClip) clips for extract_dynamic_landmarks.process_clip"""
+    root = root or manifest["root"]
+    label_map = {label: i for i, label in enumerate(manifest["labels"])}
+    clips = []
+    for _, item in shard_items(manifest, shard):
+        if "indices" in item:
+            source = VideoClip(os.path.join(root, item["path"]), item["indices"])
+        else:
+            source = [os.path.join(root, frame) for frame in item["frames"]]
+        clips.append((label_map[item["label"]], source))
+    return clips
+
+
+# ---------------- PARTIALS ----------------
+def write_shard_info(path, manifest, shard, processed, rows):
+    """Record what a node extracted next to its partial output"""
+    info = {
+        "manifest": manifest["fingerprint"],
+        "kind": manifest["kind"],
+        "shard": shard,
+        "shards": manifest["shards"],
+        "processed": processed,
+        "rows": rows,
+    }
+    with open(os.path.join(path, SHARD_INFO_FILE), "w") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+def read_shard_info(path, manifest, shard):
+    """shard.json of a finished partial, checked against the manifest"""
+    info_path = os.path.join(path, SHARD_INFO_FILE)
+    if not os.path.exists(info_path):
+        raise ValueError(f"{path}: no {SHARD_INFO_FILE}, shard {shard} has not finished extracting")
+    with open(info_path) as f:
+        info = json.load(f)
+    if info["manifest"] != manifest["fingerprint"]:
+        raise ValueError(f"{path} was extracted from a different manifest ({info['manifest']})")
+    if info["shard"] != shard or info["shards"] != manifest["shards"]:
+        raise ValueError(f"{path} holds shard {info['shard']} of {info['shards']}, expected {shard} of {manifest['shards']}")
+    expected = manifest["shardCounts"][shard]
+    if info["processed"] != expected:
+        raise ValueError(f"{path}: processed {info['processed']} items, the manifest assigns {expected} to shard {shard}")
+    return info
+
+
+def merge_alphabet(manifest, output_path):
+    """Partials -> one binary dataset with rows in manifest order"""
+    from landmark_dataset import load_dataset, save_dataset
+
+    positions, features, names = [], [], []
+    for shard in range(manifest["shards"]):
+        path = partial_path(output_path, manifest, shard)
+        info = read_shard_info(path, manifest, shard)
+        shard_features, label_indices, labels = load_dataset(path, mmap=False)
+        shard_positions = np.load(os.path.join(path, POSITIONS_FILE))
+        if not (info["rows"] == len(shard_features) == len(shard_positions)):
+            raise ValueError(f"{path}: shard.json says {info['rows']} rows, found {len(shard_features)} "
+                             f"features and {len(shard_positions)} positions")
+        positions.append(shard_positions)
+        features.append(shard_features)
+        names.append(np.asarray(labels, dtype=str)[label_indices])
+        print(f" - shard {shard}: {info['processed']} images -> {info['rows']} rows")
+
+    positions = np.concatenate(positions) if positions else np.empty(0, dtype=np.int64)
+    order = np.argsort(positions, kind="stable")
+    if len(np.unique(positions)) != len(positions):
+        raise ValueError("Partials overlap: some manifest items were extracted by more than one shard")
+    # save_dataset derives the sorted label list from the merged rows, as a single-node run does
+    return save_dataset(output_path, np.concatenate(features)[order], np.concatenate(names)[order])
+
+
+def merge_words(manifest, output_x, output_y, label_file):
+    """Partials -> X_dynamic.npy / y_dynamic.npy / labels.txt in manifest order (streamed)"""
+    from sequence_writer import SequenceWriter
+
+    partials = []
+    for shard in range(manifest["shards"]):
+        path = partial_path(os.path.splitext(output_x)[0], manifest, shard)
+        info = read_shard_info(path, manifest, shard)
+        x = np.load(os.path.join(path, WORDS_X_FILE), mmap_mode="r")
+        if not (info["rows"] == info["processed"] == len(x)):
+            raise ValueError(f"{path}: expected {info['processed']} sequences, found {len(x)}")
+        partials.append(x)
+        print(f" - shard {shard}: {len(x)} sequences")
+
+    sample_shape = partials[0].shape[1:] if partials else (0,)
+    writer = SequenceWriter(output_x, manifest["count"], sample_shape, manifest["fingerprint"])
+    writer.open(resume=False)
+    next_row = [0] * manifest["shards"]
+    for item in manifest["items"]:
+        writer.write(partials[item["shard"]][next_row[item["shard"]]])
+        next_row[item["shard"]] += 1
+    x_shape = writer.close()
+
+    label_map = {label: i for i, label in enumerate(manifest["labels"])}
+    np.save(output_y, np.array([label_map[item["label"]] for item in manifest["items"]]))
+    with open(label_file, "w") as f:
+        for label in manifest["labels"]:
+            f.write(label + "\n")
+    return x_shape
+
+
+def merge(manifest):
+    if manifest["kind"] == "alphabet":
+        from extract_landmarks import OUTPUT_PATH
+
+        saved = merge_alphabet(manifest, OUTPUT_PATH)
+        print(f"Merged {saved['count']} samples, {len(saved['labels'])} labels -> {OUTPUT_PATH}/")
+    else:
+        from extract_dynamic_landmarks import OUTPUT_X, OUTPUT_Y, LABEL_FILE
+
+        x_shape = merge_words(manifest, OUTPUT_X, OUTPUT_Y, LABEL_FILE)
+        print(f"Merged {x_shape[0]} sequences -> {OUTPUT_X} {x_shape}, {OUTPUT_Y}, {LABEL_FILE}")
+
+
+# ---------------- LOCAL RUN ----------------
+def run_local(manifest_path, extra_args=()):
+    """One extraction process per shard on this machine (stand-ins for nodes), then merge"""
+    manifest = load_manifest(manifest_path)
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), KINDS[manifest["kind"]]["script"])
+    started = time.perf_counter()
+    processes = [
+        subprocess.Popen(
+            [sys.executable, script, "--manifest", manifest_path, "--shard", str(shard), *extra_args],
+            stdout=subprocess.DEVNULL,
+        )
+        for shard in range(manifest["shards"])
+    ]
+    failed = [shard for shard, process in enumerate(processes) if process.wait() != 0]
+    if failed:
+        raise SystemExit(f"Extraction failed for shard(s) {failed}")
+    print(f"Extracted {manifest['shards']} shards in {time.perf_counter() - started:.1f}s")
+    merge(manifest)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded landmark extraction")
+    sub = parser.add_subparsers(dest="command", required=True)
+    plan_parser = sub.add_parser("plan", help="write a shard manifest for a dataset")
+    plan_parser.add_argument("kind", choices=sorted(KINDS))
+    plan_parser.add_argument("shards", type=int)
+    plan_parser.add_argument("--root", help="dataset directory (default: dataset / dynamic_words)")
+    plan_parser.add_argument("--output", help="manifest path (default: <kind>.manifest.json)")
+    merge_parser = sub.add_parser("merge", help="combine finished shard partials into the final outputs")
+    merge_parser.add_argument("manifest")
+    local_parser = sub.add_parser("run-local", help="extract every shard in its own local process, then merge")
+    local_parser.add_argument("manifest")
+    local_parser.add_argument("extract_args", nargs=argparse.REMAINDER,
+                              help="passed on to the extraction script (e.g. --no-cache)")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        if args.shards < 1:
+            parser.error("shards must be at least 1")
+        manifest = build_manifest(args.kind, args.root or KINDS[args.kind]["root"], args.shards)
+        output = args.output or default_manifest_path(args.kind)
+        save_manifest(output, manifest)
+        print(f"{manifest['count']} items, {len(manifest['labels'])} labels -> {output}")
+        for shard, count in enumerate(manifest["shardCounts"]):
+            print(f" - shard {shard}: {count} items")
+    elif args.command == "merge":
+        merge(load_manifest(args.manifest))
+    else:
+        run_local(args.manifest, args.extract_args)
@@ -0,0 +1,236 @@
+"""
+Distil the word LSTM into smaller students for serving
+
+The trained word bundle (two stacked LSTM(64)) is the teacher. Each student
+trains on the same split as train_lstm_words.py against a mix of the true
+labels and the teacher's temperature-softened predictions:
+
+    loss = alpha * CE(label, student) + (1 - alpha) * T^2 * KL(teacher_T || student_T)
+
+Students:
+    gru   one small GRU over the 30 frames
+    tcn   dilated 1D convolutions (receptive field 15 frames) + average pooling
+    mlp   mean + max pooling over time, then a small MLP (no recurrence at all)
+
+The report (printed and written as JSON) lists test accuracy, agreement with
+the teacher, parameter count and single-sample model.predict latency for the
+teacher and every student. The chosen student (the fastest one within
+--tolerance of the teacher's accuracy, or --student) is saved as a regular
+word bundle: same labels, input shape and softmax output, so the backend
+serves it with WORD_BUNDLE_PATH=<bundle> and no code changes.
+
+Usage:
+    python distill_word_model.py
+    python distill_word_model.py --students gru tcn --temperature 4 --alpha 0.3 --augment
+"""
+
+import argparse
+import json
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+from tensorflow.keras.callbacks import EarlyStopping
+
+from inference_timing import single_sample_latency
+from input_pipeline import load_word_dataset, make_dataset, split_indices, validation_tail
+from landmark_augment import LandmarkAugmenter
+from model_bundle import ASL_PROJECT_DIR, WORD_BUNDLE, load_bundle, save_bundle
+from train_lstm_words import TEST_SIZE, VALIDATION_SPLIT, EPOCHS, BATCH_SIZE
+
+# ---------------- CONFIG ----------------
+STUDENT_BUNDLE = ASL_PROJECT_DIR / "asl_dynamic_word_student.bundle"
+REPORT_PATH = "distillation_report.json"
+TEMPERATURE = 4.0
+ALPHA = 0.3  # Weight of the hard-label loss
+TOLERANCE = 0.01  # Accuracy a student may lose against the teacher and still be chosen
+EVAL_BATCH_SIZE = 256
+
+
+# ---------------- STUDENTS ----------------
+# Each returns logits; the served model adds the softmax
+def build_gru(inputs, num_classes):
+    x = layers.GRU(32)(inputs)
+    x = layers.Dropout(0.2)(x)
+    return layers.Dense(num_classes)(x)
+
+
+def build_tcn(inputs, num_classes):
+    x = inputs
+    for dilation in (1, 2, 4):
+        x = layers.Conv1D(32, 3, padding="causal", dilation_rate=dilation, activation="relu")(x)
+    x = layers.GlobalAveragePooling1D()(x)
+    x = layers.Dropout(0.2)(x)
+    return layers.Dense(num_classes)(x)
+
+
+def build_mlp(inputs, num_classes):
+    x = layers.Concatenate()([layers.GlobalAveragePooling1D()(inputs), layers.GlobalMaxPooling1D()(inputs)])
+    x = layers.Dense(64, activation="relu")(x)
+    x = layers.Dropout(0.2)(x)
+    return layers.Dense(num_classes)(x)
+
+
+STUDENTS = {"gru": build_gru, "tcn": build_tcn, "mlp": build_mlp}
+
+
+def build_student(name, input_shape, num_classes):
+    """(logits model for training, softmax model for serving) sharing the same weights"""
+    inputs = tf.keras.Input(shape=input_shape)
+    logits = STUDENTS[name](inputs, num_classes)
+    probabilities = layers.Activation("softmax")(logits)
+    return tf.keras.Model(inputs, logits, name=f"{name}_logits"), tf.keras.Model(inputs, probabilities, name=name)
+
+
+# ---------------- DISTILLATION ----------------
+class Distiller(tf.keras.Model):
+    """Trains student (logits) against labels and the frozen teacher's softened predictions"""
+
+    def __init__(self, student, teacher, temperature=TEMPERATURE, alpha=ALPHA):
+        super().__init__()
+        self.student = student
+        self.teacher = teacher
+        self.temperature = temperature
+        self.alpha = alpha
+        self.loss_tracker = tf.keras.metrics.Mean(name="loss")
+        self.accuracy = tf.keras.metrics.SparseCategoricalAccuracy(name="accuracy")
+        self.hard_loss = tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True)
+        self.soft_loss = tf.keras.losses.KLDivergence()
+
+    @property
+    def metrics(self):
+        return [self.loss_tracker, self.accuracy]
+
+    def call(self, inputs, training=False):
+        return self.student(inputs, training=training)
+
+    def _soft_targets(self, x):
+        # The teacher outputs probabilities; log() recovers logits up to a constant
+        teacher_logits = tf.math.log(self.teacher(x, training=False) + 1e-8)
+        return tf.nn.softmax(teacher_logits / self.temperature)
+
+    def train_step(self, data):
+        x, y = data
+        soft_targets = self._soft_targets(x)
+        with tf.GradientTape() as tape:
+            logits = self.student(x, training=True)
+            soft = self.soft_loss(soft_targets, tf.nn.softmax(logits / self.temperature))
+            loss = self.alpha * self.hard_loss(y, logits) + (1 - self.alpha) * self.temperature ** 2 * soft
+        gradients = tape.gradient(loss, self.student.trainable_variables)
+        self.optimizer.apply_gradients(zip(gradients, self.student.trainable_variables))
+        self.loss_tracker.update_state(loss)
+        self.accuracy.update_state(y, logits)
+        return {metric.name: metric.result() for metric in self.metrics}
+
+    def test_step(self, data):
+        # Validation loss is plain cross-entropy on the labels, so early stopping tracks real accuracy
+        x, y = data
+        logits = self.student(x, training=False)
+        self.loss_tracker.update_state(self.hard_loss(y, logits))
+        self.accuracy.update_state(y, logits)
+        return {metric.name: metric.result() for metric in self.metrics}
+
+
+def predict_classes(model, X, indices):
+    return np.argmax(model.predict(np.asarray(X[np.sort(indices)], dtype=np.float32),
+                                   batch_size=EVAL_BATCH_SIZE, verbose=0), axis=1)
+
+
+def describe(model, X, y, test_indices, teacher_classes=None):
+    """Accuracy, teacher agreement, size and latency of a softmax model"""
+    classes = predict_classes(model, X, test_indices)
+    latency = single_sample_latency(model, model.input_shape[1:])
+    row = {
+        "testAccuracy": round(float(np.mean(classes == y[np.sort(test_indices)])), 4),
+        "parameters": int(model.count_params()),
+        "latencyMedianMs": round(latency["medianMs"], 3),
+        "latencyP95Ms": round(latency["p95Ms"], 3),
+    }
+    if teacher_classes is not None:
+        row["teacherAgreement"] = round(float(np.mean(classes == teacher_classes)), 4)
+    return row, classes
+
+
+def choose(report, tolerance):
+    """Fastest student whose accuracy is within tolerance of the teacher's (None if none qualifies)"""
+    floor = report["teacher"]["testAccuracy"] - tolerance
+    qualified = [name for name, row in report["students"].items() if row["testAccuracy"] >= floor]
+    return min(qualified, key=lambda name: report["students"][name]["latencyMedianMs"], default=None)
+
+
+# ---------------- MAIN ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Distil the word LSTM into compact students")
+    parser.add_argument("--teacher", default=str(WORD_BUNDLE), help="teacher word bundle")
+    parser.add_argument("--students", nargs="+", choices=sorted(STUDENTS), default=sorted(STUDENTS))
+    parser.add_argument("--temperature", type=float, default=TEMPERATURE)
+    parser.add_argument("--alpha", type=float, default=ALPHA, help="weight of the hard-label loss")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--augment", action="store_true", help="augment training batches (the teacher labels them)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="accuracy a student may lose against the teacher and still be chosen")
+    parser.add_argument("--student", choices=sorted(STUDENTS), help="save this student instead of choosing one")
+    parser.add_argument("--output", default=str(STUDENT_BUNDLE), help="where to save the chosen student bundle")
+    parser.add_argument("--report", default=REPORT_PATH)
+    args = parser.parse_args()
+
+    teacher = load_bundle(args.teacher)
+    X, y, labels = load_word_dataset()
+    if labels != teacher.labels:
+        raise ValueError(f"Teacher labels {teacher.labels} do not match labels.txt {labels}")
+
+    # Same split as train_lstm_words.py, so the teacher's test rows are unseen here too
+    train_indices, test_indices = split_indices(y, TEST_SIZE)
+    fit_indices, validation_indices = validation_tail(train_indices, VALIDATION_SPLIT)
+    augment = LandmarkAugmenter() if args.augment else None
+    train_set = make_dataset(X, y, fit_indices, args.batch_size, training=True, augment=augment)
+    validation_set = make_dataset(X, y, validation_indices, EVAL_BATCH_SIZE)
+
+    teacher_row, teacher_classes = describe(teacher.model, X, y, test_indices)
+    report = {
+        "teacher": {"bundle": str(args.teacher), "version": teacher.version, **teacher_row},
+        "settings": {"temperature": args.temperature, "alpha": args.alpha, "augment": args.augment},
+        "students": {},
+    }
+    print(f"teacher: accuracy {teacher_row['testAccuracy']:.4f}, {teacher_row['parameters']} params, "
+          f"{teacher_row['latencyMedianMs']:.2f} ms")
+
+    served = {}
+    for name in args.students:
+        logits_model, serving_model = build_student(name, teacher.input_shape, len(labels))
+        distiller = Distiller(logits_model, teacher.model, args.temperature, args.alpha)
+        distiller.compile(optimizer="adam")
+        early_stop = EarlyStopping(monitor="val_loss", patience=10, restore_best_weights=True)
+        distiller.fit(train_set, validation_data=validation_set, epochs=args.epochs, callbacks=[early_stop], verbose=0)
+
+        row, _ = describe(serving_model, X, y, test_indices, teacher_classes)
+        report["students"][name] = row
+        served[name] = serving_model
+        print(f"{name:7s}: accuracy {row['testAccuracy']:.4f} (agrees with teacher {row['teacherAgreement']:.1%}), "
+              f"{row['parameters']} params, {row['latencyMedianMs']:.2f} ms "
+              f"({teacher_row['latencyMedianMs'] / max(row['latencyMedianMs'], 1e-9):.1f}x faster)")
+
+    chosen = args.student or choose(report, args.tolerance)
+    report["chosen"] = chosen
+    if chosen is None:
+        print(f"No student is within {args.tolerance:.3f} of the teacher's accuracy; nothing saved")
+    elif chosen not in served:
+        raise SystemExit(f"--student {chosen} was not trained (pick it in --students)")
+    else:
+        bundle = save_bundle(args.output, served[chosen], labels, name=f"word_{chosen}_student", extra={
+            "testAccuracy": report["students"][chosen]["testAccuracy"],
+            "teacherVersion": teacher.version,
+            "distillation": report["settings"],
+        })
+        report["chosenBundle"] = {"path": str(args.output), "version": bundle["version"]}
+        print(f"Saved {chosen} student as {args.output} (version {bundle['version']}); "
+              f"serve it with WORD_BUNDLE_PATH={args.output}")
+
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
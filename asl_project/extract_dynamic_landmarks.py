@@ -1,7 +1,18 @@
+import argparse
+import hashlib
+import json
 import os
-import cv2
+import time
+
 import numpy as np
-import mediapipe as mp
+
+from dataset_shards import WORDS_X_FILE, load_manifest, partial_path, word_clips, write_shard_info
+from hand_landmarks import (
+    DECODE_THREADS, PREFETCH_IMAGES, landmarks_for_file, landmarks_for_video, iter_tasks, print_worker_report
+)
+from landmark_cache import DEFAULT_CACHE_PATH
+from sequence_writer import SequenceWriter, peak_rss_mb
+from video_frames import VideoClip, is_video, frame_count, sample_indices
 
 # ---------------- CONFIG ----------------
 DATASET_PATH = "dynamic_words"
@@ -10,19 +21,11 @@ OUTPUT_X = "X_dynamic.npy"
 OUTPUT_Y = "y_dynamic.npy"
 LABEL_FILE = "labels.txt"
 
-# ---------------- MEDIAPIPE ----------------
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(static_image_mode=True, max_num_hands=1)
-
 # ---------------- HELPERS ----------------
-def extract_landmarks(image):
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    result = hands.process(image_rgb)
-
-    if result.multi_hand_landmarks:
-        landmarks = []
-        for lm in result.multi_hand_landmarks[0].landmark:
-            landmarks.extend([lm.x, lm.y, lm.z])
+def extract_landmarks(hands, frame_path):
+    readable, landmarks = landmarks_for_file(hands, frame_path)
+
+    if landmarks is not None:
         return np.array(landmarks)
     else:
         return np.zeros(63)
@@ -37,62 +40,143 @@ def load_frames(folder):
 
 
 def sample_frames(frames, target_len):
-    if len(frames) >= target_len:
-        idx = np.linspace(0, len(frames) - 1, target_len).astype(int)
-        return [frames[i] for i in idx]
-    else:
-        return frames + [frames[-1]] * (target_len - len(frames))
+    return [frames[i] for i in sample_indices(len(frames), target_len)]
 
 
-# ---------------- MAIN ----------------
-X, y = [], []
+def list_clips(dataset_path, label_map):
+    """
+    (label index, sampled frame paths or VideoClip) per usable clip, in dataset walk order
+    A clip is either a *_frames folder of JPEGs or a source video (read directly,
+    in which case a <name>_frames folder next to it is skipped)
+    """
+    clips = []
+    for label in label_map:
+        label_path = os.path.join(dataset_path, label)
+        entries = os.listdir(label_path)
+        videos = {os.path.splitext(e)[0] for e in entries if is_video(e)}
+
+        for clip in entries:
+            clip_path = os.path.join(label_path, clip)
+
+            if is_video(clip):
+                count = frame_count(clip_path)
+                if count < 5:
+                    continue
+                clips.append((label_map[label], VideoClip(clip_path, sample_indices(count, SEQUENCE_LENGTH))))
+                continue
 
-labels = sorted([
-    d for d in os.listdir(DATASET_PATH)
-    if os.path.isdir(os.path.join(DATASET_PATH, d)) and not d.startswith(".")
-])
+            if not clip.endswith("_frames") or clip[:-len("_frames")] in videos:
+                continue
 
-label_map = {label: i for i, label in enumerate(labels)}
-print("Labels:", label_map)
+            frames = load_frames(clip_path)
 
-for label in labels:
-    label_path = os.path.join(DATASET_PATH, label)
+            if len(frames) < 5:
+                continue
 
-    for clip in os.listdir(label_path):
-        if not clip.endswith("_frames"):
-            continue
+            clips.append((label_map[label], sample_frames(frames, SEQUENCE_LENGTH)))
+    return clips
 
-        clip_path = os.path.join(label_path, clip)
-        frames = load_frames(clip_path)
 
-        if len(frames) < 5:
-            continue
+def process_clip(hands, clip):
+    """Landmark sequence for one clip (padded copies of the last frame are only extracted once)"""
+    _, source = clip
 
-        frames = sample_frames(frames, SEQUENCE_LENGTH)
+    if isinstance(source, VideoClip):
+        return [
+            np.array(landmarks) if landmarks is not None else np.zeros(63)
+            for _, landmarks in landmarks_for_video(hands, source)
+        ]
+    return [extract_landmarks(hands, frame_path) for frame_path in source]
 
-        sequence = []
-        for frame_path in frames:
-            img = cv2.imread(frame_path)
-            if img is None:
-                sequence.append(np.zeros(63))
-            else:
-                sequence.append(extract_landmarks(img))
 
-        X.append(sequence)
-        y.append(label_map[label])
+def clip_sources(clip):
+    """What process_clip() will read, so the decode stage can load it ahead"""
+    _, source = clip
+    return [source] if isinstance(source, VideoClip) else list(source)
 
-X = np.array(X)
-y = np.array(y)
 
-np.save(OUTPUT_X, X)
-np.save(OUTPUT_Y, y)
+def clips_fingerprint(clips):
+    """Identifies the clip list (and sampling) a partial X_dynamic.npy was written for"""
+    listing = [[label_index, list(source)] for label_index, source in clips]
+    return hashlib.sha256(json.dumps([SEQUENCE_LENGTH, listing]).encode()).hexdigest()[:16]
 
-with open(LABEL_FILE, "w") as f:
-    for label in labels:
-        f.write(label + "\n")
 
-print("Total samples:", len(X))
-print("Saved:")
-print(" -", OUTPUT_X, X.shape)
-print(" -", OUTPUT_Y, y.shape)
-print(" -", LABEL_FILE)
+# ---------------- MAIN ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Extract landmark sequences from the dynamic word clips")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="extraction processes (1 = serial, each worker runs its own MediaPipe Hands)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH,
+                        help="landmark cache file; only new or changed frames go through MediaPipe")
+    parser.add_argument("--no-cache", action="store_true", help="extract every frame from scratch")
+    parser.add_argument("--decode-threads", type=int, default=DECODE_THREADS,
+                        help="frame decode threads per worker, feeding MediaPipe ahead of time (0 = decode inline)")
+    parser.add_argument("--prefetch", type=int, default=PREFETCH_IMAGES,
+                        help="decoded frames allowed ahead of MediaPipe per worker")
+    parser.add_argument("--restart", action="store_true",
+                        help=f"ignore a partial {OUTPUT_X} from an interrupted run instead of resuming it")
+    parser.add_argument("--manifest", help="shard manifest from dataset_shards.py; extract only --shard of it")
+    parser.add_argument("--shard", type=int, help="shard to extract into a partial output (with --manifest)")
+    parser.add_argument("--root", help="dynamic_words directory on this node (default: the manifest's root)")
+    args = parser.parse_args()
+
+    if args.manifest:
+        if args.shard is None:
+            parser.error("--manifest needs --shard")
+        shard_manifest = load_manifest(args.manifest, "words")
+        clips = word_clips(shard_manifest, args.shard, args.root)
+        partial_dir = partial_path(os.path.splitext(OUTPUT_X)[0], shard_manifest, args.shard)
+        os.makedirs(partial_dir, exist_ok=True)
+        output_x = os.path.join(partial_dir, WORDS_X_FILE)
+        print(f"Shard {args.shard} of {shard_manifest['shards']}: {len(clips)} of {shard_manifest['count']} clips")
+    else:
+        labels = sorted([
+            d for d in os.listdir(DATASET_PATH)
+            if os.path.isdir(os.path.join(DATASET_PATH, d)) and not d.startswith(".")
+        ])
+
+        label_map = {label: i for i, label in enumerate(labels)}
+        print("Labels:", label_map)
+
+        clips = list_clips(DATASET_PATH, label_map)
+        output_x = OUTPUT_X
+    print(f"Found {len(clips)} clips, extracting with {args.workers} worker(s)")
+
+    # Sequences stream into a float32 .npy on disk (flat memory, resumable after a crash)
+    writer = SequenceWriter(output_x, len(clips), (SEQUENCE_LENGTH, 63), clips_fingerprint(clips))
+    done = writer.open(resume=not args.restart)
+
+    started = time.perf_counter()
+    per_worker = {}
+    for sequence in iter_tasks(
+        process_clip, clips[done:], workers=args.workers, shard_size=4,
+        cache_path=None if args.no_cache else args.cache, per_worker=per_worker,
+        sources=clip_sources, decode_threads=args.decode_threads, prefetch_images=args.prefetch
+    ):
+        writer.write(sequence)
+    x_shape = writer.close()
+    print_worker_report(per_worker, time.perf_counter() - started, args.decode_threads)
+
+    if args.manifest:
+        # Labels and y come from the manifest when dataset_shards.py merges the partials
+        write_shard_info(partial_dir, shard_manifest, args.shard, processed=len(clips), rows=x_shape[0])
+        print(f"Saved {output_x} {x_shape}; run dataset_shards.py merge once every shard is done")
+        return
+
+    y = np.array([label_index for label_index, _ in clips])
+    np.save(OUTPUT_Y, y)
+
+    with open(LABEL_FILE, "w") as f:
+        for label in labels:
+            f.write(label + "\n")
+
+    print("Total samples:", x_shape[0])
+    print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+    print("Saved:")
+    print(" -", OUTPUT_X, x_shape)
+    print(" -", OUTPUT_Y, y.shape)
+    print(" -", LABEL_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,110 @@
-import cv2
-import mediapipe as mp
+import argparse
 import os
-import pandas as pd
+import time
 
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(static_image_mode=True, max_num_hands=1)
+import numpy as np
+
+from dataset_shards import POSITIONS_FILE, alphabet_items, load_manifest, partial_path, write_shard_info
+from hand_landmarks import DECODE_THREADS, PREFETCH_IMAGES, landmarks_for_file, run_tasks, print_worker_report
+from landmark_cache import DEFAULT_CACHE_PATH
+from landmark_dataset import save_dataset, DEFAULT_PATH
 
 DATASET_PATH = "dataset"
-OUTPUT_FILE = "asl_landmarks.csv"
+OUTPUT_PATH = DEFAULT_PATH  # binary dataset, see landmark_dataset.py
+OUTPUT_CSV = "asl_landmarks.csv"
+
 
-data = []
+def list_images(dataset_path):
+    """(label, image path) pairs in dataset walk order"""
+    items = []
+    for label in os.listdir(dataset_path):
+        folder = os.path.join(dataset_path, label)
 
-for label in os.listdir(DATASET_PATH):
-    folder = os.path.join(DATASET_PATH, label)
+        if not os.path.isdir(folder):
+            continue
 
-    if not os.path.isdir(folder):
-        continue
+        for img_name in os.listdir(folder):
+            items.append((label, os.path.join(folder, img_name)))
+    return items
 
-    for img_name in os.listdir(folder):
-        img_path = os.path.join(folder, img_name)
-        img = cv2.imread(img_path)
 
-        if img is None:
-            continue
+def process_image(hands, item):
+    """Landmark row + label for one image (None if unreadable or no hand)"""
+    label, img_path = item
+    readable, landmarks = landmarks_for_file(hands, img_path)
+
+    if not readable or landmarks is None:
+        return None
+    return landmarks + [label]
+
+
+def image_sources(item):
+    """What process_image() will read, so the decode stage can load it ahead"""
+    return [item[1]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract hand landmarks from the alphabet image dataset")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="extraction processes (1 = serial, each worker runs its own MediaPipe Hands)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH,
+                        help="landmark cache file; only new or changed images go through MediaPipe")
+    parser.add_argument("--no-cache", action="store_true", help="extract every image from scratch")
+    parser.add_argument("--decode-threads", type=int, default=DECODE_THREADS,
+                        help="image decode threads per worker, feeding MediaPipe ahead of time (0 = decode inline)")
+    parser.add_argument("--prefetch", type=int, default=PREFETCH_IMAGES,
+                        help="decoded images allowed ahead of MediaPipe per worker")
+    parser.add_argument("--csv", action="store_true", help=f"also write {OUTPUT_CSV}")
+    parser.add_argument("--manifest", help="shard manifest from dataset_shards.py; extract only --shard of it")
+    parser.add_argument("--shard", type=int, help="shard to extract into a partial output (with --manifest)")
+    parser.add_argument("--root", help="dataset directory on this node (default: the manifest's root)")
+    args = parser.parse_args()
+
+    if args.manifest:
+        if args.shard is None:
+            parser.error("--manifest needs --shard")
+        if args.csv:
+            parser.error("--csv is written by a single-node run only")
+        shard_manifest = load_manifest(args.manifest, "alphabet")
+        positions, items = alphabet_items(shard_manifest, args.shard, args.root)
+        output_path = partial_path(OUTPUT_PATH, shard_manifest, args.shard)
+        print(f"Shard {args.shard} of {shard_manifest['shards']}: {len(items)} of {shard_manifest['count']} images")
+    else:
+        items = list_images(DATASET_PATH)
+        output_path = OUTPUT_PATH
+    print(f"Found {len(items)} images, extracting with {args.workers} worker(s)")
+
+    started = time.perf_counter()
+    rows, per_worker = run_tasks(
+        process_image, items, workers=args.workers, cache_path=None if args.no_cache else args.cache,
+        sources=image_sources, decode_threads=args.decode_threads, prefetch_images=args.prefetch
+    )
+    data = [row for row in rows if row is not None]
+    print_worker_report(per_worker, time.perf_counter() - started, args.decode_threads)
+
+    manifest = save_dataset(output_path, [row[:-1] for row in data], [row[-1] for row in data])
+    print(f"Saved {manifest['count']} samples, {len(manifest['labels'])} labels -> {output_path}/")
+
+    if args.manifest:
+        # Rows are merged back into manifest order by dataset_shards.py merge
+        kept = [position for position, row in zip(positions, rows) if row is not None]
+        np.save(os.path.join(output_path, POSITIONS_FILE), np.array(kept, dtype=np.int64))
+        write_shard_info(output_path, shard_manifest, args.shard, processed=len(items), rows=len(kept))
+
+    if args.csv:
+        import pandas as pd
 
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        result = hands.process(img_rgb)
+        columns = []
+        for i in range(21):
+            columns.extend([f"x{i}", f"y{i}", f"z{i}"])
+        columns.append("label")
 
-        if result.multi_hand_landmarks:
-            row = []
-            for lm in result.multi_hand_landmarks[0].landmark:
-                row.extend([lm.x, lm.y, lm.z])
-            row.append(label)
-            data.append(row)
+        df = pd.DataFrame(data, columns=columns)
+        df.to_csv(OUTPUT_CSV, index=False)
+        print(f"Saved {OUTPUT_CSV}")
 
-columns = []
-for i in range(21):
-    columns.extend([f"x{i}", f"y{i}", f"z{i}"])
-columns.append("label")
+    print("Landmark extraction completed successfully")
 
-df = pd.DataFrame(data, columns=columns)
-df.to_csv(OUTPUT_FILE, index=False)
 
-print("Landmark extraction completed successfully")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+Shared MediaPipe hand-landmark extraction for the offline dataset scripts
+(extract_landmarks.py and extract_dynamic_landmarks.py)
+
+run_tasks() / iter_tasks() apply a per-item task either in this process or on
+a process pool where every worker creates its own Hands instance once and
+handles whole shards of items. Results come back in input order, so the output
+files are identical to the serial path.
+
+With a cache_path, landmarks_for_file() answers from the content-addressed
+LandmarkCache (landmark_cache.py) and only runs MediaPipe on new or changed
+images; repeated images within a shard (e.g. padded clip frames) are computed once.
+landmarks_for_video() does the same for sampled frames of a source video.
+
+Each worker is a two-stage pipeline: a decode thread pool (hashing, cache
+lookups, cv2.imread / video decode and BGR -> RGB, all of which release the
+GIL) runs ahead of the MediaPipe stage through a bounded prefetch window of
+decoded images. The decode stage reads exactly the same pixels, so the
+landmarks are unchanged; only the order of I/O and detection overlaps.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+import mediapipe as mp
+
+from landmark_cache import LandmarkCache, settings_digest
+from video_frames import VideoClip, read_frames
+
+# ---------------- MEDIAPIPE ----------------
+HANDS_OPTIONS = {"static_image_mode": True, "max_num_hands": 1}
+CACHE_SETTINGS = settings_digest(HANDS_OPTIONS, mp.__version__)
+
+# ---------------- PIPELINE ----------------
+DECODE_THREADS = 4  # Per worker process
+PREFETCH_IMAGES = 32  # Decoded images allowed ahead of MediaPipe per worker
+
+
+def create_hands():
+    return mp.solutions.hands.Hands(**HANDS_OPTIONS)
+
+
+def hand_landmarks(hands, image):
+    """63 values (x, y, z for each of the 21 points) of the first hand in a BGR image, or None"""
+    return hand_landmarks_rgb(hands, cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+
+def hand_landmarks_rgb(hands, image_rgb):
+    """hand_landmarks() for an image that is already RGB"""
+    result = hands.process(image_rgb)
+
+    if not result.multi_hand_landmarks:
+        return None
+
+    landmarks = []
+    for lm in result.multi_hand_landmarks[0].landmark:
+        landmarks.extend([lm.x, lm.y, lm.z])
+    return landmarks
+
+
+def _to_rgb(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB) if image is not None else None
+
+
+# ---------------- DECODE STAGE ----------------
+# Loaders run on the decode threads: they only read files and the cache and never touch _shard
+_cache_path = None
+_local = threading.local()  # One read-only cache connection per decode thread
+
+
+def _thread_cache():
+    if _cache_path is None:
+        return None
+    cache = getattr(_local, "cache", None)
+    if cache is None:
+        cache = _local.cache = LandmarkCache(_cache_path, CACHE_SETTINGS, readonly=True)
+    return cache
+
+
+def _load_file(path):
+    """(readable, cache key, files row, cached (True, landmarks) or None, RGB image or None)"""
+    key = file_row = None
+    cache = _thread_cache()
+    if cache is not None:
+        try:
+            content_hash, file_row = cache.content_hash(path)
+        except OSError:
+            return False, None, None, None, None
+        key = cache.key(content_hash)
+        found, landmarks = cache.get(key)
+        if found:
+            return True, key, file_row, (True, landmarks), None
+
+    image = _to_rgb(cv2.imread(path))
+    return image is not None, key, file_row, None, image
+
+
+def _load_video(clip):
+    """(files row, { index: cache key }, { index: cached landmarks }, { index: RGB image or None })"""
+    unique = sorted(set(clip.indices))
+    file_row, keys, cached = None, {}, {}
+    cache = _thread_cache()
+    if cache is not None:
+        try:
+            content_hash, file_row = cache.content_hash(clip.path)
+        except OSError:
+            return None, {}, {}, {index: None for index in unique}
+        for index in unique:
+            key = cache.key(f"{content_hash}#{index}")
+            found, landmarks = cache.get(key)
+            if found:
+                cached[index] = landmarks
+            else:
+                keys[index] = key
+
+    missing = [index for index in unique if index not in cached]
+    frames = {index: _to_rgb(image) for index, image in read_frames(clip.path, missing)}
+    return file_row, keys, cached, frames
+
+
+def _source_key(source):
+    return (source.path, tuple(source.indices)) if isinstance(source, VideoClip) else source
+
+
+def _timed(loader, source):
+    started = time.perf_counter()
+    result = loader(source)
+    return result, time.perf_counter() - started
+
+
+class _Prefetcher:
+    """
+    Loads a shard's sources (image paths / VideoClips, in the order the tasks will ask
+    for them) on the decode pool, keeping at most `depth` decoded images in flight
+    """
+
+    def __init__(self, pool, sources, depth):
+        self._pool = pool
+        self._depth = depth
+        self._queue = deque()
+        seen = set()
+        for source in sources:
+            key = _source_key(source)
+            if key not in seen:
+                seen.add(key)
+                self._queue.append(source)
+        self._pending = {}  # source key -> (future, images)
+        self._in_flight = 0
+        self._fill()
+
+    def _fill(self):
+        while self._queue and (self._in_flight < self._depth or not self._pending):
+            source = self._queue.popleft()
+            if isinstance(source, VideoClip):
+                loader, images = _load_video, len(set(source.indices))
+            else:
+                loader, images = _load_file, 1
+            self._pending[_source_key(source)] = (self._pool.submit(_timed, loader, source), images)
+            self._in_flight += images
+
+    def take(self, source):
+        """(loaded, decode seconds, seconds waited) or None if source was not prefetched"""
+        entry = self._pending.pop(_source_key(source), None)
+        if entry is None:
+            return None
+        future, images = entry
+        started = time.perf_counter()
+        loaded, seconds = future.result()
+        waited = time.perf_counter() - started
+        self._in_flight -= images
+        self._fill()
+        return loaded, seconds, waited
+
+    def close(self):
+        for future, _ in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._queue.clear()
+
+
+def _load(loader, source):
+    """Loaded source from the prefetcher, or decoded right here if it was not prefetched"""
+    stats = _shard["stats"]
+    prefetcher = _shard["prefetcher"]
+    taken = prefetcher.take(source) if prefetcher is not None else None
+    if taken is None:
+        started = time.perf_counter()
+        loaded, seconds = _timed(loader, source)
+        waited = time.perf_counter() - started
+    else:
+        loaded, seconds, waited = taken
+    stats["decode_seconds"] += seconds
+    stats["wait_seconds"] += waited
+    return loaded
+
+
+def _detect(hands, image_rgb):
+    stats = _shard["stats"]
+    started = time.perf_counter()
+    landmarks = hand_landmarks_rgb(hands, image_rgb)
+    stats["detect_seconds"] += time.perf_counter() - started
+    stats["detected"] += 1
+    return landmarks
+
+
+# ---------------- WORKERS ----------------
+_hands = None  # One Hands instance per process
+_decoder = None  # Decode thread pool per process (None = decode inline)
+_prefetch_images = PREFETCH_IMAGES
+_shard = None  # Per-shard memo, new cache entries and counters
+
+
+def _init_worker(cache_path=None, decode_threads=DECODE_THREADS, prefetch_images=PREFETCH_IMAGES):
+    global _hands, _cache_path, _decoder, _prefetch_images
+    _hands = create_hands()
+    _cache_path = cache_path
+    _decoder = ThreadPoolExecutor(decode_threads, thread_name_prefix="decode") if decode_threads > 0 else None
+    _prefetch_images = prefetch_images
+
+
+def _shutdown_worker():
+    global _decoder
+    if _decoder is not None:
+        _decoder.shutdown(cancel_futures=True)
+        _decoder = None
+
+
+def _new_shard():
+    return {
+        "memo": {},  # { path or cache key: (readable, landmarks) }
+        "files": [],
+        "landmarks": {},
+        "prefetcher": None,
+        "stats": {
+            "images": 0, "detected": 0, "cached": 0, "deduped": 0,
+            "decode_seconds": 0.0, "detect_seconds": 0.0, "wait_seconds": 0.0,
+        },
+    }
+
+
+def landmarks_for_file(hands, path):
+    """
+    (readable, landmarks or None) for an image file
+    Served from the shard memo or the landmark cache when possible, otherwise decoded + MediaPipe
+    """
+    stats = _shard["stats"]
+    stats["images"] += 1
+    memo = _shard["memo"]
+    if path in memo:
+        stats["deduped"] += 1
+        return memo[path]
+
+    readable, key, file_row, cached, image = _load(_load_file, path)
+    if file_row is not None:
+        _shard["files"].append(file_row)
+    if key is not None and key in memo:
+        stats["deduped"] += 1
+        memo[path] = memo[key]
+        return memo[key]
+    if cached is not None:
+        stats["cached"] += 1
+        memo[path] = memo[key] = cached
+        return cached
+
+    if not readable:
+        outcome = (False, None)
+    else:
+        outcome = (True, _detect(hands, image))
+        if key is not None:
+            _shard["landmarks"][key] = outcome[1]
+            memo[key] = outcome
+    memo[path] = outcome
+    return outcome
+
+
+def landmarks_for_video(hands, clip):
+    """
+    (readable, landmarks or None) for every index of a VideoClip, in clip.indices order
+    Only frames that are neither cached nor repeated are decoded (see video_frames.read_frames)
+    """
+    stats = _shard["stats"]
+    stats["images"] += len(clip.indices)
+    stats["deduped"] += len(clip.indices) - len(set(clip.indices))
+
+    file_row, keys, cached, frames = _load(_load_video, clip)
+    if file_row is not None:
+        _shard["files"].append(file_row)
+    stats["cached"] += len(cached)
+
+    outcomes = {index: (True, landmarks) for index, landmarks in cached.items()}
+    for index, image in frames.items():
+        if image is None:
+            outcomes[index] = (False, None)
+            continue
+        outcomes[index] = (True, _detect(hands, image))
+        if index in keys:
+            _shard["landmarks"][keys[index]] = outcomes[index][1]
+
+    return [outcomes[index] for index in clip.indices]
+
+
+def _run_shard(task, shard_index, items, sources=None):
+    global _shard
+    _shard = _new_shard()
+    started = time.perf_counter()
+    if sources is not None and _decoder is not None:
+        planned = [source for item in items for source in sources(item)]
+        _shard["prefetcher"] = _Prefetcher(_decoder, planned, _prefetch_images)
+    try:
+        results = [task(_hands, item) for item in items]
+    finally:
+        if _shard["prefetcher"] is not None:
+            _shard["prefetcher"].close()
+    shard, _shard = _shard, None
+    del shard["prefetcher"]
+    return shard_index, results, os.getpid(), shard, time.perf_counter() - started
+
+
+def iter_tasks(task, items, workers=1, shard_size=32, cache_path=None, per_worker=None,
+               sources=None, decode_threads=DECODE_THREADS, prefetch_images=PREFETCH_IMAGES):
+    """
+    Apply task(hands, item) -> result to every item, yielding results in input order
+    workers <= 1 runs in this process; otherwise shards of shard_size items go to a process pool,
+    with at most 2 shards per worker in flight so finished results never pile up in memory.
+    Tasks should read images through landmarks_for_file() / landmarks_for_video() so they are
+    counted and cached.
+    sources(item) -> [image path or VideoClip, ...] lists what a task will read, in order; with it
+    each worker's decode_threads load those ahead of MediaPipe, prefetch_images decoded images deep.
+    per_worker (optional dict) is filled with
+    { pid: { images, detected, cached, deduped, seconds, decode_seconds, detect_seconds, wait_seconds } }
+    """
+    per_worker = {} if per_worker is None else per_worker
+    cache = LandmarkCache(cache_path, CACHE_SETTINGS) if cache_path else None
+    shards = [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+    worker_args = (cache_path, decode_threads, prefetch_images)
+
+    def record(shard_index, results, pid, shard, seconds):
+        if cache is not None:
+            cache.put(shard["files"], shard["landmarks"])
+        stats = per_worker.setdefault(pid, {"seconds": 0.0})
+        for name, value in shard["stats"].items():
+            stats[name] = stats.get(name, 0) + value
+        stats["seconds"] += seconds
+        return results
+
+    try:
+        if workers <= 1:
+            _init_worker(*worker_args)
+            try:
+                for shard_index, shard in enumerate(shards):
+                    yield from record(*_run_shard(task, shard_index, shard, sources))
+            finally:
+                _shutdown_worker()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=worker_args) as pool:
+                pending = {}
+                submitted = 0
+                for shard_index in range(len(shards)):
+                    while submitted < len(shards) and submitted < shard_index + 2 * workers:
+                        pending[submitted] = pool.submit(_run_shard, task, submitted, shards[submitted], sources)
+                        submitted += 1
+                    yield from record(*pending.pop(shard_index).result())
+                    print(f"   shard {shard_index + 1}/{len(shards)} done")
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def run_tasks(task, items, workers=1, shard_size=32, cache_path=None, sources=None,
+              decode_threads=DECODE_THREADS, prefetch_images=PREFETCH_IMAGES):
+    """
+    iter_tasks() collected into a list
+    Returns (results in input order, per-worker stats as in iter_tasks)
+    """
+    per_worker = {}
+    results = list(iter_tasks(task, items, workers, shard_size, cache_path, per_worker,
+                              sources, decode_threads, prefetch_images))
+    return results, per_worker
+
+
+def print_worker_report(per_worker, wall_seconds, decode_threads=DECODE_THREADS):
+    total = sum(stats["images"] for stats in per_worker.values())
+    detected = sum(stats["detected"] for stats in per_worker.values())
+    print(f"Processed {total} images in {wall_seconds:.1f}s ({total / max(wall_seconds, 1e-9):.1f} images/sec), "
+          f"{detected} through MediaPipe")
+    for worker, (pid, stats) in enumerate(sorted(per_worker.items()), start=1):
+        seconds = max(stats["seconds"], 1e-9)
+        rate = stats["images"] / seconds
+        print(f" - worker {worker} (pid {pid}): {stats['images']} images, {rate:.1f} images/sec "
+              f"(MediaPipe {stats['detected']}, cache hits {stats['cached']}, duplicates {stats['deduped']})")
+        # Decode busy is thread time spread over the pool; MediaPipe and waiting share the worker's main thread
+        decode_busy = stats["decode_seconds"] / (seconds * max(decode_threads, 1))
+        threads = f"{decode_threads} threads" if decode_threads > 0 else "inline"
+        print(f"   decode {decode_busy:.0%} busy ({threads}), "
+              f"MediaPipe {stats['detect_seconds'] / seconds:.0%} busy, "
+              f"waiting on decode {stats['wait_seconds'] / seconds:.0%}")
@@ -0,0 +1,218 @@
+"""
+Hyperparameter sweep for the alphabet classifier and the word LSTM
+
+Trials run concurrently on a process pool. Every worker is a fresh (spawned)
+process with TensorFlow pinned to --threads threads, so trials do not fight
+over cores and their latencies are measured under the same thread budget.
+Each trial trains with the script's own train() (same split and pipeline as
+train_model.py / train_lstm_words.py) and records test accuracy, parameter
+count, saved model size and single-sample model.predict latency.
+
+Results go to a CSV table (one row per trial, written as trials finish); the
+pareto column marks trials no other trial beats on both accuracy and latency.
+
+Search space config (JSON); every key except epochs / batch_size / augment
+(true = LandmarkAugmenter on the training batches) is passed to build_model()
+of the training script:
+    {
+      "model": "words",
+      "search": "grid",                  (or "random" with "samples" and "seed")
+      "epochs": 60,
+      "space": {
+        "lstm_units": [[64, 64], [64], [32]],
+        "dense_units": [64, 0],
+        "dropout": [0.2, 0.3],
+        "batch_size": [8, 32],
+        "augment": [false, true]
+      }
+    }
+
+Usage:
+    python hyperparameter_sweep.py --model alphabet                 # built-in space
+    python hyperparameter_sweep.py --config words_sweep.json --threads 2 --workers 4
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DEFAULT_SPACES = {
+    "alphabet": {
+        "hidden": [[256, 128], [128, 64], [64]],
+        "dropout": [0.2, 0.3],
+        "batch_size": [32, 128],
+    },
+    "words": {
+        "lstm_units": [[64, 64], [64], [32]],
+        "dense_units": [64, 0],
+        "dropout": [0.3],
+        "batch_size": [8, 32],
+    },
+}
+TRAIN_OPTIONS = ("epochs", "batch_size", "augment")  # Everything else goes to build_model()
+RESULTS_PATH = "sweep_results.csv"
+COLUMNS = [
+    "trial", "model", "params", "testAccuracy", "parameters", "sizeKB",
+    "latencyMedianMs", "latencyP95Ms", "trainSeconds", "pareto", "error",
+]
+
+
+# ---------------- SEARCH SPACE ----------------
+def load_config(path=None, model=None):
+    config = {}
+    if path:
+        with open(path) as f:
+            config = json.load(f)
+    config["model"] = model or config.get("model")
+    if config["model"] not in DEFAULT_SPACES:
+        raise ValueError(f"Unknown model {config['model']!r}, expected one of {sorted(DEFAULT_SPACES)}")
+    config.setdefault("space", DEFAULT_SPACES[config["model"]])
+    config.setdefault("search", "grid")
+    return config
+
+
+def expand_trials(config):
+    """Parameter dicts for every trial of the config (grid, or a seeded random sample of it)"""
+    space = config["space"]
+    names = sorted(space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+    if config["search"] == "random":
+        rng = random.Random(config.get("seed", 0))
+        grid = rng.sample(grid, min(config.get("samples", 10), len(grid)))
+    elif config["search"] != "grid":
+        raise ValueError(f"Unknown search {config['search']!r}, expected grid or random")
+    if "epochs" in config:
+        grid = [{"epochs": config["epochs"], **params} for params in grid]
+    return grid
+
+
+# ---------------- TRIALS ----------------
+def _init_worker(threads):
+    from inference_timing import pin_threads
+
+    pin_threads(threads)
+
+
+def run_trial(kind, trial, params, threads):
+    """Train one configuration -> result row (runs inside a pool worker)"""
+    import tensorflow as tf
+
+    from inference_timing import single_sample_latency
+    from landmark_augment import LandmarkAugmenter
+    from model_bundle import MODEL_FILE
+
+    if kind == "alphabet":
+        import train_model as script
+        from landmark_dataset import load_dataset, DEFAULT_PATH
+
+        X, y, labels = load_dataset(DEFAULT_PATH)
+    else:
+        import train_lstm_words as script
+        from input_pipeline import load_word_dataset
+
+        X, y, labels = load_word_dataset()
+
+    model_options = {name: value for name, value in params.items() if name not in TRAIN_OPTIONS}
+    epochs = params.get("epochs", script.EPOCHS)
+    batch_size = params.get("batch_size", script.BATCH_SIZE)
+    augment = LandmarkAugmenter(seed=trial) if params.get("augment") else None
+
+    tf.keras.backend.clear_session()
+    tf.keras.utils.set_random_seed(trial)
+    started = time.perf_counter()
+    model, acc = script.train(X, y, labels, epochs=epochs, batch_size=batch_size, threads=threads, verbose=0,
+                              augment=augment, **model_options)
+    train_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, MODEL_FILE)
+        model.save(model_path)
+        size = os.path.getsize(model_path)
+    latency = single_sample_latency(model, model.input_shape[1:])
+
+    return {
+        "testAccuracy": round(float(acc), 4),
+        "parameters": int(model.count_params()),
+        "sizeKB": round(size / 1024, 1),
+        "latencyMedianMs": round(latency["medianMs"], 3),
+        "latencyP95Ms": round(latency["p95Ms"], 3),
+        "trainSeconds": round(train_seconds, 1),
+    }
+
+
+def mark_pareto(rows):
+    """pareto = no other trial has accuracy >= and latency <= with one of them strictly better"""
+    done = [row for row in rows if not row.get("error")]
+    for row in done:
+        row["pareto"] = not any(
+            other["testAccuracy"] >= row["testAccuracy"] and other["latencyMedianMs"] <= row["latencyMedianMs"]
+            and (other["testAccuracy"] > row["testAccuracy"] or other["latencyMedianMs"] < row["latencyMedianMs"])
+            for other in done
+        )
+    return rows
+
+
+def write_results(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in sorted(rows, key=lambda r: r["trial"]):
+            writer.writerow({name: row.get(name, "") for name in COLUMNS})
+
+
+def sweep(config, workers, threads, output):
+    kind = config["model"]
+    trials = expand_trials(config)
+    print(f"Sweeping {len(trials)} {kind} trials on {workers} worker(s) x {threads} thread(s) -> {output}")
+
+    rows = []
+    started = time.perf_counter()
+    # spawn: every worker starts TensorFlow after its thread limits are set
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(threads,)) as pool:
+        futures = {
+            pool.submit(run_trial, kind, trial, params, threads): (trial, params)
+            for trial, params in enumerate(trials)
+        }
+        for future in as_completed(futures):
+            trial, params = futures[future]
+            row = {"trial": trial, "model": kind, "params": json.dumps(params, sort_keys=True)}
+            try:
+                row.update(future.result())
+                print(f" - trial {trial} {row['params']}: accuracy {row['testAccuracy']:.4f}, "
+                      f"{row['parameters']} params, {row['latencyMedianMs']:.2f} ms")
+            except Exception as e:
+                row["error"] = f"{type(e).__name__}: {e}"
+                print(f" - trial {trial} {row['params']} failed: {row['error']}")
+            rows.append(row)
+            write_results(output, rows)
+
+    write_results(output, mark_pareto(rows))
+    print(f"\n{len(rows)} trials in {time.perf_counter() - started:.0f}s; Pareto front (accuracy vs latency):")
+    front = sorted((row for row in rows if row.get("pareto")), key=lambda r: r["latencyMedianMs"])
+    for row in front:
+        print(f"   {row['latencyMedianMs']:7.2f} ms  {row['testAccuracy']:.4f}  {row['sizeKB']:8.1f} KB  {row['params']}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep")
+    parser.add_argument("--config", help="search space JSON (see module docstring)")
+    parser.add_argument("--model", choices=sorted(DEFAULT_SPACES), help="alphabet or words (overrides the config)")
+    parser.add_argument("--threads", type=int, default=1, help="TensorFlow threads per trial")
+    parser.add_argument("--workers", type=int, help="concurrent trials (default: CPU cores / threads)")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    if not args.config and not args.model:
+        parser.error("give --config or --model")
+    workers = args.workers or max(1, (os.cpu_count() or 1) // args.threads)
+    sweep(load_config(args.config, args.model), workers, args.threads, args.output)
@@ -0,0 +1,41 @@
+"""
+CPU inference timing helpers for model selection
+single_sample_latency() times model.predict on one sample, the call the backend
+makes for every /predict request, so numbers are comparable with serving.
+"""
+
+import os
+import time
+
+import numpy as np
+
+
+def single_sample_latency(model, input_shape, runs=200, warmup=20, seed=0):
+    """{ medianMs, p95Ms, meanMs } of model.predict(verbose=0) on a single random sample"""
+    sample = np.random.default_rng(seed).standard_normal((1,) + tuple(input_shape)).astype(np.float32)
+    for _ in range(warmup):
+        model.predict(sample, verbose=0)
+
+    timings = np.empty(runs)
+    for i in range(runs):
+        started = time.perf_counter()
+        model.predict(sample, verbose=0)
+        timings[i] = time.perf_counter() - started
+    timings *= 1000
+    return {
+        "medianMs": float(np.median(timings)),
+        "p95Ms": float(np.percentile(timings, 95)),
+        "meanMs": float(timings.mean()),
+    }
+
+
+def pin_threads(threads):
+    """Limit TensorFlow (and the BLAS/OpenMP pools under it) to `threads` threads; call before any TF work"""
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"):
+        os.environ[name] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
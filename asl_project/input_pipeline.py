@@ -0,0 +1,210 @@
+"""
+tf.data input pipeline shared by train_model.py and train_lstm_words.py
+
+Features are read from the memory-mapped files (asl_landmarks/features.npy,
+X_dynamic.npy) in chunks on parallel map calls, cached after the first epoch
+(in memory, or in a file for datasets larger than RAM), shuffled per epoch,
+batched and prefetched so the model never waits on input.
+
+The split is the same as before: a stratified train_test_split with
+random_state=42, then the last validation_split of the training part held out
+for validation (what model.fit(validation_split=...) did), so accuracies stay
+comparable with models trained by the old scripts.
+
+Usage (epoch time and CPU use of in-memory NumPy fit vs. this pipeline):
+    python input_pipeline.py benchmark alphabet --epochs 5
+    python input_pipeline.py benchmark words --epochs 5
+"""
+
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+
+RANDOM_STATE = 42
+READ_CHUNK = 1024  # Rows per memmap read on the parallel map
+
+WORDS_X = "X_dynamic.npy"
+WORDS_Y = "y_dynamic.npy"
+WORDS_LABELS = "labels.txt"
+
+
+# ---------------- DATA ----------------
+def load_word_dataset(x_path=WORDS_X, y_path=WORDS_Y, label_file=WORDS_LABELS, mmap=True):
+    """(sequences (N, 30, 63), label indices (N,), label names) written by extract_dynamic_landmarks.py"""
+    features = np.load(x_path, mmap_mode="r" if mmap else None)
+    label_indices = np.load(y_path)
+    # In class index order
+    with open(label_file) as f:
+        labels = [line.strip() for line in f.readlines()]
+    if len(features) != len(label_indices):
+        raise ValueError(f"{x_path} has {len(features)} samples but {y_path} has {len(label_indices)}")
+    return features, label_indices, labels
+
+
+# ---------------- SPLITS ----------------
+def split_indices(label_indices, test_size, random_state=RANDOM_STATE):
+    """Stratified (train, test) row indices; the same partition train_test_split(X, y, ...) gives"""
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(
+        np.arange(len(label_indices)), test_size=test_size, random_state=random_state, stratify=label_indices
+    )
+
+
+def validation_tail(indices, validation_split):
+    """(train, validation): the last fraction held out, as Keras validation_split does"""
+    split_at = int(math.floor(len(indices) * (1.0 - validation_split)))
+    return indices[:split_at], indices[split_at:]
+
+
+# ---------------- PIPELINE ----------------
+def make_dataset(features, label_indices, indices, batch_size, training=False, augment=None,
+                 cache=True, shuffle_buffer=None, seed=RANDOM_STATE, threads=None):
+    """
+    tf.data.Dataset of (features, label) batches for the given rows
+    features may be a memmap; rows are read READ_CHUNK at a time on parallel map calls.
+    cache: True = in memory, a path = cache file, False = re-read every epoch.
+    training shuffles every epoch (buffer defaults to the whole split) and applies
+    augment(x, y) -> (x, y), a NumPy function on a batch, on parallel map calls.
+    threads caps the pipeline's own thread pool (e.g. for concurrent sweep trials).
+    """
+    import tensorflow as tf
+
+    sample_shape = tuple(features.shape[1:])
+    indices = np.asarray(indices, dtype=np.int64)
+
+    def read(chunk):
+        return np.asarray(features[chunk], dtype=np.float32), np.asarray(label_indices[chunk], dtype=np.int32)
+
+    def load(chunk):
+        x, y = tf.numpy_function(read, [chunk], (tf.float32, tf.int32))
+        x.set_shape((None,) + sample_shape)
+        y.set_shape((None,))
+        return x, y
+
+    dataset = (
+        tf.data.Dataset.from_tensor_slices(indices)
+        .batch(READ_CHUNK)
+        .map(load, num_parallel_calls=tf.data.AUTOTUNE)
+        .unbatch()
+    )
+    if cache:
+        dataset = dataset.cache(cache if isinstance(cache, str) else "")
+    if training:
+        dataset = dataset.shuffle(shuffle_buffer or max(len(indices), 1), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+
+    if training and augment is not None:
+        def augment_batch(x, y):
+            x_aug, y_aug = tf.numpy_function(
+                lambda xb, yb: tuple(np.asarray(a, dtype=d) for a, d in zip(augment(xb, yb), (np.float32, np.int32))),
+                [x, y], (tf.float32, tf.int32),
+            )
+            x_aug.set_shape((None,) + sample_shape)
+            y_aug.set_shape((None,))
+            return x_aug, y_aug
+
+        dataset = dataset.map(augment_batch, num_parallel_calls=tf.data.AUTOTUNE)
+
+    if threads:
+        options = tf.data.Options()
+        options.threading.private_threadpool_size = threads
+        dataset = dataset.with_options(options)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def training_datasets(features, label_indices, test_size, validation_split, batch_size,
+                      augment=None, cache=True, eval_batch_size=None, threads=None):
+    """
+    (train, validation, test) datasets plus their row indices {"train", "validation", "test"}
+    Validation and test are never shuffled or augmented and use eval_batch_size (default batch_size)
+    """
+    train_indices, test_indices = split_indices(label_indices, test_size)
+    fit_indices, validation_indices = validation_tail(train_indices, validation_split)
+    eval_batch_size = eval_batch_size or batch_size
+    datasets = (
+        make_dataset(features, label_indices, fit_indices, batch_size, training=True, augment=augment,
+                     cache=cache, threads=threads),
+        make_dataset(features, label_indices, validation_indices, eval_batch_size, cache=bool(cache), threads=threads),
+        make_dataset(features, label_indices, test_indices, eval_batch_size, cache=False, threads=threads),
+    )
+    return datasets, {"train": fit_indices, "validation": validation_indices, "test": test_indices}
+
+
+# ---------------- BENCHMARK ----------------
+def _epoch_timer():
+    import tensorflow as tf
+
+    class EpochTimer(tf.keras.callbacks.Callback):
+        def on_train_begin(self, logs=None):
+            self.epochs = []
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self._started = time.perf_counter(), os.times()
+
+        def on_epoch_end(self, epoch, logs=None):
+            started, times = self._started
+            now = os.times()
+            wall = time.perf_counter() - started
+            cpu = (now.user - times.user) + (now.system - times.system)
+            self.epochs.append((wall, cpu))
+
+    return EpochTimer()
+
+
+def benchmark(kind, epochs):
+    """Time model.fit on in-memory arrays (the old scripts) vs. the tf.data pipeline"""
+    if kind == "alphabet":
+        from landmark_dataset import load_dataset, DEFAULT_PATH
+        from train_model import build_model, TEST_SIZE, VALIDATION_SPLIT, BATCH_SIZE
+
+        def load(mmap):
+            return load_dataset(DEFAULT_PATH, mmap=mmap)
+    else:
+        from train_lstm_words import build_model, TEST_SIZE, VALIDATION_SPLIT, BATCH_SIZE
+
+        def load(mmap):
+            return load_word_dataset(mmap=mmap)
+
+    cores = os.cpu_count() or 1
+
+    def report(name, timer, loaded):
+        walls = [wall for wall, _ in timer.epochs]
+        cpus = [cpu for _, cpu in timer.epochs]
+        steady = walls[1:] or walls
+        print(f"{name:9s} load {loaded * 1000:8.1f} ms, first epoch {walls[0]:6.2f}s, "
+              f"steady epoch {np.mean(steady):6.2f}s, "
+              f"CPU {sum(cpus) / sum(walls):5.2f} cores ({sum(cpus) / sum(walls) / cores:.0%} of {cores})")
+
+    # Old path: arrays fully in memory, Keras slices batches and the validation tail itself
+    started = time.perf_counter()
+    X, y, labels = load(mmap=False)
+    train_indices, _ = split_indices(y, TEST_SIZE)
+    X_train, y_train = X[train_indices], y[train_indices]
+    loaded = time.perf_counter() - started
+    timer = _epoch_timer()
+    build_model(len(labels)).fit(X_train, y_train, epochs=epochs, batch_size=BATCH_SIZE,
+                                 validation_split=VALIDATION_SPLIT, callbacks=[timer], verbose=0)
+    report("numpy", timer, loaded)
+
+    started = time.perf_counter()
+    X, y, labels = load(mmap=True)
+    (train, validation, _), _ = training_datasets(X, y, TEST_SIZE, VALIDATION_SPLIT, BATCH_SIZE)
+    loaded = time.perf_counter() - started
+    timer = _epoch_timer()
+    build_model(len(labels)).fit(train, validation_data=validation, epochs=epochs, callbacks=[timer], verbose=0)
+    report("tf.data", timer, loaded)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Training input pipeline tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    benchmark_parser = sub.add_parser("benchmark", help="epoch time / CPU use of in-memory fit vs. tf.data")
+    benchmark_parser.add_argument("kind", choices=["alphabet", "words"])
+    benchmark_parser.add_argument("--epochs", type=int, default=5)
+    args = parser.parse_args()
+
+    benchmark(args.kind, args.epochs)
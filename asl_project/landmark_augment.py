@@ -0,0 +1,226 @@
+"""
+Vectorized on-the-fly augmentation of hand landmarks (NumPy)
+
+Works on whole batches, without per-sample Python loops:
+    hands      (N, 21, 3)  or (N, 63)       alphabet samples
+    sequences  (N, T, 21, 3) or (N, T, 63)  word clips
+
+Spatial (per sample, the same for every frame of a clip): rotation in the
+image plane, scaling and mirroring about the hand's centroid, translation,
+plus per-point Gaussian jitter (random slices of a pre-drawn noise bank).
+Temporal (sequences only): speed warp (nearest-frame resampling around the
+clip centre) and frame dropout (a dropped frame repeats the previous kept one).
+
+Frames that are all zeros (no hand detected) stay all zeros and are never
+blended with real frames.
+
+Throughput depends on the batch size: every call costs a few dozen NumPy
+operations regardless of size, so small batches are bound by that overhead.
+The benchmark reports the trainers' default batches (32 hands, 8 clips of 30
+frames) next to a large one.
+
+LandmarkAugmenter(x, y) -> (x, y) plugs into input_pipeline.make_dataset(augment=...);
+train_model.py / train_lstm_words.py enable it with --augment.
+
+Usage (throughput on random data):
+    python landmark_augment.py benchmark
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+POINTS = 21
+NOISE_BANK = 1 << 20  # Pre-drawn N(0, jitter^2) values per thread; jitter takes random slices of it
+# Flattened (63,) frame @ CENTROID -> mean of its 21 points, (3,) offset @ SPREAD -> that offset
+# for all 21 points; each is a single 2-D product for a whole batch
+CENTROID = np.tile(np.eye(3, dtype=np.float32), (POINTS, 1)) / np.float32(POINTS)
+SPREAD = np.tile(np.eye(3, dtype=np.float32), (1, POINTS))
+
+DEFAULT_OPTIONS = {
+    "rotation_deg": 15.0,   # Max in-plane rotation either way
+    "scale": 0.1,           # Max relative size change either way
+    "translation": 0.05,    # Max shift in normalized image coordinates
+    "jitter": 0.004,        # Std of per-point noise
+    "mirror_prob": 0.5,     # Chance of a left/right flip (the other hand signing)
+    "speed": 0.2,           # Max relative playback speed change (sequences)
+    "frame_dropout": 0.1,   # Chance of each frame being replaced by the previous one (sequences)
+}
+
+
+class LandmarkAugmenter:
+    def __init__(self, seed=None, **options):
+        unknown = set(options) - set(DEFAULT_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown augmentation options: {sorted(unknown)}")
+        self.options = {**DEFAULT_OPTIONS, **options}
+        # spatial() maps uniform [0, 1) draws onto [-span, span) for angle (radians), scale and shift x/y
+        spans = np.array([
+            [np.deg2rad(self.options["rotation_deg"])],
+            [self.options["scale"]],
+            [self.options["translation"]],
+            [self.options["translation"]],
+        ], dtype=np.float32)
+        self._low, self._width = -spans, 2 * spans
+        self._mirror_prob = np.float32(self.options["mirror_prob"])
+        # tf.data calls augment from several threads; each gets its own generator
+        self._seeds = np.random.SeedSequence(seed)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _rng(self):
+        rng = getattr(self._local, "rng", None)
+        if rng is None:
+            with self._lock:
+                child = self._seeds.spawn(1)[0]
+            rng = self._local.rng = np.random.default_rng(child)
+            # Drawing fresh normals for every coordinate costs more than all the transforms together
+            self._local.noise = rng.standard_normal(NOISE_BANK, dtype=np.float32) * np.float32(self.options["jitter"])
+        return rng
+
+    def _add_jitter(self, out, rng):
+        noise = self._local.noise
+        flat = out.reshape(-1)
+        for start in range(0, flat.size, noise.size):
+            length = min(noise.size, flat.size - start)
+            offset = rng.integers(0, noise.size - length + 1)
+            flat[start:start + length] += noise[offset:offset + length]
+
+    def __call__(self, x, y):
+        """Augment a training batch; x is (N, 63) or (N, T, 63) (or already split into points)"""
+        x = np.asarray(x, dtype=np.float32)
+        if x.shape[-1] == 3 * POINTS:
+            points = x.reshape(x.shape[:-1] + (POINTS, 3))
+            return self.augment(points).reshape(x.shape), y
+        return self.augment(x), y
+
+    def augment(self, points):
+        """(N, 21, 3) hands or (N, T, 21, 3) sequences -> augmented copy"""
+        rng = self._rng()
+        if points.ndim == 4:
+            points = self.temporal(points, rng)
+        return self.spatial(points, rng)
+
+    # ---------------- SPATIAL ----------------
+    def spatial(self, points, rng):
+        n = points.shape[0]
+        frames = points.reshape(n, -1, POINTS * 3)  # Hands are clips of one frame
+
+        # All per-sample parameters in one draw (angle, scale, shift x/y, then mirror): on small
+        # training batches the per-call overhead of every NumPy operation dominates
+        draws = rng.random((5, n), dtype=np.float32)
+        angle, scale, shift_x, shift_y = draws[:4] * self._width + self._low
+        scale += 1
+        flip = np.copysign(np.float32(1), draws[4] - self._mirror_prob)  # -1 mirrors
+        cos, sin = np.cos(angle) * scale, np.sin(angle) * scale
+
+        # One 3x3 matrix per sample for row vectors: mirror x, then rotate x/y, scale x/y/z
+        matrix = np.zeros((n, 3, 3), dtype=np.float32)
+        matrix[:, 0, 0] = flip * cos
+        matrix[:, 0, 1] = flip * sin
+        matrix[:, 1, 0] = -sin
+        matrix[:, 1, 1] = cos
+        matrix[:, 2, 2] = scale
+
+        # (p - c) M + c + t == p M + c K, with c the per-frame x/y centroid padded with z = 1 and
+        # K = I - M with its (unused, since c has no z) last row replaced by the shift t.
+        # Per-axis arithmetic and einsum cost several times more than these matrix products
+        offset_matrix = -matrix
+        offset_matrix[:, 0, 0] += 1
+        offset_matrix[:, 1, 1] += 1
+        offset_matrix[:, 2, 0] = shift_x
+        offset_matrix[:, 2, 1] = shift_y
+        offset_matrix[:, 2, 2] = 0
+
+        centre = frames.reshape(-1, POINTS * 3) @ CENTROID
+        # "No hand" frames are all zeros; a real hand never averages to exactly (0, 0, 0),
+        # so batches where every centroid coordinate is non-zero skip the per-frame mask
+        missing = None if centre.all() else ~centre.any(axis=1)
+        centre[:, 2] = 1
+        offset = np.matmul(centre.reshape(n, -1, 3), offset_matrix)
+
+        out = np.matmul(frames.reshape(n, -1, 3), matrix).reshape(-1, POINTS * 3)
+        # Broadcasting the (x, y, z) offset over the points runs a 3-element inner loop;
+        # spreading it to whole rows first makes the add 3-4x cheaper
+        out += offset.reshape(-1, 3) @ SPREAD
+
+        if self.options["jitter"]:
+            self._add_jitter(out, rng)
+
+        # Keep "no hand" frames exactly zero
+        if missing is not None:
+            out[missing] = 0
+        return out.reshape(points.shape)
+
+    # ---------------- TEMPORAL ----------------
+    def temporal(self, sequences, rng):
+        options = self.options
+        n, frames = sequences.shape[:2]
+        centre = (frames - 1) / 2
+        draws = rng.random((n, frames + 1), dtype=np.float32)  # Speed, then one per frame for dropout
+
+        # Nearest source frame of each step (+ 0.5 and truncation round to nearest)
+        speed = 1 + options["speed"] * (2 * draws[:, :1] - 1)
+        source = (np.arange(frames, dtype=np.float32) - centre) * speed + (centre + 0.5)
+        source = np.minimum(np.maximum(source, 0), frames - 1).astype(np.intp)  # np.clip costs 3x more here
+
+        first_row = np.arange(0, n * frames, frames)[:, None]  # Row of each clip's first frame
+        if options["frame_dropout"]:
+            kept = draws[:, 1:] >= options["frame_dropout"]
+            kept[:, 0] = True
+            # Index of the last kept frame at or before each step
+            last_kept = np.maximum.accumulate(kept * np.arange(frames), axis=1)
+            source = source.ravel()[last_kept + first_row]
+
+        # One row gather over all frames of the batch (much faster than take_along_axis on 4-D)
+        rows = (source + first_row).ravel()
+        return sequences.reshape(n * frames, -1)[rows].reshape(sequences.shape)
+
+
+# ---------------- BENCHMARK ----------------
+# Default BATCH_SIZE of train_model.py / train_lstm_words.py (not imported: they load Keras)
+TRAINER_BATCHES = {"hands": 32, "sequences": 8}
+
+
+def benchmark(batch_size=4096, frames=30, repeats=20, seed=0):
+    """
+    Frames/sec for hands and sequences at the trainers' batch sizes and at a large batch
+    (best of `repeats`; small batches are timed over many calls, since overhead dominates them)
+    """
+    rng = np.random.default_rng(seed)
+    augmenter = LandmarkAugmenter(seed=seed)
+    shapes = [
+        ("hands", (TRAINER_BATCHES["hands"], POINTS * 3)),
+        ("sequences", (TRAINER_BATCHES["sequences"], frames, POINTS * 3)),
+        ("hands", (batch_size * frames, POINTS * 3)),
+        ("sequences", (batch_size, frames, POINTS * 3)),
+    ]
+
+    results = {}
+    for name, shape in shapes:
+        batch = rng.random(shape, dtype=np.float32)
+        total_frames = shape[0] * (shape[1] if len(shape) == 3 else 1)
+        calls = max(1, 100_000 // total_frames)
+        best = float("inf")
+        for _ in range(repeats):
+            started = time.perf_counter()
+            for _ in range(calls):
+                augmenter(batch, None)
+            best = min(best, (time.perf_counter() - started) / calls)
+        results[(name, shape[0])] = total_frames / best
+        print(f"{name:10s} {str(shape):16s}: {best * 1000:8.3f} ms per batch, "
+              f"{results[(name, shape[0])] / 1e6:6.2f}M frames/sec")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Landmark augmentation tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    benchmark_parser = sub.add_parser("benchmark", help="augmentation throughput on random data")
+    benchmark_parser.add_argument("--batch-size", type=int, default=4096, help="sequences per large batch")
+    benchmark_parser.add_argument("--frames", type=int, default=30)
+    args = parser.parse_args()
+
+    benchmark(args.batch_size, args.frames)
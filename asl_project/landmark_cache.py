@@ -0,0 +1,87 @@
+"""
+Persistent landmark cache for the extraction scripts (SQLite)
+Landmarks are keyed by the SHA-256 of the image file's bytes plus the MediaPipe
+settings, so re-runs only run MediaPipe on new or changed images. A path index
+(size + mtime) avoids re-hashing files that have not changed since the last run.
+
+Values are stored as float64 so cached and freshly extracted landmarks are
+bit-identical in the output files.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+
+import numpy as np
+
+DEFAULT_CACHE_PATH = ".landmark_cache.sqlite"
+
+
+def settings_digest(hands_options, mediapipe_version):
+    """Short hash of everything besides the image that affects the landmarks"""
+    settings = json.dumps({"mediapipe": mediapipe_version, **hands_options}, sort_keys=True)
+    return hashlib.sha256(settings.encode()).hexdigest()[:16]
+
+
+class LandmarkCache:
+    def __init__(self, path, settings, readonly=False):
+        self.path = path
+        self.settings = settings
+        if readonly:
+            self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+        else:
+            self._db = sqlite3.connect(path, timeout=30)
+            # WAL lets extraction workers keep reading while the parent writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS landmarks (key TEXT PRIMARY KEY, hand INTEGER, data BLOB)")
+            self._db.commit()
+
+    def content_hash(self, path):
+        """
+        SHA-256 of the file at path -> (hash, files row to store or None if already indexed)
+        """
+        st = os.stat(path)
+        row = self._db.execute(
+            "SELECT hash FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, st.st_size, st.st_mtime_ns),
+        ).fetchone()
+        if row:
+            return row[0], None
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        content_hash = digest.hexdigest()
+        return content_hash, (path, st.st_size, st.st_mtime_ns, content_hash)
+
+    def key(self, content_hash):
+        return f"{content_hash}:{self.settings}"
+
+    def get(self, key):
+        """(found, landmarks list or None when MediaPipe found no hand)"""
+        row = self._db.execute("SELECT hand, data FROM landmarks WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return False, None
+        hand, data = row
+        return True, np.frombuffer(data, dtype=np.float64).tolist() if hand else None
+
+    def put(self, files, landmarks):
+        """Store new files rows and { key: landmarks or None } entries"""
+        self._db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", files)
+        self._db.executemany(
+            "INSERT OR REPLACE INTO landmarks VALUES (?, ?, ?)",
+            [
+                (key, values is not None, np.asarray(values, dtype=np.float64).tobytes() if values is not None else b"")
+                for key, values in landmarks.items()
+            ],
+        )
+        self._db.commit()
+
+    def count(self):
+        return self._db.execute("SELECT COUNT(*) FROM landmarks").fetchone()[0]
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,142 @@
+"""
+Binary landmark dataset (replaces asl_landmarks.csv)
+
+A dataset is a directory:
+    features.npy    float32 (N, 63), opened memory-mapped
+    labels.npy      int32 (N,), index into the manifest labels
+    manifest.json   { format, labels, count, featureShape, dtype }
+
+Labels are stored sorted, the same order LabelEncoder produced from the CSV,
+so existing models keep their class indices.
+
+Usage:
+    python landmark_dataset.py convert asl_landmarks.csv asl_landmarks
+    python landmark_dataset.py compare asl_landmarks.csv asl_landmarks
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+FORMAT_VERSION = 1
+DEFAULT_PATH = "asl_landmarks"
+FEATURE_SIZE = 63  # 21 hand points x (x, y, z)
+FEATURES_FILE = "features.npy"
+LABELS_FILE = "labels.npy"
+MANIFEST_FILE = "manifest.json"
+
+
+def save_dataset(path, features, label_names):
+    """Write (N, 63) features and one label name per row"""
+    features = np.asarray(features, dtype=np.float32).reshape(-1, FEATURE_SIZE)
+    labels, label_indices = np.unique(np.asarray(label_names, dtype=str), return_inverse=True)
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, FEATURES_FILE), features)
+    np.save(os.path.join(path, LABELS_FILE), label_indices.astype(np.int32))
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "labels": labels.tolist(),
+        "count": int(features.shape[0]),
+        "featureShape": list(features.shape[1:]),
+        "dtype": "float32",
+    }
+    with open(os.path.join(path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported dataset format in {path}: {manifest.get('format')}")
+    return manifest
+
+
+def read_labels(path):
+    """Ordered label names only (no feature data is touched)"""
+    return read_manifest(path)["labels"]
+
+
+def load_dataset(path, mmap=True):
+    """(features (N, 63) float32, label indices (N,) int32, label names)"""
+    manifest = read_manifest(path)
+    features = np.load(os.path.join(path, FEATURES_FILE), mmap_mode="r" if mmap else None)
+    label_indices = np.load(os.path.join(path, LABELS_FILE))
+
+    if features.shape[0] != manifest["count"] or label_indices.shape[0] != manifest["count"]:
+        raise ValueError(
+            f"Dataset {path} is inconsistent: manifest says {manifest['count']} rows, "
+            f"features has {features.shape[0]}, labels has {label_indices.shape[0]}"
+        )
+    return features, label_indices, manifest["labels"]
+
+
+def convert_csv(csv_path, path):
+    """Convert an asl_landmarks.csv (x0..z20 + label columns) to the binary format"""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    return save_dataset(path, df.drop("label", axis=1).to_numpy(dtype=np.float32), df["label"].astype(str))
+
+
+def _disk_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def compare(csv_path, path):
+    """Load time (best of 3) and disk size of the CSV vs. the binary dataset"""
+    import pandas as pd
+
+    def best_of(fn, repeats=3):
+        best = float("inf")
+        for _ in range(repeats):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    def load_csv():
+        df = pd.read_csv(csv_path)
+        return df.drop("label", axis=1).to_numpy(dtype=np.float32), df["label"]
+
+    def load_binary():
+        features, label_indices, labels = load_dataset(path)
+        # Touch every page so the comparison includes actually reading the data
+        return float(features.sum()), label_indices, labels
+
+    csv_seconds = best_of(load_csv)
+    binary_seconds = best_of(load_binary)
+    labels_seconds = best_of(lambda: read_labels(path))
+    csv_bytes, binary_bytes = _disk_size(csv_path), _disk_size(path)
+
+    print(f"Rows: {read_manifest(path)['count']}")
+    print(f"CSV:    {csv_seconds * 1000:9.1f} ms  {csv_bytes / 1e6:8.2f} MB  ({csv_path})")
+    print(f"Binary: {binary_seconds * 1000:9.1f} ms  {binary_bytes / 1e6:8.2f} MB  ({path})")
+    print(f"Labels only (manifest): {labels_seconds * 1000:.2f} ms")
+    print(f"Speedup: {csv_seconds / max(binary_seconds, 1e-9):.1f}x, size ratio: {binary_bytes / max(csv_bytes, 1):.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Binary landmark dataset tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert_parser = sub.add_parser("convert", help="convert a landmark CSV to the binary format")
+    convert_parser.add_argument("csv")
+    convert_parser.add_argument("output", nargs="?", default=DEFAULT_PATH)
+    compare_parser = sub.add_parser("compare", help="compare load time and size against the CSV")
+    compare_parser.add_argument("csv")
+    compare_parser.add_argument("dataset", nargs="?", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        manifest = convert_csv(args.csv, args.output)
+        print(f"Converted {manifest['count']} rows, {len(manifest['labels'])} labels -> {args.output}")
+    else:
+        compare(args.csv, args.dataset)
@@ -0,0 +1,125 @@
+"""
+Self-describing model bundles
+A bundle is a directory holding a trained Keras model together with what is
+needed to use it, so label order and input shape are never reconstructed:
+
+    model.h5      architecture + weights
+    bundle.json   { format, name, labels, inputShape, sequenceLength, version, createdAt, ... }
+
+version is a hash of the model file, labels and input shape. load_bundle()
+re-checks it and validates the model against the labels and input shape, so a
+swapped model file or a label list of the wrong length fails at load time
+instead of producing wrong labels at prediction time.
+
+Used by train_model.py / train_lstm_words.py (save) and by the realtime
+scripts, api.py and backend/main.py (load).
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+BUNDLE_FORMAT = 1
+MODEL_FILE = "model.h5"
+METADATA_FILE = "bundle.json"
+
+ASL_PROJECT_DIR = Path(__file__).resolve().parent
+ALPHABET_BUNDLE = ASL_PROJECT_DIR / "asl_alphabet_model.bundle"
+WORD_BUNDLE = ASL_PROJECT_DIR / "asl_dynamic_word_lstm.bundle"
+
+
+class BundleError(Exception):
+    """The bundle is missing, corrupt, or its model does not match its labels/input spec"""
+
+
+class ModelBundle:
+    def __init__(self, path, model, metadata):
+        self.path = Path(path)
+        self.model = model
+        self.metadata = metadata
+        self.labels = metadata["labels"]
+        self.input_shape = tuple(metadata["inputShape"])
+        self.sequence_length = metadata.get("sequenceLength")
+        self.version = metadata["version"]
+
+    def label(self, class_index):
+        return self.labels[class_index]
+
+
+def _version(model_path, labels, input_shape):
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    digest.update(json.dumps({"labels": list(labels), "inputShape": list(input_shape)}).encode())
+    return digest.hexdigest()[:12]
+
+
+def _check_model(model, labels, input_shape, source):
+    model_input = tuple(model.input_shape[1:])
+    if model_input != tuple(input_shape):
+        raise BundleError(f"{source}: model expects input {model_input}, bundle says {tuple(input_shape)}")
+    outputs = model.output_shape[-1]
+    if outputs != len(labels):
+        raise BundleError(f"{source}: model has {outputs} outputs but {len(labels)} labels")
+
+
+def save_bundle(path, model, labels, name=None, extra=None):
+    """Write model + metadata to the bundle directory at path; returns the metadata"""
+    path = Path(path)
+    labels = [str(label) for label in labels]
+    input_shape = [int(d) for d in model.input_shape[1:]]
+    _check_model(model, labels, input_shape, path)
+
+    os.makedirs(path, exist_ok=True)
+    model_path = path / MODEL_FILE
+    model.save(str(model_path))
+
+    metadata = {
+        "format": BUNDLE_FORMAT,
+        "name": name or path.stem,
+        "labels": labels,
+        "inputShape": input_shape,
+        # Frames per sample for sequence models, None for single-frame models
+        "sequenceLength": input_shape[0] if len(input_shape) > 1 else None,
+        "version": _version(model_path, labels, input_shape),
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        **(extra or {}),
+    }
+    with open(path / METADATA_FILE, "w") as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+
+def read_metadata(path):
+    """bundle.json only (no TensorFlow needed)"""
+    metadata_path = Path(path) / METADATA_FILE
+    if not metadata_path.exists():
+        raise BundleError(f"No bundle at {path} (missing {METADATA_FILE})")
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    if metadata.get("format") != BUNDLE_FORMAT:
+        raise BundleError(f"{path}: unsupported bundle format {metadata.get('format')}")
+    return metadata
+
+
+def load_bundle(path, compile=False):
+    """Load and validate a bundle -> ModelBundle"""
+    import tensorflow as tf
+
+    path = Path(path)
+    metadata = read_metadata(path)
+    model_path = path / MODEL_FILE
+    if not model_path.exists():
+        raise BundleError(f"{path}: missing {MODEL_FILE}")
+
+    version = _version(model_path, metadata["labels"], metadata["inputShape"])
+    if version != metadata["version"]:
+        raise BundleError(f"{path}: version mismatch (bundle.json {metadata['version']}, files {version}); "
+                          f"the model or labels were changed outside save_bundle")
+
+    model = tf.keras.models.load_model(str(model_path), compile=compile)
+    _check_model(model, metadata["labels"], metadata["inputShape"], path)
+    return ModelBundle(path, model, metadata)
@@ -1,19 +1,16 @@
 import cv2
 import mediapipe as mp
 import numpy as np
-import pandas as pd
 import time
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import LabelEncoder
 from collections import deque, Counter
 
-# ---------------- LOAD MODEL ----------------
-model = load_model("asl_alphabet_model.h5")
+from model_bundle import load_bundle, ALPHABET_BUNDLE
 
-# ---------------- LABEL ENCODER ----------------
-df = pd.read_csv("asl_landmarks.csv")
-encoder = LabelEncoder()
-encoder.fit(df["label"])
+# ---------------- LOAD MODEL ----------------
+# The bundle carries the class order, so no training data is parsed at startup
+bundle = load_bundle(ALPHABET_BUNDLE)
+model = bundle.model
+labels = bundle.labels
 
 # ---------------- MEDIAPIPE ----------------
 mp_hands = mp.solutions.hands
@@ -47,7 +44,7 @@ while True:
             landmarks.extend([lm.x, lm.y, lm.z])
 
         prediction = model.predict(np.array([landmarks]), verbose=0)
-        predicted = encoder.inverse_transform([np.argmax(prediction)])[0]
+        predicted = labels[int(np.argmax(prediction))]
 
         prediction_buffer.append(predicted)
         final_letter = Counter(prediction_buffer).most_common(1)[0][0]
@@ -1,20 +1,16 @@
 import cv2
 import numpy as np
 import mediapipe as mp
-import tensorflow as tf
 from collections import deque, Counter
 
-# ---------------- CONFIG ----------------
-SEQUENCE_LENGTH = 30
-MODEL_PATH = "asl_dynamic_word_lstm.h5"
-LABELS_PATH = "labels.txt"
-
-# ---------------- LOAD LABELS ----------------
-with open(LABELS_PATH, "r") as f:
-    labels = [line.strip() for line in f.readlines()]
+from model_bundle import load_bundle, WORD_BUNDLE
 
 # ---------------- LOAD MODEL ----------------
-model = tf.keras.models.load_model(MODEL_PATH)
+# Labels and sequence length come with the model (see model_bundle.py)
+bundle = load_bundle(WORD_BUNDLE)
+model = bundle.model
+labels = bundle.labels
+SEQUENCE_LENGTH = bundle.sequence_length
 
 # ---------------- MEDIAPIPE ----------------
 mp_hands = mp.solutions.hands
@@ -47,7 +43,7 @@ while True:
         mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
 
         if len(sequence) == SEQUENCE_LENGTH:
-            input_data = np.array(sequence).reshape(1, SEQUENCE_LENGTH, 63)
+            input_data = np.array(sequence).reshape((1,) + bundle.input_shape)
             prediction = model.predict(input_data, verbose=0)
             predicted_word = labels[np.argmax(prediction)]
 
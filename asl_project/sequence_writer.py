@@ -0,0 +1,130 @@
+"""
+Bounded-memory, resumable writer for X_dynamic.npy
+Sequences are written straight into a preallocated float32 .npy (path + ".partial")
+through a memory-mapped window that only spans the rows since the last
+checkpoint, so resident memory stays flat however large the dataset gets.
+
+Every checkpoint_every rows the window is flushed and unmapped and a progress
+file records how many rows are complete. A rerun with the same fingerprint (the
+same clip list) resumes after the last checkpoint. close() shrinks the file to
+the rows actually written and renames it to path.
+"""
+
+import json
+import os
+import resource
+import sys
+
+import numpy as np
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class SequenceWriter:
+    def __init__(self, path, capacity, sample_shape, fingerprint, dtype=np.float32, checkpoint_every=64):
+        self.path = path
+        self.partial_path = path + ".partial"
+        self.progress_path = os.path.splitext(path)[0] + ".progress.json"
+        self.capacity = capacity
+        self.sample_shape = tuple(sample_shape)
+        self.fingerprint = fingerprint
+        self.dtype = np.dtype(dtype)
+        self.checkpoint_every = checkpoint_every
+
+        self.count = 0  # Rows written (including resumed ones)
+        self._checkpointed = 0
+        self._data_offset = None
+        self._window = None  # memmap over rows [_checkpointed, _checkpointed + checkpoint_every)
+
+    # ---------------- LIFECYCLE ----------------
+    def open(self, resume=True):
+        """Create (or reopen) the partial file -> number of rows already complete"""
+        progress = self._read_progress() if resume else None
+        if progress is not None:
+            self.count = self._checkpointed = progress["completed"]
+        else:
+            # Allocates the full file (sparse on most filesystems) and writes the header
+            array = np.lib.format.open_memmap(
+                self.partial_path, mode="w+", dtype=self.dtype, shape=(self.capacity,) + self.sample_shape
+            )
+            del array
+            self._write_progress()
+
+        with open(self.partial_path, "rb") as f:
+            np.lib.format.read_magic(f)
+            np.lib.format.read_array_header_1_0(f)
+            self._data_offset = f.tell()
+        return self.count
+
+    def write(self, sample):
+        """Append one (SEQUENCE_LENGTH, 63) sample"""
+        if self.count >= self.capacity:
+            raise ValueError(f"{self.partial_path} is full ({self.capacity} rows)")
+        if self._window is None:
+            rows = min(self.checkpoint_every, self.capacity - self._checkpointed)
+            self._window = np.memmap(
+                self.partial_path, dtype=self.dtype, mode="r+",
+                offset=self._data_offset + self._checkpointed * self._row_bytes,
+                shape=(rows,) + self.sample_shape,
+            )
+        self._window[self.count - self._checkpointed] = np.asarray(sample, dtype=self.dtype).reshape(self.sample_shape)
+        self.count += 1
+        if self.count - self._checkpointed >= self._window.shape[0]:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Flush and unmap the current window, then record progress"""
+        if self._window is not None:
+            self._window.flush()
+            self._window = None
+        self._checkpointed = self.count
+        self._write_progress()
+
+    def close(self):
+        """Finish: shrink to the written rows, move into place, drop the progress file -> final shape"""
+        self.checkpoint()
+        shape = (self.count,) + self.sample_shape
+        if self.count < self.capacity:
+            self._rewrite_shape(shape)
+        with open(self.partial_path, "r+b") as f:
+            f.truncate(self._data_offset + self.count * self._row_bytes)
+        os.replace(self.partial_path, self.path)
+        os.remove(self.progress_path)
+        return shape
+
+    # ---------------- HELPERS ----------------
+    @property
+    def _row_bytes(self):
+        return int(np.prod(self.sample_shape)) * self.dtype.itemsize
+
+    def _read_progress(self):
+        if not (os.path.exists(self.progress_path) and os.path.exists(self.partial_path)):
+            return None
+        with open(self.progress_path) as f:
+            progress = json.load(f)
+        if progress.get("fingerprint") != self.fingerprint or progress.get("capacity") != self.capacity:
+            print(f"ℹ️ {self.progress_path} is for a different clip list, starting over")
+            return None
+        print(f"↪️ Resuming {self.path} after {progress['completed']} completed samples")
+        return progress
+
+    def _write_progress(self):
+        tmp_path = self.progress_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"fingerprint": self.fingerprint, "capacity": self.capacity, "completed": self.count}, f)
+        os.replace(tmp_path, self.progress_path)
+
+    def _rewrite_shape(self, shape):
+        """Patch the .npy header in place (padded to its original length) with a smaller shape"""
+        header = repr({"descr": np.lib.format.dtype_to_descr(self.dtype), "fortran_order": False, "shape": shape})
+        with open(self.partial_path, "r+b") as f:
+            np.lib.format.read_magic(f)
+            header_start = f.tell() + 2  # Version 1.0: 2-byte header length
+            available = self._data_offset - header_start
+            f.seek(header_start)
+            f.write((header.ljust(available - 1) + "\n").encode("latin1"))
@@ -1,29 +1,204 @@
-import pandas as pd
+"""
+Evaluate the alphabet and word models on their full held-out sets
+
+For each model bundle: batched predictions over the test split (the same
+stratified split the training scripts hold out, or --split all), accuracy,
+per-class precision / recall / support, the confusion matrix, and inference
+throughput at several batch sizes (predict_on_batch on real samples) plus the
+single-sample model.predict latency the backend sees per request.
+
+Results are written as JSON. With --baseline, the run is compared to an earlier
+JSON and exits with status 1 if accuracy dropped or throughput slowed down by
+more than the allowed margins, so model changes can be gated in CI.
+
+Usage:
+    python test_model.py                                  # -> evaluation.json
+    python test_model.py --models words --batch-sizes 1 32
+    python test_model.py --baseline evaluation.main.json --max-accuracy-drop 0.005 --max-slowdown 0.15
+"""
+
+import argparse
+import json
+import sys
+import time
+
 import numpy as np
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import LabelEncoder
 
-# Load data
-df = pd.read_csv("asl_landmarks.csv")
+from inference_timing import single_sample_latency
+from input_pipeline import load_word_dataset, split_indices
+from landmark_dataset import load_dataset, DEFAULT_PATH
+from model_bundle import load_bundle, ALPHABET_BUNDLE, WORD_BUNDLE
+from train_model import TEST_SIZE as ALPHABET_TEST_SIZE
+from train_lstm_words import TEST_SIZE as WORDS_TEST_SIZE
+
+# ---------------- CONFIG ----------------
+OUTPUT_PATH = "evaluation.json"
+BATCH_SIZES = [1, 8, 64, 512]
+PREDICT_BATCH_SIZE = 512
+MIN_BENCH_SECONDS = 1.0  # Per batch size
+# Held out by train_model.py / train_lstm_words.py
+TEST_SIZES = {"alphabet": ALPHABET_TEST_SIZE, "words": WORDS_TEST_SIZE}
+
+
+# ---------------- DATA ----------------
+def load_model_data(kind):
+    """(bundle, features, label indices, label names) for "alphabet" or "words" """
+    if kind == "alphabet":
+        bundle = load_bundle(ALPHABET_BUNDLE)
+        X, y, labels = load_dataset(DEFAULT_PATH)
+    else:
+        bundle = load_bundle(WORD_BUNDLE)
+        X, y, labels = load_word_dataset()
+    if bundle.labels != labels:
+        raise ValueError(f"{kind}: model labels {bundle.labels} do not match dataset labels {labels}")
+    return bundle, X, y, labels
+
+
+# ---------------- METRICS ----------------
+def predict_all(model, X, indices, batch_size=PREDICT_BATCH_SIZE):
+    """Predicted class for every row in indices (read from X batch by batch, so memmaps stay lazy)"""
+    predictions = []
+    for start in range(0, len(indices), batch_size):
+        batch = np.asarray(X[indices[start:start + batch_size]], dtype=np.float32)
+        predictions.append(np.argmax(model.predict_on_batch(batch), axis=1))
+    return np.concatenate(predictions) if predictions else np.empty(0, dtype=int)
+
+
+def classification_report(y_true, y_pred, labels):
+    """Accuracy, per-class precision / recall / support and the confusion matrix (rows = true class)"""
+    num_classes = len(labels)
+    confusion = np.bincount(y_true * num_classes + y_pred, minlength=num_classes ** 2).reshape(num_classes, num_classes)
+    true_positives = np.diag(confusion)
+    predicted = confusion.sum(axis=0)
+    support = confusion.sum(axis=1)
+
+    per_class = {}
+    for i, label in enumerate(labels):
+        per_class[label] = {
+            "precision": round(float(true_positives[i] / predicted[i]), 4) if predicted[i] else None,
+            "recall": round(float(true_positives[i] / support[i]), 4) if support[i] else None,
+            "support": int(support[i]),
+        }
+    return {
+        "samples": int(len(y_true)),
+        "accuracy": round(float(true_positives.sum() / max(len(y_true), 1)), 4),
+        "perClass": per_class,
+        "confusionMatrix": confusion.tolist(),
+    }
+
+
+# ---------------- THROUGHPUT ----------------
+def throughput(model, X, indices, batch_sizes, min_seconds=MIN_BENCH_SECONDS):
+    """{ batch size: { samplesPerSec, batchMs } } with predict_on_batch on real rows"""
+    results = {}
+    for batch_size in batch_sizes:
+        rows = np.resize(indices, batch_size)  # Repeats rows when the split is smaller than the batch
+        batch = np.asarray(X[np.sort(rows)], dtype=np.float32)
+        for _ in range(3):
+            model.predict_on_batch(batch)  # Warm-up (graph tracing for a new batch shape)
+
+        timings = []
+        started = time.perf_counter()
+        while time.perf_counter() - started < min_seconds or len(timings) < 5:
+            batch_started = time.perf_counter()
+            model.predict_on_batch(batch)
+            timings.append(time.perf_counter() - batch_started)
+        median = float(np.median(timings))
+        results[str(batch_size)] = {
+            "samplesPerSec": round(batch_size / median, 1),
+            "batchMs": round(median * 1000, 3),
+        }
+    return results
+
+
+def evaluate(kind, split, batch_sizes):
+    bundle, X, y, labels = load_model_data(kind)
+    indices = np.arange(len(y)) if split == "all" else np.sort(split_indices(y, TEST_SIZES[kind])[1])
+
+    started = time.perf_counter()
+    predictions = predict_all(bundle.model, X, indices)
+    predict_seconds = time.perf_counter() - started
+
+    result = {
+        "bundle": str(bundle.path),
+        "version": bundle.version,
+        "split": split,
+        "labels": labels,
+        **classification_report(np.asarray(y[indices]), predictions, labels),
+        "evaluationSeconds": round(predict_seconds, 3),
+        "throughput": throughput(bundle.model, X, indices, batch_sizes),
+        "servingLatency": single_sample_latency(bundle.model, bundle.input_shape),
+    }
+    return result
+
+
+# ---------------- REGRESSION GATE ----------------
+def compare(current, baseline, max_accuracy_drop, max_slowdown):
+    """Regression messages (empty if the current run is within the allowed margins)"""
+    failures = []
+    for kind, result in current["models"].items():
+        previous = baseline.get("models", {}).get(kind)
+        if previous is None:
+            continue
+        drop = previous["accuracy"] - result["accuracy"]
+        if drop > max_accuracy_drop:
+            failures.append(f"{kind}: accuracy {previous['accuracy']:.4f} -> {result['accuracy']:.4f}")
+        for batch_size, speed in result["throughput"].items():
+            before = previous["throughput"].get(batch_size)
+            if before and speed["samplesPerSec"] < before["samplesPerSec"] * (1 - max_slowdown):
+                failures.append(f"{kind}: batch {batch_size} throughput {before['samplesPerSec']:.0f} -> "
+                                f"{speed['samplesPerSec']:.0f} samples/sec")
+    return failures
+
+
+def print_summary(kind, result):
+    print(f"\n{kind} ({result['version']}): accuracy {result['accuracy']:.4f} on {result['samples']} "
+          f"{result['split']} samples")
+    worst = sorted(
+        ((label, stats) for label, stats in result["perClass"].items() if stats["recall"] is not None),
+        key=lambda item: item[1]["recall"],
+    )[:5]
+    for label, stats in worst:
+        precision = f"{stats['precision']:.3f}" if stats["precision"] is not None else "  n/a"
+        print(f"   {label:>12s}: recall {stats['recall']:.3f}, precision {precision} (support {stats['support']})")
+    for batch_size, speed in result["throughput"].items():
+        print(f"   batch {batch_size:>4s}: {speed['samplesPerSec']:10.1f} samples/sec ({speed['batchMs']:.2f} ms/batch)")
+    print(f"   model.predict, 1 sample: {result['servingLatency']['medianMs']:.2f} ms median")
 
-X = df.drop("label", axis=1)
-y = df["label"]
 
-# Encode labels again
-encoder = LabelEncoder()
-y_encoded = encoder.fit_transform(y)
+# ---------------- MAIN ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Full held-out evaluation and inference benchmark")
+    parser.add_argument("--models", nargs="+", choices=["alphabet", "words"], default=["alphabet", "words"])
+    parser.add_argument("--split", choices=["test", "all"], default="test")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=BATCH_SIZES)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--baseline", help="earlier evaluation JSON to gate against")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.005)
+    parser.add_argument("--max-slowdown", type=float, default=0.15, help="allowed throughput loss (fraction)")
+    args = parser.parse_args()
 
-# Load trained model
-model = load_model("asl_alphabet_model.h5")
+    report = {"models": {}}
+    for kind in args.models:
+        result = evaluate(kind, args.split, args.batch_sizes)
+        report["models"][kind] = result
+        print_summary(kind, result)
 
-# Random samples
-indices = np.random.choice(len(X), 5, replace=False)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
 
-for i in indices:
-    sample = np.array([X.iloc[i]])
-    prediction = model.predict(sample, verbose=0)
-    predicted_label = encoder.inverse_transform([np.argmax(prediction)])[0]
-    actual_label = y.iloc[i]
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = compare(report, baseline, args.max_accuracy_drop, args.max_slowdown)
+        if failures:
+            print("❌ Regressions against", args.baseline)
+            for failure in failures:
+                print(" -", failure)
+            sys.exit(1)
+        print("✅ No regressions against", args.baseline)
 
-    print(f"Actual: {actual_label} | Predicted: {predicted_label}")
 
+if __name__ == "__main__":
+    main()
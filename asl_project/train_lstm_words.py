@@ -1,68 +1,106 @@
-import numpy as np
-import tensorflow as tf
+import argparse
+
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
+from tensorflow.keras.layers import Input, LSTM, Dense, Dropout
 from tensorflow.keras.callbacks import EarlyStopping
-from sklearn.model_selection import train_test_split
-
-# ---------------- LOAD DATA ----------------
-X = np.load("X_dynamic.npy")   # (samples, 30, 63)
-y = np.load("y_dynamic.npy")   # (samples,)
-
-num_classes = len(np.unique(y))
-print("X shape:", X.shape)
-print("y shape:", y.shape)
-print("Classes:", num_classes)
-
-# ---------------- TRAIN / TEST SPLIT ----------------
-X_train, X_test, y_train, y_test = train_test_split(
-    X,
-    y,
-    test_size=0.25,
-    random_state=42,
-    stratify=y
-)
+from tensorflow.keras.optimizers import Adam
+
+from input_pipeline import load_word_dataset, training_datasets
+from landmark_augment import LandmarkAugmenter
+from model_bundle import save_bundle, WORD_BUNDLE
+
+# ---------------- CONFIG ----------------
+SEQUENCE_LENGTH = 30
+TEST_SIZE = 0.25
+VALIDATION_SPLIT = 0.2
+EPOCHS = 100
+BATCH_SIZE = 8
+
 
 # ---------------- MODEL ----------------
-model = Sequential([
-    LSTM(64, return_sequences=True, input_shape=(30, 63)),
-    Dropout(0.3),
-
-    LSTM(64),
-    Dropout(0.3),
-
-    Dense(64, activation="relu"),
-    Dense(num_classes, activation="softmax")
-])
-
-model.compile(
-    optimizer="adam",
-    loss="sparse_categorical_crossentropy",
-    metrics=["accuracy"]
-)
-
-model.summary()
-
-# ---------------- TRAIN ----------------
-early_stop = EarlyStopping(
-    monitor="val_loss",
-    patience=10,
-    restore_best_weights=True
-)
-
-history = model.fit(
-    X_train,
-    y_train,
-    epochs=100,
-    batch_size=8,
-    validation_split=0.2,
-    callbacks=[early_stop]
-)
-
-# ---------------- EVALUATE ----------------
-loss, acc = model.evaluate(X_test, y_test, verbose=0)
-print("Test Accuracy:", acc)
-
-# ---------------- SAVE MODEL ----------------
-model.save("asl_dynamic_word_lstm.h5")
-print("Model saved as asl_dynamic_word_lstm.h5")
+def build_model(num_classes, lstm_units=(64, 64), dense_units=64, dropout=0.3, learning_rate=None):
+    layers = [Input(shape=(SEQUENCE_LENGTH, 63))]
+    for i, units in enumerate(lstm_units):
+        # Every LSTM but the last hands its full sequence to the next one
+        layers += [LSTM(units, return_sequences=i < len(lstm_units) - 1), Dropout(dropout)]
+    if dense_units:
+        layers.append(Dense(dense_units, activation="relu"))
+    model = Sequential(layers + [Dense(num_classes, activation="softmax")])
+
+    model.compile(
+        optimizer=Adam(learning_rate) if learning_rate else "adam",
+        loss="sparse_categorical_crossentropy",
+        metrics=["accuracy"]
+    )
+    return model
+
+
+def train(X, y, labels, epochs=EPOCHS, batch_size=BATCH_SIZE, cache=True, threads=None, verbose=1, augment=None,
+          **model_options):
+    """
+    Build and fit a model on the standard split -> (model, test accuracy)
+    augment (e.g. a LandmarkAugmenter) transforms training batches; model_options go to build_model
+    """
+    # ---------------- TRAIN / TEST SPLIT ----------------
+    # Same stratified split and validation tail as before, streamed through tf.data
+    (train_set, validation, test), _ = training_datasets(
+        X, y, TEST_SIZE, VALIDATION_SPLIT, batch_size, augment=augment, cache=cache, threads=threads
+    )
+
+    # ---------------- MODEL ----------------
+    model = build_model(len(labels), **model_options)
+    if verbose:
+        model.summary()
+
+    # ---------------- TRAIN ----------------
+    early_stop = EarlyStopping(
+        monitor="val_loss",
+        patience=10,
+        restore_best_weights=True
+    )
+
+    history = model.fit(
+        train_set,
+        validation_data=validation,
+        epochs=epochs,
+        callbacks=[early_stop],
+        verbose=verbose
+    )
+
+    # ---------------- EVALUATE ----------------
+    loss, acc = model.evaluate(test, verbose=0)
+    return model, acc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the dynamic word LSTM")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--cache", help="cache file for the training set (default: in memory)")
+    parser.add_argument("--no-cache", action="store_true", help="re-read the features every epoch")
+    parser.add_argument("--augment", action="store_true",
+                        help="augment training batches on the fly (see landmark_augment.py)")
+    args = parser.parse_args()
+    cache = False if args.no_cache else (args.cache or True)
+
+    # ---------------- LOAD DATA ----------------
+    # X_dynamic.npy (samples, 30, 63) is memory-mapped, labels.txt is in class index order
+    X, y, labels = load_word_dataset()
+
+    num_classes = len(labels)
+    print("X shape:", X.shape)
+    print("y shape:", y.shape)
+    print("Classes:", num_classes)
+
+    augment = LandmarkAugmenter() if args.augment else None
+    model, acc = train(X, y, labels, epochs=args.epochs, batch_size=args.batch_size, cache=cache, augment=augment)
+    print("Test Accuracy:", acc)
+
+    # ---------------- SAVE MODEL ----------------
+    # Model + labels + input spec in one artifact (see model_bundle.py)
+    bundle = save_bundle(WORD_BUNDLE, model, labels, extra={"testAccuracy": float(acc)})
+    print(f"Model saved as {WORD_BUNDLE.name} (version {bundle['version']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,89 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
+import argparse
+
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, Dropout
-
-# Load dataset
-df = pd.read_csv("asl_landmarks.csv")
-
-X = df.drop("label", axis=1)
-y = df["label"]
-
-# Encode labels (A-Z → 0-25)
-encoder = LabelEncoder()
-y = encoder.fit_transform(y)
-
-# Train-test split
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
-
-# Model
-model = Sequential([
-    Dense(256, activation="relu", input_shape=(63,)),
-    Dropout(0.3),
-    Dense(128, activation="relu"),
-    Dropout(0.3),
-    Dense(26, activation="softmax")
-])
-
-model.compile(
-    optimizer="adam",
-    loss="sparse_categorical_crossentropy",
-    metrics=["accuracy"]
-)
-
-print("Training script ready.")
-# ---------------- TRAIN MODEL ----------------
-
-history = model.fit(
-    X_train,
-    y_train,
-    epochs=30,
-    batch_size=32,
-    validation_split=0.2
-)
-
-# ---------------- EVALUATION ----------------
-
-loss, acc = model.evaluate(X_test, y_test)
-print("Test Accuracy:", acc)
-
-# ---------------- SAVE MODEL ----------------
-
-model.save("asl_alphabet_model.h5")
-print("Model saved as asl_alphabet_model.h5")
+from tensorflow.keras.layers import Input, Dense, Dropout
+from tensorflow.keras.optimizers import Adam
+
+from input_pipeline import training_datasets
+from landmark_augment import LandmarkAugmenter
+from landmark_dataset import load_dataset, DEFAULT_PATH
+from model_bundle import save_bundle, ALPHABET_BUNDLE
+
+# ---------------- CONFIG ----------------
+TEST_SIZE = 0.2
+VALIDATION_SPLIT = 0.2
+EPOCHS = 30
+BATCH_SIZE = 32
+
+
+# ---------------- MODEL ----------------
+def build_model(num_classes, hidden=(256, 128), dropout=0.3, learning_rate=None):
+    layers = [Input(shape=(63,))]
+    for units in hidden:
+        layers += [Dense(units, activation="relu"), Dropout(dropout)]
+    model = Sequential(layers + [Dense(num_classes, activation="softmax")])
+
+    model.compile(
+        optimizer=Adam(learning_rate) if learning_rate else "adam",
+        loss="sparse_categorical_crossentropy",
+        metrics=["accuracy"]
+    )
+    return model
+
+
+def train(X, y, labels, epochs=EPOCHS, batch_size=BATCH_SIZE, cache=True, threads=None, verbose=1, augment=None,
+          **model_options):
+    """
+    Build and fit a model on the standard split -> (model, test accuracy)
+    augment (e.g. a LandmarkAugmenter) transforms training batches; model_options go to build_model
+    """
+    # Same stratified train/test split and validation tail as before, streamed through tf.data
+    (train_set, validation, test), _ = training_datasets(
+        X, y, TEST_SIZE, VALIDATION_SPLIT, batch_size, augment=augment, cache=cache, threads=threads
+    )
+
+    model = build_model(len(labels), **model_options)
+    if verbose:
+        print("Training script ready.")
+    # ---------------- TRAIN MODEL ----------------
+
+    history = model.fit(
+        train_set,
+        validation_data=validation,
+        epochs=epochs,
+        verbose=verbose
+    )
+
+    # ---------------- EVALUATION ----------------
+
+    loss, acc = model.evaluate(test, verbose=verbose)
+    return model, acc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the alphabet landmark classifier")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--cache", help="cache file for the training set (default: in memory)")
+    parser.add_argument("--no-cache", action="store_true", help="re-read the features every epoch")
+    parser.add_argument("--augment", action="store_true",
+                        help="augment training batches on the fly (see landmark_augment.py)")
+    args = parser.parse_args()
+    cache = False if args.no_cache else (args.cache or True)
+
+    # Load dataset (binary, memory-mapped, see landmark_dataset.py; labels are already encoded A-Z → 0-25)
+    X, y, labels = load_dataset(DEFAULT_PATH)
+
+    augment = LandmarkAugmenter() if args.augment else None
+    model, acc = train(X, y, labels, epochs=args.epochs, batch_size=args.batch_size, cache=cache, augment=augment)
+    print("Test Accuracy:", acc)
+
+    # ---------------- SAVE MODEL ----------------
+
+    # Model + labels + input spec in one artifact (see model_bundle.py)
+    bundle = save_bundle(ALPHABET_BUNDLE, model, labels, extra={"testAccuracy": float(acc)})
+    print(f"Model saved as {ALPHABET_BUNDLE.name} (version {bundle['version']})")
+
+
+if __name__ == "__main__":
+    main()
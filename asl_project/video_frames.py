@@ -0,0 +1,79 @@
+"""
+Read only the sampled frames of a source video (no pre-split *_frames folders)
+extract_dynamic_landmarks.py samples SEQUENCE_LENGTH frame indices with the same
+np.linspace rule it uses for frame folders, and read_frames() decodes just those:
+short gaps are skipped with grab() (no BGR conversion), long gaps with a seek.
+"""
+
+import os
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v")
+
+# Past this many frames, seeking (to the previous keyframe + decode) beats grabbing through
+SEEK_GAP = 48
+
+VideoClip = namedtuple("VideoClip", ["path", "indices"])
+
+
+def is_video(path):
+    return os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+
+def sample_indices(count, target_len):
+    """target_len frame indices out of count (evenly spaced, or padded with the last frame)"""
+    if count >= target_len:
+        return np.linspace(0, count - 1, target_len).astype(int).tolist()
+    return list(range(count)) + [count - 1] * (target_len - count)
+
+
+def frame_count(path):
+    """Number of frames in a video (counted by grabbing when the container's count is missing or too high)"""
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            return 0
+        count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        # Container counts can be estimates past the real end; trust one only if its last frame decodes
+        if count > 0 and cap.set(cv2.CAP_PROP_POS_FRAMES, count - 1) and cap.grab():
+            return count
+    finally:
+        cap.release()
+
+    cap = cv2.VideoCapture(path)
+    try:
+        count = 0
+        while cap.grab():
+            count += 1
+        return count
+    finally:
+        cap.release()
+
+
+def read_frames(path, indices):
+    """Yield (index, BGR image or None) for sorted, unique frame indices, decoding only those frames"""
+    cap = cv2.VideoCapture(path)
+    try:
+        position = 0
+        for index in indices:
+            if index - position > SEEK_GAP and cap.set(cv2.CAP_PROP_POS_FRAMES, index):
+                # Seeks can land short of the target (e.g. on a keyframe): continue from where the decoder says it is
+                landed = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+                if 0 <= landed <= index:
+                    position = landed
+                else:
+                    # Overshot (or unknown): start over and grab through instead
+                    cap.release()
+                    cap = cv2.VideoCapture(path)
+                    position = 0
+            while position < index and cap.grab():
+                position += 1
+            ok, image = cap.read() if position == index else (False, None)
+            if ok:
+                position += 1
+            yield index, image if ok else None
+    finally:
+        cap.release()
@@ -0,0 +1,216 @@
+"""
+Async access to Azure Communication Services (identity + rooms)
+Routes in main.py await these methods instead of calling the synchronous SDK
+clients, so a slow Azure call no longer freezes the event loop.
+
+Two backends:
+- "async": the SDK's azure.communication.*.aio clients sharing one aiohttp transport
+- "executor": the synchronous clients (sharing one pooled requests transport)
+  run on a dedicated thread pool, used when the aio clients/aiohttp are missing
+
+ACS_BACKEND=fake swaps in the in-memory stand-in from fake_acs.py instead.
+
+Every call goes through a CircuitBreaker (circuit_breaker.py) with a timeout, so
+an Azure outage fails fast instead of piling up requests. In executor mode a
+timed-out call keeps its worker thread until the SDK gives up.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from circuit_breaker import CircuitBreaker
+
+ACS_EXECUTOR_WORKERS = int(os.getenv("ACS_EXECUTOR_WORKERS", "8"))
+ACS_POOL_CONNECTIONS = int(os.getenv("ACS_POOL_CONNECTIONS", "20"))
+ACS_CALL_TIMEOUT = float(os.getenv("ACS_CALL_TIMEOUT", "10"))  # seconds per SDK call
+ACS_BREAKER_FAILURE_THRESHOLD = int(os.getenv("ACS_BREAKER_FAILURE_THRESHOLD", "5"))
+ACS_BREAKER_RESET_SECONDS = float(os.getenv("ACS_BREAKER_RESET_SECONDS", "30"))
+
+
+def communication_user_id(user):
+    """
+    Extract the "8:acs:..." ID from a CommunicationUserIdentifier
+    (same fallbacks the routes in main.py use)
+    """
+    try:
+        if hasattr(user, 'properties') and user.properties:
+            user_id = user.properties.get('id') or user.properties.get('communication_user_id')
+            if user_id:
+                return user_id
+        if hasattr(user, 'id') and user.id:
+            return user.id
+        if hasattr(user, 'identifier') and user.identifier:
+            return user.identifier
+    except Exception as e:
+        print(f"Warning: Error extracting user ID: {e}")
+    return str(user)
+
+
+def token_seconds_left(token_response):
+    """Seconds until an AccessToken expires (inf if expires_on is not a datetime)"""
+    expires_on = token_response.expires_on
+    if not isinstance(expires_on, datetime):
+        return float("inf")
+    if expires_on.tzinfo is None:
+        expires_on = expires_on.replace(tzinfo=timezone.utc)
+    return (expires_on - datetime.now(timezone.utc)).total_seconds()
+
+
+class AcsClients:
+    """
+    Async facade over CommunicationIdentityClient and RoomsClient
+    rooms is False when only the identity SDK is installed
+    """
+
+    def __init__(self, connection_string):
+        self.connection_string = connection_string
+        self.mode = None
+        self.rooms = False
+        self._identity = None
+        self._rooms = None
+        self._session = None
+        self._executor = None
+        self.fake = None  # FakeAcsBackend when ACS_BACKEND=fake
+        self.breaker = CircuitBreaker(
+            failure_threshold=ACS_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=ACS_BREAKER_RESET_SECONDS,
+            call_timeout=ACS_CALL_TIMEOUT,
+        )
+
+    # ---------------- LIFECYCLE ----------------
+    async def open(self):
+        """Create the clients and their shared HTTP transport (call from a running loop)"""
+        if os.getenv("ACS_BACKEND", "azure") == "fake":
+            self._open_fake()
+        else:
+            try:
+                self._open_async()
+            except ImportError:
+                self._open_executor()
+        print(f"✅ Azure Communication Services clients ready (mode: {self.mode}, rooms: {self.rooms})")
+
+    def _open_fake(self):
+        """In-memory stand-in from fake_acs.py, for offline load testing"""
+        import fake_acs
+
+        self.fake = fake_acs.FakeAcsBackend()
+        if os.getenv("ACS_FAKE_MODE", "async") == "executor":
+            self._identity = fake_acs.FakeIdentityClient(self.fake)
+            self._rooms = fake_acs.FakeRoomsClient(self.fake)
+            self._executor = ThreadPoolExecutor(max_workers=ACS_EXECUTOR_WORKERS, thread_name_prefix="acs")
+            self.mode = "fake-executor"
+        else:
+            self._identity = fake_acs.AsyncFakeIdentityClient(self.fake)
+            self._rooms = fake_acs.AsyncFakeRoomsClient(self.fake)
+            self.mode = "fake-async"
+        self.rooms = True
+
+    def _open_async(self):
+        import aiohttp
+        from azure.core.pipeline.transport import AioHttpTransport
+        from azure.communication.identity.aio import CommunicationIdentityClient
+
+        self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=ACS_POOL_CONNECTIONS))
+        try:
+            # session_owner=False: closing one client must not close the session the other uses
+            self._identity = CommunicationIdentityClient.from_connection_string(
+                self.connection_string,
+                transport=AioHttpTransport(session=self._session, session_owner=False),
+            )
+            try:
+                from azure.communication.rooms.aio import RoomsClient
+                self._rooms = RoomsClient.from_connection_string(
+                    self.connection_string,
+                    transport=AioHttpTransport(session=self._session, session_owner=False),
+                )
+                self.rooms = True
+            except ImportError:
+                self.rooms = False
+        except Exception:
+            asyncio.ensure_future(self._session.close())
+            self._session = None
+            raise
+        self.mode = "async"
+
+    def _open_executor(self):
+        import requests
+        from azure.core.pipeline.transport import RequestsTransport
+        from azure.communication.identity import CommunicationIdentityClient
+
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=ACS_POOL_CONNECTIONS, pool_maxsize=ACS_POOL_CONNECTIONS)
+        self._session.mount("https://", adapter)
+        self._identity = CommunicationIdentityClient.from_connection_string(
+            self.connection_string,
+            transport=RequestsTransport(session=self._session, session_owner=False),
+        )
+        try:
+            from azure.communication.rooms import RoomsClient
+            self._rooms = RoomsClient.from_connection_string(
+                self.connection_string,
+                transport=RequestsTransport(session=self._session, session_owner=False),
+            )
+            self.rooms = True
+        except ImportError:
+            self.rooms = False
+        self._executor = ThreadPoolExecutor(max_workers=ACS_EXECUTOR_WORKERS, thread_name_prefix="acs")
+        self.mode = "executor"
+
+    async def close(self):
+        if self.mode == "async":
+            await self._identity.close()
+            if self._rooms is not None:
+                await self._rooms.close()
+            await self._session.close()
+        elif self.mode == "executor":
+            self._executor.shutdown(wait=False)
+            self._session.close()
+        elif self.mode == "fake-executor":
+            self._executor.shutdown(wait=False)
+        self.mode = None
+
+    @property
+    def is_async(self):
+        return self.mode in ("async", "fake-async")
+
+    async def _call(self, method, *args, **kwargs):
+        """Await an aio SDK method, or run a sync one on the ACS executor (behind the breaker)"""
+        if self.is_async:
+            return await self.breaker.call(method, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await self.breaker.call(loop.run_in_executor, self._executor, partial(method, *args, **kwargs))
+
+    # ---------------- IDENTITY ----------------
+    async def create_user(self):
+        return await self._call(self._identity.create_user)
+
+    async def get_token(self, user, scopes):
+        return await self._call(self._identity.get_token, user, scopes=scopes)
+
+    async def create_user_and_token(self, scopes):
+        """Create a user and issue its token in a single round trip -> (user, token_response)"""
+        return await self._call(self._identity.create_user_and_token, scopes=scopes)
+
+    # ---------------- ROOMS ----------------
+    async def create_room(self, **kwargs):
+        return await self._call(self._rooms.create_room, **kwargs)
+
+    async def get_room(self, room_id):
+        return await self._call(self._rooms.get_room, room_id)
+
+    async def list_participants(self, room_id):
+        """List a room's participants (materialized, since the aio pager is async-iterable)"""
+        if self.is_async:
+            async def collect():
+                return [p async for p in self._rooms.list_participants(room_id)]
+            return await self.breaker.call(collect)
+        loop = asyncio.get_running_loop()
+        return await self.breaker.call(
+            loop.run_in_executor, self._executor, lambda: list(self._rooms.list_participants(room_id))
+        )
+
+    async def add_or_update_participants(self, room_id, participants):
+        return await self._call(self._rooms.add_or_update_participants, room_id=room_id, participants=participants)
@@ -0,0 +1,60 @@
+"""
+Relay log recovery benchmark
+Writes N relay messages through RelayLog, then times recover_state on the result
+
+Usage:
+    python benchmark_relay_log.py            # 100k messages
+    python benchmark_relay_log.py 250000
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from relay_log import RelayLog, recover_state
+
+HISTORY_LIMIT = 100
+ROOMS = 50
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "relay.log")
+
+        # Compaction disabled so recovery has to read every record
+        log = RelayLog(path, compact_threshold=float("inf"))
+        log.start()
+
+        started = time.perf_counter()
+        for i in range(1, total + 1):
+            channel = "transcription" if i % 2 else "gesture"
+            room_id = f"ROOM{i % ROOMS}"
+            log.append_message(channel, room_id, {
+                "id": i,
+                "type": "partial",
+                "text": f"message number {i}",
+                "timestamp": 1700000000000 + i,
+                "participantType": "hearing",
+                "participantName": "Benchmark",
+            })
+        for r in range(ROOMS):
+            log.append_room(f"ROOM{r}", f"azure-room-{r}")
+        log.close()
+        write_seconds = time.perf_counter() - started
+
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"📝 Wrote {total} messages ({size_mb:.1f} MB) in {write_seconds:.2f}s, "
+              f"{log.stats['batches']} fsync batch(es)")
+
+        state = recover_state(path, HISTORY_LIMIT)
+        kept = sum(len(m) for m in state["transcription"].values()) + sum(len(m) for m in state["gesture"].values())
+        print(f"♻️ Recovered {state['records']} records in {state['seconds'] * 1000:.1f} ms "
+              f"({state['records'] / state['seconds']:.0f} records/s)")
+        print(f"   Messages kept in memory: {kept}, rooms: {len(state['rooms'])}, counters: {state['counters']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Circuit breaker with per-call timeouts for Azure Communication Services calls
+After failure_threshold consecutive failures (timeouts, connection errors, 5xx/429)
+the circuit opens and calls fail immediately with CircuitOpenError for
+reset_timeout seconds. Then one probe call is let through (half-open): success
+closes the circuit, failure opens it again.
+
+Client errors (e.g. 404 unknown user, 409 already a participant) are passed
+through without counting, since they say nothing about Azure's health.
+"""
+
+import asyncio
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Azure while the circuit is open"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} unavailable (circuit open), retry in {retry_in:.1f}s")
+        self.retry_in = retry_in
+
+
+def is_service_failure(error):
+    """True for errors that indicate Azure (or the network) is unhealthy"""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status is None or status >= 500 or status == 429
+
+
+class CircuitBreaker:
+    def __init__(self, name="Azure Communication Services", failure_threshold=5,
+                 reset_timeout=30.0, call_timeout=10.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+
+        self.state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+        self.stats = {"calls": 0, "failures": 0, "timeouts": 0, "rejected": 0, "opened": 0}
+        self.last_error = None
+
+    def _retry_in(self):
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def _before_call(self):
+        """Decide whether a call may go out -> True if it is the half-open probe"""
+        if self.state == OPEN:
+            if self._retry_in() > 0:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, self._retry_in())
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, 0.0)
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def _record_success(self):
+        self._consecutive_failures = 0
+        if self.state != CLOSED:
+            print(f"✅ {self.name} circuit closed")
+        self.state = CLOSED
+
+    def _record_failure(self, error):
+        self.stats["failures"] += 1
+        self.last_error = str(error) or type(error).__name__
+        self._consecutive_failures += 1
+        if self.state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.stats["opened"] += 1
+                print(f"⚠️ {self.name} circuit opened after {self._consecutive_failures} failure(s): {self.last_error}")
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+
+    async def call(self, func, *args, **kwargs):
+        """Await func(*args, **kwargs) under the call timeout, tracking failures"""
+        probe = self._before_call()
+        self.stats["calls"] += 1
+        try:
+            result = await asyncio.wait_for(func(*args, **kwargs), timeout=self.call_timeout)
+        except asyncio.TimeoutError as e:
+            self.stats["timeouts"] += 1
+            self._record_failure(e)
+            raise asyncio.TimeoutError(f"{self.name} call timed out after {self.call_timeout}s") from e
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if is_service_failure(e):
+                self._record_failure(e)
+            else:
+                self._record_success()
+            raise
+        else:
+            self._record_success()
+            return result
+        finally:
+            if probe:
+                self._probe_in_flight = False
+
+    def report(self):
+        return {
+            "state": self.state,
+            "consecutiveFailures": self._consecutive_failures,
+            "failureThreshold": self.failure_threshold,
+            "resetTimeoutSeconds": self.reset_timeout,
+            "callTimeoutSeconds": self.call_timeout,
+            "retryInSeconds": round(self._retry_in(), 1) if self.state == OPEN else None,
+            "lastError": self.last_error,
+            **self.stats,
+        }
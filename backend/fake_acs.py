@@ -0,0 +1,259 @@
+"""
+Local stand-in for Azure Communication Services (offline load testing)
+Implements the subset of CommunicationIdentityClient and RoomsClient that
+main.py uses, entirely in memory, with configurable latency and error injection.
+
+Select it with ACS_BACKEND=fake (see acs_clients.AcsClients.open). The Azure SDK
+packages still need to be installed since the routes build RoomParticipant /
+CommunicationUserIdentifier objects, but no request leaves the machine.
+
+Environment:
+    ACS_FAKE_MODE=async|executor   async clients (default) or sync clients on the ACS executor
+    ACS_FAKE_LATENCY=<dist>        latency for every call, e.g.
+                                       fixed:50           always 50 ms
+                                       uniform:20,80      20-80 ms
+                                       normal:50,10       mean 50 ms, stddev 10 ms
+                                       lognormal:50,0.5   median 50 ms, sigma 0.5
+    ACS_FAKE_LATENCY_<OP>=<dist>   per-operation override, OP is e.g. CREATE_ROOM, GET_TOKEN
+    ACS_FAKE_ERROR_RATE=0.05       fraction of calls that fail with FakeAcsError
+    ACS_FAKE_SEED=42               seed for latency/error randomness
+"""
+
+import asyncio
+import itertools
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+try:
+    from azure.communication.identity import CommunicationUserIdentifier
+except ImportError:
+    class CommunicationUserIdentifier:
+        def __init__(self, id):
+            self.properties = {"id": id}
+            self.raw_id = id
+
+        def __str__(self):
+            return self.properties["id"]
+
+from acs_clients import communication_user_id
+
+AccessToken = namedtuple("AccessToken", ["token", "expires_on"])
+TOKEN_LIFETIME = timedelta(hours=24)
+
+
+class FakeAcsError(Exception):
+    """Injected failure (stands in for an Azure HttpResponseError)"""
+
+    def __init__(self, message, status_code=503):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeRoom:
+    def __init__(self, room_id, valid_from, valid_until, participants):
+        self.id = room_id
+        self.valid_from = valid_from
+        self.valid_until = valid_until
+        self.participants = list(participants)
+
+
+# ---------------- LATENCY / ERRORS ----------------
+def parse_latency(spec):
+    """Turn "kind:args" into a function returning a delay in seconds"""
+    kind, _, args = (spec or "fixed:0").partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] or [0.0]
+    if kind == "fixed":
+        return lambda rng: values[0] / 1000
+    if kind == "uniform":
+        low, high = values[0], values[1] if len(values) > 1 else values[0]
+        return lambda rng: rng.uniform(low, high) / 1000
+    if kind == "normal":
+        mean, stddev = values[0], values[1] if len(values) > 1 else 0.0
+        return lambda rng: max(0.0, rng.gauss(mean, stddev)) / 1000
+    if kind == "lognormal":
+        median, sigma = values[0], values[1] if len(values) > 1 else 0.5
+        return lambda rng: rng.lognormvariate(math.log(max(median, 1e-6)), sigma) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class FakeAcsBackend:
+    """Shared in-memory state plus the latency/error model used by both client kinds"""
+
+    def __init__(self, latency=None, error_rate=None, seed=None):
+        latency = latency if latency is not None else os.getenv("ACS_FAKE_LATENCY", "fixed:50")
+        self._default_latency = parse_latency(latency)
+        self._latency_overrides = {}
+        self.error_rate = float(error_rate if error_rate is not None else os.getenv("ACS_FAKE_ERROR_RATE", "0"))
+        seed = seed if seed is not None else os.getenv("ACS_FAKE_SEED")
+        self._rng = random.Random(int(seed) if seed is not None else None)
+        self._lock = threading.Lock()
+        self._user_counter = itertools.count(1)
+
+        self.users = set()
+        self.rooms = {}  # { azureRoomId: FakeRoom }
+        self.calls = {}  # { operation: count }
+        self.errors = 0
+
+    def _latency_for(self, operation):
+        if operation not in self._latency_overrides:
+            spec = os.getenv(f"ACS_FAKE_LATENCY_{operation.upper()}")
+            self._latency_overrides[operation] = parse_latency(spec) if spec else None
+        return self._latency_overrides[operation] or self._default_latency
+
+    def begin(self, operation):
+        """Count the call, draw its latency and decide whether it fails -> (delay, error)"""
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            delay = self._latency_for(operation)(self._rng)
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        error = FakeAcsError(f"(ServiceUnavailable) injected failure in {operation}") if fail else None
+        return delay, error
+
+    # ---------------- OPERATIONS (no latency) ----------------
+    def create_user(self):
+        user_id = f"8:acs:fake_{next(self._user_counter):08d}_{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            self.users.add(user_id)
+        return CommunicationUserIdentifier(user_id)
+
+    def get_token(self, user, scopes):
+        user_id = communication_user_id(user)
+        if user_id not in self.users:
+            raise FakeAcsError(f"(IdentityNotFound) Identity {user_id} does not exist", status_code=404)
+        return AccessToken(f"fake-token-{uuid.uuid4().hex}", datetime.now(timezone.utc) + TOKEN_LIFETIME)
+
+    def create_user_and_token(self, scopes):
+        user = self.create_user()
+        return user, self.get_token(user, scopes)
+
+    def create_room(self, valid_from=None, valid_until=None, participants=None, **kwargs):
+        room = FakeRoom(
+            str(uuid.uuid4().int)[:18],
+            valid_from or datetime.now(timezone.utc),
+            valid_until or datetime.now(timezone.utc) + timedelta(hours=24),
+            participants or [],
+        )
+        with self._lock:
+            self.rooms[room.id] = room
+        return room
+
+    def get_room(self, room_id):
+        room = self.rooms.get(room_id)
+        if room is None:
+            raise FakeAcsError(f"(RoomNotFound) Room {room_id} does not exist", status_code=404)
+        return room
+
+    def list_participants(self, room_id):
+        return list(self.get_room(room_id).participants)
+
+    def add_or_update_participants(self, room_id, participants):
+        room = self.get_room(room_id)
+        with self._lock:
+            by_id = {communication_user_id(p.communication_identifier): p for p in room.participants}
+            for p in participants:
+                by_id[communication_user_id(p.communication_identifier)] = p
+            room.participants = list(by_id.values())
+
+    def report(self):
+        return {
+            "users": len(self.users),
+            "rooms": len(self.rooms),
+            "calls": dict(self.calls),
+            "errors": self.errors,
+        }
+
+
+# ---------------- CLIENTS ----------------
+class _FakeClientBase:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def close(self):
+        pass
+
+
+class _FakeSyncClient(_FakeClientBase):
+    """Synchronous stand-in (latency via time.sleep, like the real sync SDK)"""
+
+    def _run(self, operation, *args, **kwargs):
+        delay, error = self._backend.begin(operation)
+        time.sleep(delay)
+        if error:
+            raise error
+        return getattr(self._backend, operation)(*args, **kwargs)
+
+
+class FakeIdentityClient(_FakeSyncClient):
+    def create_user(self):
+        return self._run("create_user")
+
+    def get_token(self, user, scopes):
+        return self._run("get_token", user, scopes)
+
+    def create_user_and_token(self, scopes):
+        return self._run("create_user_and_token", scopes)
+
+
+class FakeRoomsClient(_FakeSyncClient):
+    def create_room(self, **kwargs):
+        return self._run("create_room", **kwargs)
+
+    def get_room(self, room_id):
+        return self._run("get_room", room_id)
+
+    def list_participants(self, room_id):
+        return iter(self._run("list_participants", room_id))
+
+    def add_or_update_participants(self, room_id, participants):
+        return self._run("add_or_update_participants", room_id, participants)
+
+
+class _FakeAsyncClient(_FakeClientBase):
+    """Async stand-in matching the azure.communication.*.aio clients"""
+
+    async def _run(self, operation, *args, **kwargs):
+        delay, error = self._backend.begin(operation)
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return getattr(self._backend, operation)(*args, **kwargs)
+
+    async def close(self):
+        pass
+
+
+class AsyncFakeIdentityClient(_FakeAsyncClient):
+    async def create_user(self):
+        return await self._run("create_user")
+
+    async def get_token(self, user, scopes):
+        return await self._run("get_token", user, scopes)
+
+    async def create_user_and_token(self, scopes):
+        return await self._run("create_user_and_token", scopes)
+
+
+class AsyncFakeRoomsClient(_FakeAsyncClient):
+    async def create_room(self, **kwargs):
+        return await self._run("create_room", **kwargs)
+
+    async def get_room(self, room_id):
+        return await self._run("get_room", room_id)
+
+    def list_participants(self, room_id):
+        """Async-iterable pager, like AsyncItemPaged"""
+        async def pager():
+            for p in await self._run("list_participants", room_id):
+                yield p
+        return pager()
+
+    async def add_or_update_participants(self, room_id, participants):
+        return await self._run("add_or_update_participants", room_id, participants)
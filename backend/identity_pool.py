@@ -0,0 +1,158 @@
+"""
+Warm pool of pre-created Azure Communication Services identities + tokens
+/token, /my-user-id and /api/azure/token take a ready user from the pool
+instead of paying create_user + get_token round trips on the request path.
+
+A background task refills the pool to the high watermark whenever it drops
+below the low watermark, with at most refill_concurrency creations in flight.
+Entries whose token would expire within min_token_ttl are discarded.
+
+Every pooled entry is a real Azure identity: a worker started with
+TOKEN_POOL_SIZE=N creates N of them, whether or not any request uses them.
+The pool is therefore off unless TOKEN_POOL_SIZE is set (see main.py).
+"""
+
+import asyncio
+import time
+from collections import deque
+
+from acs_clients import communication_user_id, token_seconds_left
+
+
+class PoolEntry:
+    __slots__ = ("user", "user_id", "token")
+
+    def __init__(self, user, token_response):
+        self.user = user
+        self.user_id = communication_user_id(user)
+        self.token = token_response
+
+    def seconds_left(self):
+        return token_seconds_left(self.token)
+
+
+class IdentityPool:
+    def __init__(self, acs, scopes, low_watermark=3, high_watermark=10,
+                 refill_concurrency=2, min_token_ttl=3600, sweep_interval=60):
+        self.acs = acs
+        self.scopes = scopes
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.refill_concurrency = refill_concurrency
+        self.min_token_ttl = min_token_ttl
+        self.sweep_interval = sweep_interval
+
+        self._entries = deque()
+        self._refill_needed = asyncio.Event()
+        self._task = None
+
+        self.stats = {"hits": 0, "misses": 0, "created": 0, "discarded": 0, "refill_errors": 0}
+        # Time-to-token (ms) for requests served from the pool vs. created inline
+        self._latency = {"pool": deque(maxlen=500), "direct": deque(maxlen=500)}
+
+    # ---------------- LIFECYCLE ----------------
+    def start(self):
+        self._refill_needed.set()
+        self._task = asyncio.create_task(self._refill_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ---------------- REQUEST PATH ----------------
+    def take(self):
+        """Pop a usable entry in O(1), or None if the pool is empty"""
+        entry = None
+        while self._entries:
+            candidate = self._entries.popleft()
+            if candidate.seconds_left() > self.min_token_ttl:
+                entry = candidate
+                break
+            self.stats["discarded"] += 1
+
+        if len(self._entries) < self.low_watermark:
+            self._refill_needed.set()
+        return entry
+
+    async def acquire(self):
+        """A fresh (user, user_id, token) entry, from the pool when possible"""
+        started = time.perf_counter()
+        entry = self.take()
+        if entry is not None:
+            self.stats["hits"] += 1
+            self._latency["pool"].append((time.perf_counter() - started) * 1000)
+            return entry
+
+        self.stats["misses"] += 1
+        entry = await self._create()
+        self._latency["direct"].append((time.perf_counter() - started) * 1000)
+        return entry
+
+    # ---------------- REFILL ----------------
+    async def _create(self):
+        user, token_response = await self.acs.create_user_and_token(self.scopes)
+        self.stats["created"] += 1
+        return PoolEntry(user, token_response)
+
+    async def _refill_once(self, semaphore):
+        async with semaphore:
+            try:
+                self._entries.append(await self._create())
+            except Exception as e:
+                self.stats["refill_errors"] += 1
+                print(f"⚠️ Identity pool refill failed: {e}")
+
+    async def _refill_loop(self):
+        semaphore = asyncio.Semaphore(self.refill_concurrency)
+        while True:
+            try:
+                await asyncio.wait_for(self._refill_needed.wait(), timeout=self.sweep_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._refill_needed.clear()
+
+            self._sweep()
+            missing = self.high_watermark - len(self._entries)
+            if missing <= 0:
+                continue
+            errors_before = self.stats["refill_errors"]
+            await asyncio.gather(*(self._refill_once(semaphore) for _ in range(missing)))
+            if self.stats["refill_errors"] > errors_before:
+                # Back off a little instead of hammering Azure while it is failing
+                await asyncio.sleep(5)
+
+    def _sweep(self):
+        """Drop entries whose token is too close to expiry"""
+        kept = deque(entry for entry in self._entries if entry.seconds_left() > self.min_token_ttl)
+        self.stats["discarded"] += len(self._entries) - len(kept)
+        self._entries = kept
+
+    # ---------------- REPORTING ----------------
+    def report(self):
+        def summary(samples):
+            if not samples:
+                return None
+            ordered = sorted(samples)
+            return {
+                "count": len(ordered),
+                "p50_ms": round(ordered[len(ordered) // 2], 3),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+            }
+
+        return {
+            "size": len(self._entries),
+            "lowWatermark": self.low_watermark,
+            "highWatermark": self.high_watermark,
+            "refillConcurrency": self.refill_concurrency,
+            "minTokenTtlSeconds": self.min_token_ttl,
+            **self.stats,
+            "timeToToken": {
+                "pool": summary(self._latency["pool"]),
+                "direct": summary(self._latency["direct"]),
+            },
+        }
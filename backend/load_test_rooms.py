@@ -0,0 +1,138 @@
+"""
+Offline load scenario for the room and token routes
+Runs main.app in-process against the fake ACS backend (fake_acs.py) and drives
+concurrent room creation + joins while a relay poller and an event-loop
+heartbeat measure how much the Azure calls block everything else.
+
+Usage (needs httpx: pip install -r requirements-dev.txt):
+    python load_test_rooms.py --rooms 20 --joiners 4
+    ACS_FAKE_MODE=executor ACS_FAKE_LATENCY=lognormal:80,0.6 python load_test_rooms.py
+    ACS_FAKE_ERROR_RATE=0.05 python load_test_rooms.py
+
+Other requests are served during add-participant calls when the relay poll
+p95 and the max loop lag stay far below the fake ACS latency.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("ACS_BACKEND", "fake")
+
+import httpx
+
+import main
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def failed(response):
+    """Routes report failures as {"error": ...} (or an [body, status] pair)"""
+    if response.status_code >= 400:
+        return True
+    body = response.json()
+    if isinstance(body, list):
+        return bool(body) and isinstance(body[0], dict) and "error" in body[0]
+    return isinstance(body, dict) and "error" in body
+
+
+class Recorder:
+    def __init__(self):
+        self.latency = {}  # { route: [ms, ...] }
+        self.errors = {}  # { route: count }
+
+    async def call(self, client, route, method, url, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latency.setdefault(route, []).append((time.perf_counter() - started) * 1000)
+        if failed(response):
+            self.errors[route] = self.errors.get(route, 0) + 1
+            return None
+        return response.json()
+
+
+async def heartbeat(stop, lags, interval=0.01):
+    """How late the event loop wakes up a 10 ms sleeper"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def relay_poller(client, stop, latencies):
+    """Stands in for a deaf participant polling captions throughout the run"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/transcription/LOADTEST?since=0")
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.02)
+
+
+async def room_session(client, recorder, room_index, joiners):
+    room_id = f"LOAD{room_index:04d}"
+    created = await recorder.call(client, "POST /room", "POST", "/room", json={"roomId": room_id})
+    if created is None:
+        return
+
+    async def join():
+        token = await recorder.call(client, "POST /api/azure/token", "POST", "/api/azure/token", json={})
+        if token is None:
+            return
+        await recorder.call(
+            client, "POST /room/{id}/add-participant", "POST", f"/room/{room_id}/add-participant",
+            json={"communicationUserId": token["userId"]},
+        )
+        await recorder.call(client, "GET /room/{id}", "GET", f"/room/{room_id}")
+
+    await asyncio.gather(*(join() for _ in range(joiners)))
+
+
+async def run(rooms, joiners):
+    for handler in main.app.router.on_startup:
+        await handler()
+
+    recorder = Recorder()
+    stop = asyncio.Event()
+    lags, poll_latencies = [], []
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        background = [
+            asyncio.create_task(heartbeat(stop, lags)),
+            asyncio.create_task(relay_poller(client, stop, poll_latencies)),
+        ]
+        started = time.perf_counter()
+        await asyncio.gather(*(room_session(client, recorder, i, joiners) for i in range(rooms)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*background)
+
+    fake_report = main.acs.fake.report() if main.acs and main.acs.fake else {}
+    for handler in main.app.router.on_shutdown:
+        await handler()
+
+    total = sum(len(v) for v in recorder.latency.values())
+    print(f"\n📈 {rooms} room(s) × {joiners} joiner(s): {total} requests in {elapsed:.2f}s "
+          f"({total / elapsed:.1f} req/s), ACS mode: {os.getenv('ACS_FAKE_MODE', 'async')}")
+    for route, samples in recorder.latency.items():
+        print(f"   {route:<34} n={len(samples):<5} p50={percentile(samples, 50):8.1f} ms "
+              f"p95={percentile(samples, 95):8.1f} ms errors={recorder.errors.get(route, 0)}")
+    print(f"   relay poll during load           n={len(poll_latencies):<5} "
+          f"p50={percentile(poll_latencies, 50) or 0:8.1f} ms p95={percentile(poll_latencies, 95) or 0:8.1f} ms")
+    print(f"   event loop lag                   max={max(lags, default=0):8.1f} ms "
+          f"p95={percentile(lags, 95) or 0:8.1f} ms")
+    print(f"   fake ACS: {fake_report}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline load test for room/token routes")
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--joiners", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args.rooms, args.joiners))
@@ -3,21 +3,35 @@ FastAPI Backend for ASL Recognition
 Uses the existing trained models from asl_project
 """
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 import numpy as np
 import tensorflow as tf
 import os
+import sys
 from pathlib import Path
 from datetime import datetime, timedelta
+import threading
+import bisect
+import asyncio
+import time
+from collections import deque, Counter, OrderedDict
+
+from acs_clients import AcsClients, communication_user_id as extract_user_id
+from identity_pool import IdentityPool, PoolEntry
+from token_cache import TokenCache
+from room_cache import RoomParticipantCache
+from relay_log import RelayLog, recover_state, CHANNEL_RECORDS, RECORD_ROOM
 
 # Azure Communication Services - optional import
 try:
-    from azure.communication.identity import CommunicationIdentityClient
+    # Only checks the SDKs are installed; the clients themselves are created in acs_clients.py
+    import azure.communication.identity  # noqa: F401
     try:
-        from azure.communication.rooms import RoomsClient
+        import azure.communication.rooms  # noqa: F401
         ROOMS_AVAILABLE = True
     except ImportError:
         ROOMS_AVAILABLE = False
@@ -53,11 +67,28 @@ app.add_middleware(
 alphabet_model = None
 word_model = None
 
+# Model bundles (model + labels + input spec, see asl_project/model_bundle.py)
+sys.path.append(str(ASL_PROJECT_DIR))
+try:
+    from model_bundle import load_bundle, ALPHABET_BUNDLE, WORD_BUNDLE
+except ImportError:
+    load_bundle = None
+    ALPHABET_BUNDLE = ASL_PROJECT_DIR / "asl_alphabet_model.bundle"
+    WORD_BUNDLE = ASL_PROJECT_DIR / "asl_dynamic_word_lstm.bundle"
+# Serve another bundle (e.g. a distilled word model) without replacing the trained one.
+# Unlike the default paths, an explicitly set path must exist (checked on startup)
+BUNDLE_PATH_ENV = {"alphabet": "ALPHABET_BUNDLE_PATH", "word": "WORD_BUNDLE_PATH"}
+ALPHABET_BUNDLE = Path(os.getenv(BUNDLE_PATH_ENV["alphabet"]) or ALPHABET_BUNDLE)
+WORD_BUNDLE = Path(os.getenv(BUNDLE_PATH_ENV["word"]) or WORD_BUNDLE)
+model_versions = {"alphabet": None, "word": None}
+
+# Legacy artifacts, used when no bundle has been trained yet
 ALPHABET_MODEL_PATH = ASL_PROJECT_DIR / "asl_alphabet_model.h5"
 WORD_MODEL_PATH = ASL_PROJECT_DIR / "asl_dynamic_word_lstm.h5"
 LABELS_PATH = ASL_PROJECT_DIR / "labels.txt"
+WORD_SEQUENCE_LENGTH = 30
 
-# Load word labels
+# Load word labels (replaced by the bundle's labels when a bundle is loaded)
 WORD_LABELS = []
 if LABELS_PATH.exists():
     with open(LABELS_PATH, "r") as f:
@@ -72,32 +103,80 @@ ALPHABET_LABELS = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
 class PredictRequest(BaseModel):
     mode: str
     landmarks: list
+    # Optional room context: when roomId is set the smoothed label is published
+    # straight to the room's gesture relay (no second POST /gesture round trip)
+    roomId: Optional[str] = None
+    participantName: Optional[str] = None
+    participantType: Optional[str] = "deaf"
 
 class PredictResponse(BaseModel):
     prediction: int
     label: str
+    published: Optional[bool] = None  # Only set when roomId was given
+    messageId: Optional[int] = None  # Gesture relay message ID when published
+
+
+def _load_bundle(kind, bundle_path):
+    """Load a model bundle -> ModelBundle, or None if there is none (errors on a bad bundle)"""
+    if load_bundle is None or not Path(bundle_path).exists():
+        return None
+    print(f"📦 Loading {kind} bundle from: {bundle_path}")
+    bundle = load_bundle(bundle_path)
+    model_versions[kind] = bundle.version
+    print(f"✅ {kind.capitalize()} model loaded (version {bundle.version}, {len(bundle.labels)} labels)")
+    return bundle
+
+
+def _check_bundle_overrides():
+    """Fail if ALPHABET_BUNDLE_PATH / WORD_BUNDLE_PATH is set but cannot be served (no silent .h5 fallback)"""
+    for kind, bundle_path in (("alphabet", ALPHABET_BUNDLE), ("word", WORD_BUNDLE)):
+        env_name = BUNDLE_PATH_ENV[kind]
+        if not os.getenv(env_name):
+            continue
+        if not bundle_path.exists():
+            raise FileNotFoundError(
+                f"{env_name}={bundle_path} does not exist (relative paths resolve against {Path.cwd()})"
+            )
+        if load_bundle is None:
+            raise RuntimeError(f"{env_name} is set but asl_project/model_bundle.py could not be imported")
 
 
 def load_models():
-    """Load TensorFlow models"""
-    global alphabet_model, word_model
+    """Load TensorFlow models (bundles first, legacy .h5 + labels otherwise)"""
+    global alphabet_model, word_model, ALPHABET_LABELS, WORD_LABELS, WORD_SEQUENCE_LENGTH
+    
+    _check_bundle_overrides()
     
     try:
-        print(f"📦 Loading alphabet model from: {ALPHABET_MODEL_PATH}")
-        if ALPHABET_MODEL_PATH.exists():
-            alphabet_model = tf.keras.models.load_model(str(ALPHABET_MODEL_PATH))
-            print("✅ Alphabet model loaded")
+        bundle = _load_bundle("alphabet", ALPHABET_BUNDLE)
+        if bundle is not None:
+            alphabet_model = bundle.model
+            ALPHABET_LABELS = bundle.labels
         else:
-            print(f"❌ Alphabet model not found: {ALPHABET_MODEL_PATH}")
-        
-        print(f"📦 Loading word model from: {WORD_MODEL_PATH}")
-        if WORD_MODEL_PATH.exists():
-            word_model = tf.keras.models.load_model(str(WORD_MODEL_PATH))
-            print("✅ Word model loaded")
+            print(f"📦 Loading alphabet model from: {ALPHABET_MODEL_PATH}")
+            if ALPHABET_MODEL_PATH.exists():
+                alphabet_model = tf.keras.models.load_model(str(ALPHABET_MODEL_PATH))
+                print("✅ Alphabet model loaded")
+            else:
+                print(f"❌ Alphabet model not found: {ALPHABET_MODEL_PATH}")
+    except Exception as e:
+        print(f"❌ Error loading alphabet model: {e}")
+    
+    try:
+        bundle = _load_bundle("word", WORD_BUNDLE)
+        if bundle is not None:
+            word_model = bundle.model
+            WORD_LABELS = bundle.labels
+            WORD_SEQUENCE_LENGTH = bundle.sequence_length
         else:
-            print(f"❌ Word model not found: {WORD_MODEL_PATH}")
+            print(f"📦 Loading word model from: {WORD_MODEL_PATH}")
+            if WORD_MODEL_PATH.exists():
+                word_model = tf.keras.models.load_model(str(WORD_MODEL_PATH))
+                print("✅ Word model loaded")
+            else:
+                print(f"❌ Word model not found: {WORD_MODEL_PATH}")
     except Exception as e:
-        print(f"❌ Error loading models: {e}")
+        print(f"❌ Error loading word model: {e}")
 
 
 @app.on_event("startup")
@@ -113,15 +192,114 @@ AZURE_COMMUNICATION_CONNECTION_STRING = os.getenv(
     ""  # Set via environment variable for security
 )
 
-identity_client = None
-if AZURE_AVAILABLE:
+# Async ACS clients (see acs_clients.py), opened on startup; None when unavailable
+acs = None
+
+# Warm pool of pre-created users + tokens (see identity_pool.py); off by default.
+# Each worker that starts with TOKEN_POOL_SIZE=N creates N Azure identities up front,
+# and any still unused at shutdown are never reclaimed, so opt in per deployment.
+TOKEN_SCOPES = ["voip", "chat"]
+TOKEN_POOL_SIZE = int(os.getenv("TOKEN_POOL_SIZE", "0"))
+TOKEN_POOL_LOW_WATERMARK = int(os.getenv("TOKEN_POOL_LOW_WATERMARK", "3"))
+TOKEN_POOL_REFILL_CONCURRENCY = int(os.getenv("TOKEN_POOL_REFILL_CONCURRENCY", "2"))
+TOKEN_POOL_MIN_TTL_SECONDS = int(os.getenv("TOKEN_POOL_MIN_TTL_SECONDS", "3600"))
+identity_pool = None
+
+# Tokens for reused user IDs (see token_cache.py)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1000"))
+TOKEN_CACHE_REFRESH_AHEAD_SECONDS = int(os.getenv("TOKEN_CACHE_REFRESH_AHEAD_SECONDS", "600"))
+token_cache = None
+
+
+@app.on_event("startup")
+async def open_acs_clients():
+    """Create the Azure Communication Services clients and their shared HTTP transport"""
+    global acs
+    
+    if not AZURE_AVAILABLE:
+        print("⚠️ Azure Communication Services SDK not available")
+        return
+    
     try:
-        identity_client = CommunicationIdentityClient.from_connection_string(AZURE_COMMUNICATION_CONNECTION_STRING)
-        print("✅ Azure Communication Services client initialized")
+        clients = AcsClients(AZURE_COMMUNICATION_CONNECTION_STRING)
+        await clients.open()
+        acs = clients
     except Exception as e:
         print(f"⚠️ Warning: Azure Communication Services not configured: {e}")
-else:
-    print("⚠️ Azure Communication Services SDK not available")
+        return
+    
+    global token_cache
+    token_cache = TokenCache(
+        acs,
+        scopes=TOKEN_SCOPES,
+        max_size=TOKEN_CACHE_SIZE,
+        refresh_ahead=TOKEN_CACHE_REFRESH_AHEAD_SECONDS,
+    )
+    
+    global identity_pool
+    if TOKEN_POOL_SIZE > 0:
+        identity_pool = IdentityPool(
+            acs,
+            scopes=TOKEN_SCOPES,
+            low_watermark=min(TOKEN_POOL_LOW_WATERMARK, TOKEN_POOL_SIZE),
+            high_watermark=TOKEN_POOL_SIZE,
+            refill_concurrency=TOKEN_POOL_REFILL_CONCURRENCY,
+            min_token_ttl=TOKEN_POOL_MIN_TTL_SECONDS,
+        )
+        identity_pool.start()
+        print(f"✅ Identity pool warming up ({TOKEN_POOL_SIZE} users)")
+
+
+@app.on_event("shutdown")
+async def close_acs_clients():
+    if identity_pool is not None:
+        await identity_pool.close()
+    if acs is not None:
+        await acs.close()
+
+
+async def _new_user_with_token():
+    """A new communication user and its token, from the warm pool when enabled"""
+    if identity_pool is not None:
+        entry = await identity_pool.acquire()
+    else:
+        user, token_response = await acs.create_user_and_token(TOKEN_SCOPES)
+        entry = PoolEntry(user, token_response)
+    # The client will come back with this userId when it reconnects
+    token_cache.put(entry.user_id, entry.token)
+    return entry
+
+
+async def _existing_user_token(user_id):
+    """
+    (user identifier, token) for a reused user ID, served from the token cache
+    Raises if Azure does not know the user
+    """
+    from azure.communication.identity import CommunicationUserIdentifier
+    user_identifier = CommunicationUserIdentifier(user_id)
+    return user_identifier, await token_cache.get_token(user_id, user_identifier)
+
+
+@app.get("/token/pool")
+async def get_token_pool_stats():
+    """Warm identity pool size, hit/miss counts and time-to-token percentiles"""
+    if identity_pool is None:
+        return {"enabled": False}
+    return {"enabled": True, **identity_pool.report()}
+
+
+@app.get("/token/cache")
+async def get_token_cache_stats():
+    """Token cache size, hit rate and how many get_token calls it actually made"""
+    if token_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **token_cache.report()}
+
+
+def _rooms_ready():
+    """True when the Rooms SDK is installed and the ACS clients include a rooms client"""
+    return ROOMS_AVAILABLE and acs is not None and acs.rooms
+
 
 @app.get("/")
 def root():
@@ -132,7 +310,8 @@ def root():
             "alphabet": alphabet_model is not None,
             "word": word_model is not None
         },
-        "azure_communication_configured": identity_client is not None
+        "model_versions": model_versions,
+        "azure_communication_configured": acs is not None
     }
 
 @app.post("/token")
@@ -150,53 +329,22 @@ async def get_token():
             "error": "Azure Communication Services SDK not installed. Please run: pip install azure-communication-identity"
         }, 500
     
-    if identity_client is None:
+    if acs is None:
         return {
             "error": "Azure Communication Services not configured. Please check your connection string."
         }, 500
     
     try:
-        # Create a new user identity
-        user = identity_client.create_user()
-        
-        # Get the communication user ID
-        # Azure SDK returns CommunicationUserIdentifier which has properties['id']
-        communication_user_id = None
-        try:
-            # The user object is a CommunicationUserIdentifier
-            # Access the properties dictionary
-            if hasattr(user, 'properties') and user.properties:
-                communication_user_id = user.properties.get('id') or user.properties.get('communication_user_id')
-            # Try direct attribute access
-            if not communication_user_id and hasattr(user, 'id'):
-                communication_user_id = user.id
-            # Try identifier attribute
-            if not communication_user_id and hasattr(user, 'identifier'):
-                communication_user_id = user.identifier
-            # Last resort: string representation
-            if not communication_user_id:
-                user_str = str(user)
-                # Check if it's already in correct format
-                if user_str.startswith('8:acs:'):
-                    communication_user_id = user_str
-                else:
-                    # Try to extract from string
-                    communication_user_id = user_str
-        except Exception as e:
-            print(f"Warning: Error extracting user ID: {e}")
-            communication_user_id = str(user)
+        # Take a pre-created user + token from the warm pool (or create one now)
+        entry = await _new_user_with_token()
+        communication_user_id = entry.user_id
+        token_response = entry.token
         
         if not communication_user_id:
             raise ValueError("Failed to extract communication user ID from created user")
         
         print(f"✅ Created user with ID: {communication_user_id}")
         
-        # Generate token with video and voip scopes
-        token_response = identity_client.get_token(
-            user,
-            scopes=["voip", "chat"]
-        )
-        
         return {
             "token": token_response.token,
             "expiresOn": token_response.expires_on.isoformat() if hasattr(token_response.expires_on, 'isoformat') else str(token_response.expires_on),
@@ -229,7 +377,7 @@ async def get_azure_token(request: Request):
             "error": "Azure Communication Services SDK not installed. Please run: pip install azure-communication-identity"
         }, 500
     
-    if identity_client is None:
+    if acs is None:
         return {
             "error": "Azure Communication Services not configured. Please check your connection string."
         }, 500
@@ -246,51 +394,25 @@ async def get_azure_token(request: Request):
         
         user = None
         communication_user_id = None
+        token_response = None
         
         # Try to reuse existing user if provided
         if requested_user_id:
+            # Cached token for a known user (this will fail if user doesn't exist)
             try:
-                from azure.communication.identity import CommunicationUserIdentifier
-                user_identifier = CommunicationUserIdentifier(requested_user_id)
-                # Try to get token for existing user (this will fail if user doesn't exist)
-                try:
-                    token_response = identity_client.get_token(
-                        user_identifier,
-                        scopes=["voip", "chat"]
-                    )
-                    # If we get here, user exists - use it
-                    user = user_identifier
-                    communication_user_id = requested_user_id
-                    print(f"✅ Reusing existing user: {communication_user_id}")
-                except Exception as e:
-                    # User doesn't exist, create new one
-                    print(f"ℹ️ Requested user doesn't exist, creating new: {e}")
-                    user = identity_client.create_user()
+                user, token_response = await _existing_user_token(requested_user_id)
+                communication_user_id = requested_user_id
+                print(f"✅ Reusing existing user: {communication_user_id}")
             except Exception as e:
-                print(f"⚠️ Error reusing user, creating new: {e}")
-                user = identity_client.create_user()
-        else:
-            # Create a new user identity
-            user = identity_client.create_user()
+                # User doesn't exist, create new one
+                print(f"ℹ️ Requested user doesn't exist, creating new: {e}")
         
-        # Get the communication user ID (if not already set from reuse)
-        if not communication_user_id:
-            try:
-                if hasattr(user, 'properties') and user.properties:
-                    communication_user_id = user.properties.get('id') or user.properties.get('communication_user_id')
-                if not communication_user_id and hasattr(user, 'id'):
-                    communication_user_id = user.id
-                if not communication_user_id and hasattr(user, 'identifier'):
-                    communication_user_id = user.identifier
-                if not communication_user_id:
-                    user_str = str(user)
-                    if user_str.startswith('8:acs:'):
-                        communication_user_id = user_str
-                    else:
-                        communication_user_id = user_str
-            except Exception as e:
-                print(f"Warning: Error extracting user ID: {e}")
-                communication_user_id = str(user)
+        if user is None:
+            # Create a new user identity (served from the warm pool when enabled)
+            entry = await _new_user_with_token()
+            user = entry.user
+            communication_user_id = entry.user_id
+            token_response = entry.token
         
         if not communication_user_id:
             raise ValueError("Failed to extract communication user ID from created user")
@@ -300,12 +422,6 @@ async def get_azure_token(request: Request):
         else:
             print(f"✅ Created new user with ID: {communication_user_id}")
         
-        # Generate token with video and voip scopes
-        token_response = identity_client.get_token(
-            user,
-            scopes=["voip", "chat"]
-        )
-        
         # Return simplified format for test route
         return {
             "token": token_response.token,
@@ -322,20 +438,164 @@ async def get_azure_token(request: Request):
 
 # Room management for group calls
 rooms_db = {}  # In-memory storage: {roomId: azureRoomId}
-rooms_client = None
 
-# Initialize Rooms Client if available
-if AZURE_AVAILABLE and ROOMS_AVAILABLE:
+
+# Participant lists per roomId, written through by create/add (see room_cache.py)
+ROOM_PARTICIPANTS_CACHE_TTL = float(os.getenv("ROOM_PARTICIPANTS_CACHE_TTL", "10"))
+room_participants_cache = RoomParticipantCache(ttl=ROOM_PARTICIPANTS_CACHE_TTL)
+
+
+@app.get("/rooms/cache")
+async def get_room_cache_stats():
+    """Participant cache hit rate and Azure calls saved"""
+    room_participants_cache.sweep()
+    return room_participants_cache.report()
+
+
+def _remember_room(room_id, azure_room_id):
+    """Store the roomId -> Azure room ID mapping (and persist it if the relay log is on)"""
+    rooms_db[room_id] = azure_room_id
+    if relay_log is not None:
+        relay_log.append_room(room_id, azure_room_id)
+
+
+# Single-flight room creation: concurrent creators of the same new roomId
+# (POST /room and/or GET /room) share one Azure room instead of racing
+room_creations = {}  # { roomId: Future -> { azureRoomId, communicationUserId } }
+room_creation_stats = {"created": 0, "coalesced": 0, "failed": 0}
+
+
+class RoomCreationCancelled(Exception):
+    """Set on a room creation whose creator was cancelled, so waiters retry instead of inheriting the cancellation"""
+
+
+async def _create_azure_room(room_id, requested_user_id=None):
+    """Create an Azure room whose first participant is requested_user_id (or a new user)"""
+    from azure.communication.rooms import RoomParticipant, ParticipantRole
+    
+    # CRITICAL: Use the SAME user ID that the frontend will use when joining
+    user = None
+    if requested_user_id:
+        # Try to reuse existing user (verified via the token cache)
+        try:
+            user, _ = await _existing_user_token(requested_user_id)
+            print(f"✅ Reusing existing user for room creation: {requested_user_id}")
+        except Exception as e:
+            print(f"⚠️ Requested user doesn't exist, creating new: {e}")
+    if user is None:
+        user = await acs.create_user()
+    communication_user_id = extract_user_id(user)
+    
+    # Create room with valid until time (24 hours from now)
+    valid_until = datetime.utcnow() + timedelta(hours=24)
+    participants = [
+        RoomParticipant(
+            communication_identifier=user,
+            role=ParticipantRole.PRESENTER
+        )
+    ]
+    room = await acs.create_room(
+        valid_from=datetime.utcnow(),
+        valid_until=valid_until,
+        participants=participants
+    )
+    
+    azure_room_id = room.id
+    _remember_room(room_id, azure_room_id)
+    room_participants_cache.set(room_id, [communication_user_id], valid_until)
+    
+    print(f"✅ Created Azure room: {azure_room_id} for room ID: {room_id}")
+    print(f"   Room participants: {[str(p.communication_identifier) for p in participants]}")
+    return {"azureRoomId": azure_room_id, "communicationUserId": communication_user_id}
+
+
+async def _create_room_once(room_id, requested_user_id=None):
+    """
+    Create the Azure room for room_id, or await the creation already in flight
+    Returns (room, created) where created is False for callers that joined another's creation
+    """
+    while room_id in room_creations:
+        room_creation_stats["coalesced"] += 1
+        print(f"ℹ️ Room {room_id} is already being created, waiting for it")
+        try:
+            return await asyncio.shield(room_creations[room_id]), False
+        except RoomCreationCancelled:
+            print(f"ℹ️ Creation of room {room_id} was abandoned, retrying it")
+    
+    future = asyncio.get_running_loop().create_future()
+    room_creations[room_id] = future
     try:
-        connection_string = os.getenv(
-            "AZURE_COMMUNICATION_CONNECTION_STRING",
-            ""  # Set via environment variable for security
+        room = await _create_azure_room(room_id, requested_user_id)
+        room_creation_stats["created"] += 1
+        future.set_result(room)
+        return room, True
+    except asyncio.CancelledError:
+        # Cancelling the shared future would raise CancelledError in every waiter,
+        # which skips the routes' "except Exception" handling
+        future.set_exception(RoomCreationCancelled(room_id))
+        future.exception()
+        raise
+    except Exception as e:
+        room_creation_stats["failed"] += 1
+        future.set_exception(e)
+        # Mark retrieved so a failure nobody else awaited does not log "never retrieved"
+        future.exception()
+        raise
+    finally:
+        del room_creations[room_id]
+
+
+def _already_participant_error(error):
+    """True for the "participant already exists" (409) errors add_or_update_participants may raise"""
+    error_str = str(error).lower()
+    return "already" in error_str or "exists" in error_str or "duplicate" in error_str or "409" in error_str
+
+
+async def _add_room_participants(room_id, azure_room_id, user_ids, roles=None, verify=True):
+    """
+    add_or_update_participants for user_ids, then write through and (unless verify=False) verify in the background
+    roles: optional { userId: ParticipantRole } (default PRESENTER)
+    A "participant already exists" error counts as success: the users are in the room either way
+    """
+    from azure.communication.identity import CommunicationUserIdentifier
+    from azure.communication.rooms import RoomParticipant, ParticipantRole
+    
+    roles = roles or {}
+    try:
+        await acs.add_or_update_participants(
+            room_id=azure_room_id,
+            participants=[
+                RoomParticipant(
+                    communication_identifier=CommunicationUserIdentifier(user_id),
+                    role=roles.get(user_id, ParticipantRole.PRESENTER)
+                )
+                for user_id in user_ids
+            ]
         )
-        rooms_client = RoomsClient.from_connection_string(connection_string)
-        print("✅ Azure Rooms Client initialized")
     except Exception as e:
-        print(f"⚠️ Failed to initialize Rooms Client: {e}")
-        ROOMS_AVAILABLE = False
+        if not _already_participant_error(e):
+            raise
+        print(f"ℹ️ {len(user_ids)} participant(s) already in room {azure_room_id}")
+    room_participants_cache.add(room_id, user_ids)
+    if verify:
+        _schedule_participant_verification(room_id, azure_room_id, user_ids)
+
+
+@app.get("/acs/status")
+async def get_acs_status():
+    """Azure circuit breaker state and duplicate room creations avoided"""
+    return {
+        "configured": acs is not None,
+        "mode": acs.mode if acs is not None else None,
+        "breaker": acs.breaker.report() if acs is not None else None,
+        "roomCreation": {
+            **room_creation_stats,
+            "inFlight": len(room_creations),
+            # Each coalesced caller would otherwise have created its own user + Azure room
+            "duplicatesAvoided": room_creation_stats["coalesced"],
+        },
+    }
+
 
 @app.post("/room")
 async def create_room(room_data: dict):
@@ -362,7 +622,7 @@ async def create_room(room_data: dict):
                 "install_command": "pip install azure-communication-rooms"
             }, 500
         
-        if not rooms_client:
+        if not _rooms_ready():
             return {
                 "error": "Azure Rooms Client not initialized",
                 "message": "Failed to initialize Azure Rooms Client. Check your connection string.",
@@ -370,97 +630,30 @@ async def create_room(room_data: dict):
             }, 500
         
         # Try to create Azure room if Rooms API is available
-        if ROOMS_AVAILABLE and rooms_client:
+        if _rooms_ready():
             try:
-                from datetime import datetime, timedelta
-                
-                # Create room with valid until time (24 hours from now)
-                valid_until = datetime.utcnow() + timedelta(hours=24)
-                
-                # CRITICAL: Use the SAME user ID that the frontend will use when joining
-                # If userId is provided, reuse that user; otherwise create new
-                user = None
-                communication_user_id = None
-                
-                if requested_user_id:
-                    # Try to reuse existing user
-                    try:
-                        from azure.communication.identity import CommunicationUserIdentifier
-                        user_identifier = CommunicationUserIdentifier(requested_user_id)
-                        # Verify user exists by trying to get a token
-                        try:
-                            identity_client.get_token(user_identifier, scopes=["voip", "chat"])
-                            user = user_identifier
-                            communication_user_id = requested_user_id
-                            print(f"✅ Reusing existing user for room creation: {communication_user_id}")
-                        except Exception as e:
-                            print(f"⚠️ Requested user doesn't exist, creating new: {e}")
-                            user = identity_client.create_user()
-                    except Exception as e:
-                        print(f"⚠️ Error reusing user, creating new: {e}")
-                        user = identity_client.create_user()
-                else:
-                    # Create a new user for this room
-                    user = identity_client.create_user()
-                
-                # Extract user ID if not already set
-                if not communication_user_id:
-                    try:
-                        if hasattr(user, 'properties') and isinstance(user.properties, dict):
-                            communication_user_id = user.properties.get('id')
-                        elif hasattr(user, 'id'):
-                            communication_user_id = user.id
-                        elif hasattr(user, 'identifier'):
-                            communication_user_id = user.identifier
-                        else:
-                            user_str = str(user)
-                            if user_str.startswith('8:acs:'):
-                                communication_user_id = user_str
-                            else:
-                                communication_user_id = user_str
-                    except Exception as e:
-                        print(f"Warning: Could not extract user ID: {e}")
-                        communication_user_id = str(user)
-                
-                # Create room with participant
-                from azure.communication.rooms import RoomParticipant, ParticipantRole
-                participants = [
-                    RoomParticipant(
-                        communication_identifier=user,
-                        role=ParticipantRole.PRESENTER
-                    )
-                ]
-                
-                room = rooms_client.create_room(
-                    valid_from=datetime.utcnow(),
-                    valid_until=valid_until,
-                    participants=participants
-                )
-                
-                azure_room_id = room.id
-                rooms_db[room_id] = azure_room_id
+                # Concurrent creators of the same roomId share one creation
+                room, created = await _create_room_once(room_id, requested_user_id)
+                azure_room_id = room["azureRoomId"]
+                communication_user_id = room["communicationUserId"]
                 
-                print(f"✅ Created Azure room: {azure_room_id} for room ID: {room_id}")
-                print(f"   Room participants: {[str(p.communication_identifier) for p in participants]}")
-                
-                # CRITICAL: Wait a moment and verify the room was created correctly
-                import time
-                time.sleep(1)
-                
-                try:
-                    # Verify room exists and has participants
-                    verify_room = rooms_client.get_room(azure_room_id)
-                    verify_participant_count = len(verify_room.participants) if hasattr(verify_room, 'participants') else 0
-                    print(f"✅ Verified: Room {azure_room_id} exists with {verify_participant_count} participant(s)")
-                except Exception as verify_err:
-                    print(f"⚠️ Could not verify room after creation: {verify_err}")
+                if created:
+                    # Verify the creator shows up in the room without holding up the response
+                    _schedule_participant_verification(room_id, azure_room_id, [communication_user_id])
+                elif requested_user_id != communication_user_id:
+                    # Someone else created the room first: join it with our own user (a new one
+                    # if none was given), never the creator's identity
+                    if not requested_user_id:
+                        requested_user_id = (await _new_user_with_token()).user_id
+                    await _add_room_participants(room_id, azure_room_id, [requested_user_id])
+                    communication_user_id = requested_user_id
                 
                 return {
                     "roomId": room_id,
                     "azureRoomId": azure_room_id,
                     "groupCallId": azure_room_id,  # For compatibility
                     "participants": [{"communicationUserId": communication_user_id}],
-                    "message": "Azure room created successfully"
+                    "message": "Azure room created successfully" if created else "Joined Azure room created by a concurrent request"
                 }
             except Exception as e:
                 print(f"❌ Error creating Azure room: {e}")
@@ -493,36 +686,19 @@ async def get_room(room_id: str):
             
             # Get room details including participants if Rooms API is available
             participants_list = []
-            if ROOMS_AVAILABLE and rooms_client:
-                try:
-                    # Try using list_participants first (more reliable)
+            if _rooms_ready():
+                participant_ids = room_participants_cache.get(room_id)
+                if participant_ids is None:
                     try:
-                        if hasattr(rooms_client, 'list_participants'):
-                            print(f"🔄 Using list_participants to get participants for room {azure_room_id}...")
-                            participants_iter = rooms_client.list_participants(azure_room_id)
-                            for p in participants_iter:
-                                try:
-                                    p_id = str(p.communication_identifier)
-                                    participants_list.append({"communicationUserId": p_id})
-                                except Exception as e:
-                                    print(f"   Error extracting participant ID: {e}")
-                            print(f"📊 Room {azure_room_id} has {len(participants_list)} participant(s) (via list_participants)")
-                        else:
-                            raise AttributeError("list_participants not available")
-                    except (AttributeError, Exception) as list_err:
-                        # Fall back to get_room
-                        print(f"   list_participants not available or failed, using get_room: {list_err}")
-                        room = rooms_client.get_room(azure_room_id)
-                        if hasattr(room, 'participants') and room.participants:
-                            participants_list = [
-                                {"communicationUserId": str(p.communication_identifier)}
-                                for p in room.participants
-                            ]
-                        print(f"📊 Room {azure_room_id} has {len(participants_list)} participant(s) (via get_room)")
-                except Exception as e:
-                    print(f"⚠️ Could not get room participants: {e}")
-                    import traceback
-                    traceback.print_exc()
+                        participant_ids = await _room_participant_ids(azure_room_id)
+                        room_participants_cache.set(room_id, participant_ids, await _room_valid_until(room_id, azure_room_id))
+                        print(f"📊 Room {azure_room_id} has {len(participant_ids)} participant(s)")
+                    except Exception as e:
+                        print(f"⚠️ Could not get room participants: {e}")
+                        import traceback
+                        traceback.print_exc()
+                        participant_ids = []
+                participants_list = [{"communicationUserId": p_id} for p_id in participant_ids]
             
             return {
                 "roomId": room_id,
@@ -533,57 +709,17 @@ async def get_room(room_id: str):
             }
         else:
             # Try to create room if it doesn't exist
-            if ROOMS_AVAILABLE and rooms_client:
+            if _rooms_ready():
                 try:
-                    from datetime import datetime, timedelta
-                    from azure.communication.rooms import RoomParticipant, ParticipantRole
-                    
-                    # Get or create user for this room
-                    user = identity_client.create_user()
-                    communication_user_id = None
-                    try:
-                        if hasattr(user, 'properties') and isinstance(user.properties, dict):
-                            communication_user_id = user.properties.get('id')
-                        elif hasattr(user, 'id'):
-                            communication_user_id = user.id
-                        elif hasattr(user, 'identifier'):
-                            communication_user_id = user.identifier
-                        else:
-                            user_str = str(user)
-                            if user_str.startswith('8:acs:'):
-                                communication_user_id = user_str
-                            else:
-                                communication_user_id = user_str
-                    except Exception as e:
-                        print(f"Warning: Could not extract user ID: {e}")
-                        communication_user_id = str(user)
-                    
-                    valid_until = datetime.utcnow() + timedelta(hours=24)
-                    participants = [
-                        RoomParticipant(
-                            communication_identifier=user,
-                            role=ParticipantRole.PRESENTER
-                        )
-                    ]
-                    
-                    room = rooms_client.create_room(
-                        valid_from=datetime.utcnow(),
-                        valid_until=valid_until,
-                        participants=participants
-                    )
-                    azure_room_id = room.id
-                    rooms_db[room_id] = azure_room_id
-                    
-                    print(f"✅ Created Azure room: {azure_room_id} for room ID: {room_id}")
-                    print(f"   Room participants: {[str(p.communication_identifier) for p in participants]}")
-                    
+                    # Concurrent creators of the same roomId share one creation
+                    room, created = await _create_room_once(room_id)
                     return {
                         "roomId": room_id,
-                        "groupCallId": azure_room_id,
-                        "azureRoomId": azure_room_id,
-                        "participants": [{"communicationUserId": communication_user_id}],
-                        "exists": False,
-                        "created": True
+                        "groupCallId": room["azureRoomId"],
+                        "azureRoomId": room["azureRoomId"],
+                        "participants": [{"communicationUserId": room["communicationUserId"]}],
+                        "exists": not created,
+                        "created": created
                     }
                 except Exception as e:
                     print(f"❌ Error creating Azure room: {e}")
@@ -604,11 +740,122 @@ async def get_room(room_id: str):
         traceback.print_exc()
         return {"error": str(e)}, 500
 
+# ---------------- PARTICIPANT VERIFICATION ----------------
+# Azure can take a moment to list a newly added participant, so membership is
+# checked by a background task with exponential backoff instead of sleeping
+# inside the request. Outcomes are queryable per room.
+VERIFY_INITIAL_DELAY = float(os.getenv("PARTICIPANT_VERIFY_INITIAL_DELAY", "0.5"))  # seconds
+VERIFY_MAX_ATTEMPTS = int(os.getenv("PARTICIPANT_VERIFY_MAX_ATTEMPTS", "6"))  # 0.5s ... 16s
+# A room's records are dropped once none of them has changed for this long
+VERIFY_RETENTION_SECONDS = float(os.getenv("PARTICIPANT_VERIFY_RETENTION_SECONDS", "3600"))
+
+participant_verification = {}  # { roomId: { communicationUserId: { status, attempts, updatedAt, error } } }
+verification_room_updated = {}  # { roomId: monotonic time of its last status change }
+verification_tasks = set()  # Strong references so running tasks are not garbage collected
+
+
+def _set_verification_status(room_id, user_id, status, attempts, error=None):
+    participant_verification.setdefault(room_id, {})[user_id] = {
+        "status": status,  # "pending" | "confirmed" | "missing" | "error"
+        "attempts": attempts,
+        "updatedAt": datetime.utcnow().isoformat() + "Z",
+        "error": error,
+    }
+    verification_room_updated[room_id] = time.monotonic()
+
+
+def _prune_verification_status():
+    """Forget rooms whose verification records have been idle for VERIFY_RETENTION_SECONDS"""
+    cutoff = time.monotonic() - VERIFY_RETENTION_SECONDS
+    for room_id in [r for r, updated in verification_room_updated.items() if updated < cutoff]:
+        del verification_room_updated[room_id]
+        participant_verification.pop(room_id, None)
+
+
+async def _room_participant_ids(azure_room_id):
+    """Participant IDs in an Azure room (list_participants, falling back to get_room)"""
+    try:
+        return [extract_user_id(p.communication_identifier) for p in await acs.list_participants(azure_room_id)]
+    except Exception as list_err:
+        print(f"   list_participants failed, using get_room: {list_err}")
+        room = await acs.get_room(azure_room_id)
+        return [extract_user_id(p.communication_identifier) for p in (getattr(room, "participants", None) or [])]
+
+
+async def _room_valid_until(room_id, azure_room_id):
+    """The Azure room's valid_until: from the cache if known, else one get_room call (None if unavailable)"""
+    valid_until = room_participants_cache.valid_until(room_id)
+    if valid_until is None:
+        try:
+            valid_until = getattr(await acs.get_room(azure_room_id), "valid_until", None)
+        except Exception as e:
+            print(f"⚠️ Could not get validity for room {azure_room_id}: {e}")
+    return valid_until
+
+
+async def _verify_participants(room_id, azure_room_id, user_ids):
+    """
+    Poll the room until every user in user_ids is listed, backing off exponentially between attempts
+    Each attempt is one listing shared by all of them (a bulk add does not poll once per user)
+    """
+    pending = list(user_ids)
+    delay = VERIFY_INITIAL_DELAY
+    last_error = None
+    for attempt in range(1, VERIFY_MAX_ATTEMPTS + 1):
+        await asyncio.sleep(delay)
+        try:
+            participant_ids = await _room_participant_ids(azure_room_id)
+            listed = set(participant_ids)
+            confirmed = [user_id for user_id in pending if user_id in listed]
+            if confirmed:
+                room_participants_cache.set(room_id, participant_ids, await _room_valid_until(room_id, azure_room_id))
+                for user_id in confirmed:
+                    _set_verification_status(room_id, user_id, "confirmed", attempt)
+                print(f"✅ Confirmed: {len(confirmed)} participant(s) in room {azure_room_id} (attempt {attempt})")
+            pending = [user_id for user_id in pending if user_id not in listed]
+            if not pending:
+                return
+            last_error = None
+            for user_id in pending:
+                _set_verification_status(room_id, user_id, "pending", attempt)
+        except Exception as e:
+            last_error = str(e)
+            for user_id in pending:
+                _set_verification_status(room_id, user_id, "pending", attempt, last_error)
+        delay *= 2
+    
+    status = "error" if last_error else "missing"
+    for user_id in pending:
+        _set_verification_status(room_id, user_id, status, VERIFY_MAX_ATTEMPTS, last_error)
+    print(f"⚠️ WARNING: {len(pending)} participant(s) NOT found in room {azure_room_id} after {VERIFY_MAX_ATTEMPTS} attempts: {pending}")
+
+
+def _schedule_participant_verification(room_id, azure_room_id, user_ids):
+    _prune_verification_status()
+    for user_id in user_ids:
+        _set_verification_status(room_id, user_id, "pending", 0)
+    task = asyncio.create_task(_verify_participants(room_id, azure_room_id, user_ids))
+    verification_tasks.add(task)
+    task.add_done_callback(verification_tasks.discard)
+
+
+@app.get("/room/{room_id}/participants/status")
+async def get_participant_verification_status(room_id: str):
+    """
+    Background membership verification results for a room
+    Returns { roomId, participants: { communicationUserId: { status, attempts, updatedAt, error } } }
+    """
+    return {
+        "roomId": room_id,
+        "participants": participant_verification.get(room_id, {}),
+    }
+
+
 @app.post("/room/{room_id}/add-participant")
 async def add_participant_to_room(room_id: str, participant_data: dict):
     """Add a participant to an existing Azure room"""
     try:
-        if not ROOMS_AVAILABLE or not rooms_client:
+        if not _rooms_ready():
             return {"error": "Azure Rooms API not available"}, 500
         
         if room_id not in rooms_db:
@@ -640,7 +887,7 @@ async def add_participant_to_room(room_id: str, participant_data: dict):
             # Call the API and catch any exceptions
             # CRITICAL: Use keyword arguments for room_id and participants
             try:
-                rooms_client.add_or_update_participants(
+                await acs.add_or_update_participants(
                     room_id=azure_room_id,
                     participants=[participant]
                 )
@@ -651,111 +898,20 @@ async def add_participant_to_room(room_id: str, participant_data: dict):
                 import traceback
                 traceback.print_exc()
                 # Check if it's a "participant already exists" error
-                error_str = str(api_error).lower()
-                if "already" in error_str or "exists" in error_str or "duplicate" in error_str or "409" in error_str:
+                if _already_participant_error(api_error):
                     print(f"ℹ️ Participant already exists (this is OK)")
                 else:
                     # Re-raise if it's a different error
                     raise
             
-            # CRITICAL: Wait longer for Azure to process the addition
-            import time
-            print(f"⏳ Waiting 3 seconds for Azure to process participant addition...")
-            time.sleep(3)  # Increased from 1 to 3 seconds
+            room_participants_cache.add(room_id, [communication_user_id])
+            
+            # Membership is verified in the background (see GET /room/{room_id}/participants/status)
+            _schedule_participant_verification(room_id, azure_room_id, [communication_user_id])
             
-            # CRITICAL: Try using get_participants method instead of get_room
-            # Azure Rooms API might require a separate call to get participants
-            try:
-                print(f"🔄 Verifying participant was added using get_participants...")
-                try:
-                    # Try to get participants using list_participants if available
-                    participants_list = rooms_client.list_participants(azure_room_id)
-                    participant_count = 0
-                    participant_ids = []
-                    
-                    # participants_list might be an iterator or list
-                    if hasattr(participants_list, '__iter__'):
-                        for p in participants_list:
-                            participant_count += 1
-                            try:
-                                p_id = str(p.communication_identifier)
-                                participant_ids.append(p_id)
-                            except Exception as e:
-                                print(f"   Error extracting participant ID: {e}")
-                                participant_ids.append("unknown")
-                    
-                    print(f"📊 Room has {participant_count} participant(s) (via list_participants)")
-                    if participant_ids:
-                        print(f"📋 Participant IDs in room: {participant_ids}")
-                        print(f"📋 Expected participant ID: {communication_user_id}")
-                        
-                        # Check if our participant is actually in the list
-                        is_present = communication_user_id in participant_ids or any(
-                            p_id == communication_user_id for p_id in participant_ids
-                        )
-                        if is_present:
-                            print(f"✅ Confirmed: Participant {communication_user_id} is in the room")
-                        else:
-                            print(f"⚠️ WARNING: Participant {communication_user_id} NOT found in room participants!")
-                            print(f"   This might be a timing issue - Azure may need more time to sync")
-                    else:
-                        print(f"⚠️ WARNING: No participants found in room!")
-                except AttributeError:
-                    # list_participants might not be available, fall back to get_room
-                    print(f"   list_participants not available, using get_room instead...")
-                    room = rooms_client.get_room(azure_room_id)
-                    print(f"   Room object: {room}")
-                    print(f"   Room has 'participants' attribute: {hasattr(room, 'participants')}")
-                    
-                    participant_count = 0
-                    if hasattr(room, 'participants'):
-                        if room.participants is not None:
-                            participant_count = len(room.participants)
-                            print(f"   Room.participants is not None, length: {participant_count}")
-                        else:
-                            print(f"   Room.participants is None")
-                    else:
-                        print(f"   Room does not have 'participants' attribute")
-                    
-                    print(f"📊 Room now has {participant_count} participant(s)")
-                    
-                    # Log all participant IDs for debugging
-                    if hasattr(room, 'participants') and room.participants:
-                        participant_ids = []
-                        for p in room.participants:
-                            try:
-                                p_id = str(p.communication_identifier)
-                                participant_ids.append(p_id)
-                            except Exception as e:
-                                print(f"   Error extracting participant ID: {e}")
-                                participant_ids.append("unknown")
-                        print(f"📋 Participant IDs in room: {participant_ids}")
-                        print(f"📋 Expected participant ID: {communication_user_id}")
-                        
-                        # Check if our participant is actually in the list
-                        is_present = any(
-                            str(p.communication_identifier) == communication_user_id 
-                            for p in room.participants
-                        )
-                        if is_present:
-                            print(f"✅ Confirmed: Participant {communication_user_id} is in the room")
-                        else:
-                            print(f"⚠️ WARNING: Participant {communication_user_id} NOT found in room participants!")
-                            print(f"   This might be a timing issue - Azure may need more time to sync")
-                    else:
-                        print(f"⚠️ WARNING: Room has no participants attribute or it's empty!")
-                        print(f"   This suggests the participant addition may have failed")
-            except Exception as verify_error:
-                print(f"⚠️ Could not verify participant count: {verify_error}")
-                import traceback
-                traceback.print_exc()
-                # Don't fail - participant might still be added even if verification fails
-                print(f"ℹ️ Continuing despite verification failure - participant may still be added")
-                
         except Exception as add_error:
             # Check if error is because participant already exists
-            error_str = str(add_error).lower()
-            if "already" in error_str or "exists" in error_str or "duplicate" in error_str or "409" in error_str:
+            if _already_participant_error(add_error):
                 print(f"ℹ️ Participant {communication_user_id} already in room {azure_room_id}")
                 return {
                     "roomId": room_id,
@@ -779,6 +935,96 @@ async def add_participant_to_room(room_id: str, participant_data: dict):
         traceback.print_exc()
         return {"error": str(e)}, 500
 
+# Azure limits how many participants one add_or_update_participants call may carry
+ROOM_PARTICIPANTS_CHUNK_SIZE = int(os.getenv("ROOM_PARTICIPANTS_CHUNK_SIZE", "100"))
+
+
+@app.post("/room/{room_id}/participants")
+async def add_participants_to_room(room_id: str, participant_data: dict):
+    """
+    Add many participants to an existing Azure room (e.g. a classroom)
+    Request body: { "participants": [ { "communicationUserId": "8:acs:...", "role": "presenter" | "attendee" | "consumer" } ] }
+    
+    Participants go to Azure in chunks of ROOM_PARTICIPANTS_CHUNK_SIZE (one
+    add_or_update_participants call per chunk; "already exists" counts as added).
+    Returns an outcome per participant: "added" (membership then verified in the
+    background by a single task for the whole request), "invalid" or "failed".
+    """
+    try:
+        if not _rooms_ready():
+            return {"error": "Azure Rooms API not available"}, 500
+        
+        if room_id not in rooms_db:
+            return {"error": "Room not found"}, 404
+        
+        requested = participant_data.get("participants")
+        if not isinstance(requested, list) or not requested:
+            return {"error": "participants must be a non-empty list"}, 400
+        
+        from azure.communication.rooms import ParticipantRole
+        
+        azure_room_id = rooms_db[room_id]
+        outcomes = {}  # { communicationUserId: { status, role, error } }, in request order
+        roles = {}
+        invalid = []
+        
+        for item in requested:
+            user_id = item.get("communicationUserId") if isinstance(item, dict) else None
+            if not isinstance(user_id, str) or not user_id:
+                invalid.append({"communicationUserId": user_id, "status": "invalid",
+                                "error": "communicationUserId must be a non-empty string"})
+                continue
+            role_name = str(item.get("role") or "presenter")
+            # Listing a user twice keeps the last entry, like add_or_update_participants itself,
+            # so an invalid later entry also withdraws an earlier valid one
+            try:
+                role = ParticipantRole[role_name.upper()]
+            except KeyError:
+                roles.pop(user_id, None)
+                outcomes[user_id] = {"status": "invalid", "role": role_name, "error": f"Unknown role: {role_name}"}
+                continue
+            roles[user_id] = role
+            outcomes[user_id] = {"status": "pending", "role": role_name.lower(), "error": None}
+        
+        user_ids = list(roles)
+        chunks = [user_ids[i:i + ROOM_PARTICIPANTS_CHUNK_SIZE] for i in range(0, len(user_ids), ROOM_PARTICIPANTS_CHUNK_SIZE)]
+        results = await asyncio.gather(
+            *(_add_room_participants(room_id, azure_room_id, chunk, roles, verify=False) for chunk in chunks),
+            return_exceptions=True
+        )
+        
+        added = [user_id for chunk, result in zip(chunks, results) if not isinstance(result, Exception) for user_id in chunk]
+        if added:
+            _schedule_participant_verification(room_id, azure_room_id, added)
+        
+        for chunk, result in zip(chunks, results):
+            for user_id in chunk:
+                if isinstance(result, Exception):
+                    outcomes[user_id].update(status="failed", error=str(result))
+                else:
+                    outcomes[user_id]["status"] = "added"
+            if isinstance(result, Exception):
+                print(f"❌ Error adding {len(chunk)} participant(s) to room {azure_room_id}: {result}")
+        
+        participants = [{"communicationUserId": user_id, **outcome} for user_id, outcome in outcomes.items()] + invalid
+        counts = Counter(p["status"] for p in participants)
+        print(f"👥 Bulk add to room {azure_room_id}: {dict(counts)} in {len(chunks)} call(s)")
+        
+        return {
+            "roomId": room_id,
+            "azureRoomId": azure_room_id,
+            "added": counts.get("added", 0),
+            "failed": counts.get("failed", 0),
+            "invalid": counts.get("invalid", 0),
+            "azureCalls": len(chunks),
+            "participants": participants,
+        }
+    except Exception as e:
+        print(f"Error adding participants: {e}")
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e)}, 500
+
 @app.get("/my-user-id")
 async def get_my_user_id():
     """
@@ -790,37 +1036,15 @@ async def get_my_user_id():
             "error": "Azure Communication Services SDK not installed"
         }, 500
     
-    if identity_client is None:
+    if acs is None:
         return {
             "error": "Azure Communication Services not configured"
         }, 500
     
     try:
-        # Create a new user identity
-        user = identity_client.create_user()
-        
-        # Get the communication user ID
-        communication_user_id = None
-        try:
-            # Try accessing the properties dictionary
-            if hasattr(user, 'properties') and isinstance(user.properties, dict):
-                communication_user_id = user.properties.get('id')
-            # Try accessing as attribute
-            elif hasattr(user, 'id'):
-                communication_user_id = user.id
-            # Try accessing as CommunicationUserIdentifier
-            elif hasattr(user, 'identifier'):
-                communication_user_id = user.identifier
-            # Last resort: convert to string
-            else:
-                user_str = str(user)
-                if user_str.startswith('8:acs:'):
-                    communication_user_id = user_str
-                else:
-                    communication_user_id = user_str
-        except Exception as e:
-            print(f"Warning: Could not extract user ID: {e}")
-            communication_user_id = str(user)
+        # Take a pre-created user from the warm pool (or create one now)
+        entry = await _new_user_with_token()
+        communication_user_id = entry.user_id
         
         if not communication_user_id:
             raise ValueError("Failed to extract communication user ID")
@@ -836,6 +1060,26 @@ async def get_my_user_id():
         }, 500
 
 
+def _prediction_response(request: PredictRequest, class_index: int, label: str):
+    """Build the predict response, publishing to the room's gesture relay if asked"""
+    if not request.roomId:
+        return PredictResponse(prediction=class_index, label=label)
+    
+    message_id = _publish_prediction(
+        request.roomId,
+        request.participantName or "Participant",
+        request.participantType or "deaf",
+        request.mode,
+        label,
+    )
+    return PredictResponse(
+        prediction=class_index,
+        label=label,
+        published=message_id is not None,
+        messageId=message_id,
+    )
+
+
 @app.post("/predict", response_model=PredictResponse)
 def predict(request: PredictRequest):
     """
@@ -872,10 +1116,7 @@ def predict(request: PredictRequest):
         class_index = int(np.argmax(preds))
         label = ALPHABET_LABELS[class_index]
         
-        return PredictResponse(
-            prediction=class_index,
-            label=label
-        )
+        return _prediction_response(request, class_index, label)
     
     # -------- WORD --------
     if mode == "word":
@@ -883,11 +1124,12 @@ def predict(request: PredictRequest):
             raise ValueError("Word model not loaded")
         
         # Expect 1890 values (30 frames × 63 landmarks)
-        if landmarks.shape != (1890,):
-            raise ValueError(f"Word expects 1890 values (30×63), got {landmarks.shape}")
+        expected_values = WORD_SEQUENCE_LENGTH * 63
+        if landmarks.shape != (expected_values,):
+            raise ValueError(f"Word expects {expected_values} values ({WORD_SEQUENCE_LENGTH}×63), got {landmarks.shape}")
         
         # Reshape to (1, 30, 63) for LSTM
-        x = landmarks.reshape(1, 30, 63)
+        x = landmarks.reshape(1, WORD_SEQUENCE_LENGTH, 63)
         preds = word_model.predict(x, verbose=0)
         class_index = int(np.argmax(preds))
         
@@ -897,10 +1139,7 @@ def predict(request: PredictRequest):
         else:
             label = f"Word_{class_index}"
         
-        return PredictResponse(
-            prediction=class_index,
-            label=label
-        )
+        return _prediction_response(request, class_index, label)
     
     raise ValueError("Invalid mode. Must be 'alphabet' or 'word'")
 
@@ -911,6 +1150,78 @@ def predict(request: PredictRequest):
 transcription_messages = {}  # { roomId: [ { id, type, text, timestamp }, ... ] }
 message_id_counter = 0
 
+# Keep only the last N messages per room to prevent memory overflow
+RELAY_HISTORY_LIMIT = 100
+
+# Guards the relay stores and their ID counters so a batch gets a contiguous ID range
+relay_lock = threading.Lock()
+
+# Append-only persistence for the relay (see RELAY_LOG_PATH below); None when disabled
+relay_log = None
+
+
+def _append_relay_messages(store, channel, room_id, first_id, entries):
+    """Append entries to a room's relay history, numbering them from first_id"""
+    room_messages = store.setdefault(room_id, [])
+    for offset, entry in enumerate(entries):
+        entry["id"] = first_id + offset
+        room_messages.append(entry)
+        if relay_log is not None:
+            relay_log.append_message(channel, room_id, entry)
+
+    if len(room_messages) > RELAY_HISTORY_LIMIT:
+        store[room_id] = room_messages[-RELAY_HISTORY_LIMIT:]
+
+
+# Fields every relay message carries; delta responses drop the ones that repeat
+RELAY_DELTA_FIELDS = ("type", "text", "timestamp", "participantType", "participantName")
+
+
+def _relay_delta_encode(messages):
+    """
+    Compact encoding for a list of relay messages: the first message is sent in full,
+    each later one only carries its id plus the fields that changed from the previous one
+    """
+    encoded = []
+    previous = None
+    for msg in messages:
+        if previous is None:
+            encoded.append(dict(msg))
+        else:
+            compact = {"id": msg["id"]}
+            for field in RELAY_DELTA_FIELDS:
+                if field in msg and msg[field] != previous.get(field):
+                    compact[field] = msg[field]
+            encoded.append(compact)
+        previous = msg
+    return encoded
+
+
+def _relay_poll_response(store, channel, room_id, since, request: Request, delta: bool):
+    """
+    Build the response for a relay poll
+    The ETag is the room's version (ID of its newest message), so a poll that
+    sends a matching If-None-Match gets a 304 without touching the message list
+    """
+    room_messages = store.get(room_id)
+    version = room_messages[-1]["id"] if room_messages else 0
+    etag = f'"{channel}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    messages = []
+    if room_messages and version > since:
+        # IDs are increasing within a room, so skip straight to the first new message
+        start = bisect.bisect_right(room_messages, since, key=lambda msg: msg["id"])
+        messages = room_messages[start:]
+        if delta:
+            messages = _relay_delta_encode(messages)
+    
+    return JSONResponse(content=messages, headers=headers)
+
+
 class TranscriptionMessage(BaseModel):
     type: str  # "partial" or "final"
     text: str
@@ -918,6 +1229,17 @@ class TranscriptionMessage(BaseModel):
     participantType: str  # "hearing" or "deaf"
     participantName: str  # Name of the participant
 
+
+def _transcription_entry(message: TranscriptionMessage):
+    return {
+        "type": message.type,
+        "text": message.text,
+        "timestamp": message.timestamp,
+        "participantType": message.participantType,
+        "participantName": message.participantName,
+    }
+
+
 @app.post("/transcription/{room_id}")
 async def send_transcription(room_id: str, message: TranscriptionMessage):
     """
@@ -925,49 +1247,51 @@ async def send_transcription(room_id: str, message: TranscriptionMessage):
     """
     global message_id_counter
     
-    # Initialize room if not exists
-    if room_id not in transcription_messages:
-        transcription_messages[room_id] = []
+    with relay_lock:
+        message_id_counter += 1
+        message_id = message_id_counter
+        _append_relay_messages(transcription_messages, "transcription", room_id, message_id, [_transcription_entry(message)])
     
-    message_id_counter += 1
+    print(f"📨 Transcription message for room {room_id}: {message.text[:50]}...")
     
-    # Store message
-    msg_data = {
-        "id": message_id_counter,
-        "type": message.type,
-        "text": message.text,
-        "timestamp": message.timestamp,
-        "participantType": message.participantType,
-        "participantName": message.participantName,
-    }
+    return {"status": "ok", "messageId": message_id}
+
+
+@app.post("/transcription/{room_id}/batch")
+async def send_transcription_batch(room_id: str, messages: List[TranscriptionMessage]):
+    """
+    Receive a batch of transcription messages from hearing participant
+    Messages get contiguous IDs in the order they were sent
+    Returns the assigned ID range (firstMessageId..lastMessageId)
+    """
+    global message_id_counter
     
-    transcription_messages[room_id].append(msg_data)
+    if not messages:
+        return {"status": "ok", "count": 0, "firstMessageId": None, "lastMessageId": None}
     
-    # Keep only last 100 messages per room to prevent memory overflow
-    if len(transcription_messages[room_id]) > 100:
-        transcription_messages[room_id] = transcription_messages[room_id][-100:]
+    entries = [_transcription_entry(message) for message in messages]
     
-    print(f"📨 Transcription message for room {room_id}: {message.text[:50]}...")
+    with relay_lock:
+        first_id = message_id_counter + 1
+        message_id_counter += len(entries)
+        last_id = message_id_counter
+        _append_relay_messages(transcription_messages, "transcription", room_id, first_id, entries)
+    
+    print(f"📨 Transcription batch for room {room_id}: {len(entries)} message(s), IDs {first_id}-{last_id}")
     
-    return {"status": "ok", "messageId": message_id_counter}
+    return {"status": "ok", "count": len(entries), "firstMessageId": first_id, "lastMessageId": last_id}
 
 
 @app.get("/transcription/{room_id}")
-async def get_transcriptions(room_id: str, since: int = 0):
+async def get_transcriptions(room_id: str, request: Request, since: int = 0, delta: bool = False):
     """
     Get transcription messages for a room (for deaf participant)
     Returns messages with ID greater than 'since'
-    """
-    if room_id not in transcription_messages:
-        return []
-    
-    # Filter messages after 'since' ID
-    messages = [
-        msg for msg in transcription_messages[room_id]
-        if msg["id"] > since
-    ]
     
-    return messages
+    Honors If-None-Match with a 304 when nothing changed in the room.
+    With delta=true, repeated fields are omitted after the first message.
+    """
+    return _relay_poll_response(transcription_messages, "transcription", room_id, since, request, delta)
 
 
 # ================ GESTURE PREDICTION RELAY ================
@@ -982,6 +1306,16 @@ class GestureMessage(BaseModel):
     participantType: str  # "deaf" or "hearing"
     participantName: str  # Name of the participant
 
+
+def _gesture_entry(message: GestureMessage):
+    return {
+        "text": message.text,
+        "timestamp": message.timestamp,
+        "participantType": message.participantType,
+        "participantName": message.participantName,
+    }
+
+
 @app.post("/gesture/{room_id}")
 async def send_gesture(room_id: str, message: GestureMessage):
     """
@@ -989,48 +1323,151 @@ async def send_gesture(room_id: str, message: GestureMessage):
     """
     global gesture_message_id_counter
     
-    # Initialize room if not exists
-    if room_id not in gesture_messages:
-        gesture_messages[room_id] = []
+    with relay_lock:
+        gesture_message_id_counter += 1
+        message_id = gesture_message_id_counter
+        _append_relay_messages(gesture_messages, "gesture", room_id, message_id, [_gesture_entry(message)])
     
-    gesture_message_id_counter += 1
+    print(f"🤲 Gesture prediction for room {room_id}: {message.text[:50]}...")
     
-    # Store message
-    msg_data = {
-        "id": gesture_message_id_counter,
-        "text": message.text,
-        "timestamp": message.timestamp,
-        "participantType": message.participantType,
-        "participantName": message.participantName,
-    }
+    return {"status": "ok", "messageId": message_id}
+
+
+@app.post("/gesture/{room_id}/batch")
+async def send_gesture_batch(room_id: str, messages: List[GestureMessage]):
+    """
+    Receive a batch of gesture predictions from deaf participant
+    Messages get contiguous IDs in the order they were sent
+    Returns the assigned ID range (firstMessageId..lastMessageId)
+    """
+    global gesture_message_id_counter
     
-    gesture_messages[room_id].append(msg_data)
+    if not messages:
+        return {"status": "ok", "count": 0, "firstMessageId": None, "lastMessageId": None}
     
-    # Keep only last 100 messages per room to prevent memory overflow
-    if len(gesture_messages[room_id]) > 100:
-        gesture_messages[room_id] = gesture_messages[room_id][-100:]
+    entries = [_gesture_entry(message) for message in messages]
     
-    print(f"🤲 Gesture prediction for room {room_id}: {message.text[:50]}...")
+    with relay_lock:
+        first_id = gesture_message_id_counter + 1
+        gesture_message_id_counter += len(entries)
+        last_id = gesture_message_id_counter
+        _append_relay_messages(gesture_messages, "gesture", room_id, first_id, entries)
     
-    return {"status": "ok", "messageId": gesture_message_id_counter}
+    print(f"🤲 Gesture batch for room {room_id}: {len(entries)} message(s), IDs {first_id}-{last_id}")
+    
+    return {"status": "ok", "count": len(entries), "firstMessageId": first_id, "lastMessageId": last_id}
+
+
+# Majority vote over the last N raw predictions per participant before publishing
+# (same idea as the Counter buffer in asl_project/realtime_*.py)
+PREDICTION_SMOOTHING_WINDOW = int(os.getenv("PREDICTION_SMOOTHING_WINDOW", "3"))
+# Least recently used participants' buffers are dropped beyond this many
+PREDICTION_BUFFERS_MAX = int(os.getenv("PREDICTION_BUFFERS_MAX", "1024"))
+prediction_buffers = OrderedDict()  # { (roomId, participantName, mode): deque([label, ...]) }, oldest first
+
+
+def _publish_prediction(room_id, participant_name, participant_type, mode, label):
+    """
+    Smooth a raw prediction and append it to the room's gesture relay
+    Skips publishing when the smoothed label matches this participant's last
+    gesture message in the room. Returns the new message ID, or None if skipped.
+    """
+    global gesture_message_id_counter
+    
+    with relay_lock:
+        key = (room_id, participant_name, mode)
+        buffer = prediction_buffers.get(key)
+        if buffer is None:
+            buffer = prediction_buffers[key] = deque(maxlen=PREDICTION_SMOOTHING_WINDOW)
+            while len(prediction_buffers) > PREDICTION_BUFFERS_MAX:
+                prediction_buffers.popitem(last=False)
+        else:
+            prediction_buffers.move_to_end(key)
+        buffer.append(label)
+        smoothed = Counter(buffer).most_common(1)[0][0]
+        
+        for msg in reversed(gesture_messages.get(room_id, [])):
+            if msg["participantName"] == participant_name:
+                if msg["text"] == smoothed:
+                    return None
+                break
+        
+        gesture_message_id_counter += 1
+        message_id = gesture_message_id_counter
+        _append_relay_messages(gesture_messages, "gesture", room_id, message_id, [{
+            "text": smoothed,
+            "timestamp": int(time.time() * 1000),
+            "participantType": participant_type,
+            "participantName": participant_name,
+        }])
+    
+    print(f"🤲 Published prediction for room {room_id}: {smoothed}")
+    return message_id
 
 
 @app.get("/gesture/{room_id}")
-async def get_gestures(room_id: str, since: int = 0):
+async def get_gestures(room_id: str, request: Request, since: int = 0, delta: bool = False):
     """
     Get gesture predictions for a room (for hearing participant)
     Returns messages with ID greater than 'since'
+    
+    Honors If-None-Match with a 304 when nothing changed in the room.
+    With delta=true, repeated fields are omitted after the first message.
     """
-    if room_id not in gesture_messages:
-        return []
+    return _relay_poll_response(gesture_messages, "gesture", room_id, since, request, delta)
+
+
+# ================ RELAY LOG (OPTIONAL PERSISTENCE) ================
+# Set RELAY_LOG_PATH to keep relay messages and room mappings across restarts
+RELAY_LOG_PATH = os.getenv("RELAY_LOG_PATH")
+
+
+def _relay_snapshot():
+    """Current relay state as log records, used when compacting the relay log"""
+    records = []
+    for channel, store in (("transcription", transcription_messages), ("gesture", gesture_messages)):
+        record_type = CHANNEL_RECORDS[channel]
+        for room_id, room_messages in store.items():
+            for msg in room_messages:
+                records.append((record_type, {"room": room_id, "msg": msg}))
+    for room_id, azure_room_id in dict(rooms_db).items():
+        records.append((RECORD_ROOM, {"room": room_id, "azureRoomId": azure_room_id}))
+    return records
+
+
+@app.on_event("startup")
+async def start_relay_log():
+    """Rebuild relay state from the relay log and start appending to it"""
+    global relay_log, message_id_counter, gesture_message_id_counter
     
-    # Filter messages after 'since' ID
-    messages = [
-        msg for msg in gesture_messages[room_id]
-        if msg["id"] > since
-    ]
+    if not RELAY_LOG_PATH:
+        return
     
-    return messages
+    try:
+        state = recover_state(RELAY_LOG_PATH, RELAY_HISTORY_LIMIT)
+        with relay_lock:
+            transcription_messages.update(state["transcription"])
+            gesture_messages.update(state["gesture"])
+            message_id_counter = max(message_id_counter, state["counters"]["transcription"])
+            gesture_message_id_counter = max(gesture_message_id_counter, state["counters"]["gesture"])
+        rooms_db.update(state["rooms"])
+        print(f"✅ Relay log recovered {state['records']} record(s) in {state['seconds'] * 1000:.1f} ms "
+              f"({len(state['rooms'])} room(s)) from {RELAY_LOG_PATH}")
+        
+        log = RelayLog(RELAY_LOG_PATH, snapshot_fn=_relay_snapshot, snapshot_lock=relay_lock)
+        log.start(valid_bytes=state["valid_bytes"], records=state["records"])
+        relay_log = log
+    except Exception as e:
+        print(f"❌ Relay log unavailable, continuing in memory only: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+@app.on_event("shutdown")
+async def stop_relay_log():
+    """Flush pending relay log records"""
+    if relay_log is not None:
+        relay_log.close()
 
 
 if __name__ == "__main__":
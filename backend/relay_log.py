@@ -0,0 +1,266 @@
+"""
+Append-only relay log for the FastAPI backend
+Persists transcription/gesture relay messages and the roomId -> Azure room ID
+mapping so a redeploy or worker recycle can rebuild its in-memory state
+
+Record layout (little-endian):
+    [payload length: uint32][crc32 of payload: uint32][record type: uint8][payload: JSON]
+
+Writes go through a background thread that batches records and fsyncs once per
+batch. Recovery memory-maps the file and stops at the first torn/corrupt record.
+Only one process may write a given log file (run a single gunicorn worker or
+give each worker its own RELAY_LOG_PATH).
+"""
+
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+RECORD_TRANSCRIPTION = 1
+RECORD_GESTURE = 2
+RECORD_ROOM = 3
+
+RECORD_HEADER = struct.Struct("<IIB")
+
+CHANNEL_RECORDS = {
+    "transcription": RECORD_TRANSCRIPTION,
+    "gesture": RECORD_GESTURE,
+}
+
+_STOP = object()
+
+
+def encode_record(record_type, payload):
+    """Encode one record as header + compact JSON payload"""
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return RECORD_HEADER.pack(len(body), zlib.crc32(body), record_type) + body
+
+
+def read_records(path):
+    """
+    Yield (record_type, payload) for every intact record in the log
+    Returns the byte offset just past the last good record as the generator's value
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return 0
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            offset = 0
+            while offset + RECORD_HEADER.size <= size:
+                length, crc, record_type = RECORD_HEADER.unpack_from(data, offset)
+                start = offset + RECORD_HEADER.size
+                end = start + length
+                if end > size:
+                    break  # Torn write at the tail
+                body = data[start:end]
+                if zlib.crc32(body) != crc:
+                    break  # Corrupt record - nothing after it can be trusted
+                yield record_type, json.loads(body)
+                offset = end
+            return offset
+
+
+def recover_state(path, history_limit):
+    """
+    Rebuild relay state from the log
+    Returns:
+    {
+      "transcription": { roomId: [msg, ...] },
+      "gesture": { roomId: [msg, ...] },
+      "rooms": { roomId: azureRoomId },
+      "counters": { "transcription": lastId, "gesture": lastId },
+      "records": number of records read,
+      "valid_bytes": offset of the end of the last good record,
+      "seconds": time spent recovering
+    }
+    """
+    started = time.perf_counter()
+    channels = {"transcription": {}, "gesture": {}}
+    counters = {"transcription": 0, "gesture": 0}
+    rooms = {}
+    record_names = {record_type: channel for channel, record_type in CHANNEL_RECORDS.items()}
+
+    records = read_records(path)
+    count = 0
+    valid_bytes = 0
+    while True:
+        try:
+            record_type, payload = next(records)
+        except StopIteration as done:
+            valid_bytes = done.value or 0
+            break
+        count += 1
+
+        if record_type == RECORD_ROOM:
+            rooms[payload["room"]] = payload["azureRoomId"]
+            continue
+
+        channel = record_names.get(record_type)
+        if channel is None:
+            continue
+
+        msg = payload["msg"]
+        room_messages = channels[channel].get(payload["room"])
+        if room_messages is None:
+            room_messages = channels[channel][payload["room"]] = deque(maxlen=history_limit)
+        elif msg["id"] <= room_messages[-1]["id"]:
+            continue  # IDs only grow within a room, so this one was already replayed
+        room_messages.append(msg)
+        counters[channel] = max(counters[channel], msg["id"])
+
+    return {
+        "transcription": {room: list(msgs) for room, msgs in channels["transcription"].items()},
+        "gesture": {room: list(msgs) for room, msgs in channels["gesture"].items()},
+        "rooms": rooms,
+        "counters": counters,
+        "records": count,
+        "valid_bytes": valid_bytes,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+class RelayLog:
+    """
+    Asynchronous append-only writer with batched fsync and periodic compaction
+
+    snapshot_fn returns the current state as (record_type, payload) pairs and is
+    called while holding snapshot_lock, the same lock the caller holds when it
+    appends relay messages, so nothing is lost or duplicated by compaction.
+    """
+
+    def __init__(self, path, snapshot_fn=None, snapshot_lock=None,
+                 fsync_interval=0.2, max_batch=1000, compact_threshold=20000):
+        self.path = str(path)
+        self.snapshot_fn = snapshot_fn
+        self.snapshot_lock = snapshot_lock or threading.Lock()
+        self.fsync_interval = fsync_interval
+        self.max_batch = max_batch
+        self.compact_threshold = compact_threshold
+
+        self._queue = queue.Queue()
+        self._file = None
+        self._thread = None
+        self._records_since_compaction = 0
+
+        self.stats = {"records_written": 0, "batches": 0, "compactions": 0}
+
+    # ---------------- LIFECYCLE ----------------
+    def start(self, valid_bytes=None, records=0):
+        """
+        Open the log for appending and start the writer thread
+        valid_bytes (from recover_state) truncates a torn tail left by a crash
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._file = open(self.path, "ab")
+        if valid_bytes is not None and self._file.tell() > valid_bytes:
+            print(f"⚠️ Relay log: truncating {self._file.tell() - valid_bytes} byte(s) of torn tail")
+            self._file.truncate(valid_bytes)
+            self._file.seek(valid_bytes)
+        self._records_since_compaction = records
+
+        self._thread = threading.Thread(target=self._run, name="relay-log-writer", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Flush everything queued so far and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+        self._file = None
+
+    # ---------------- APPENDS ----------------
+    def append_message(self, channel, room_id, msg):
+        self._queue.put(encode_record(CHANNEL_RECORDS[channel], {"room": room_id, "msg": msg}))
+
+    def append_room(self, room_id, azure_room_id):
+        self._queue.put(encode_record(RECORD_ROOM, {"room": room_id, "azureRoomId": azure_room_id}))
+
+    # ---------------- WRITER THREAD ----------------
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.fsync_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._write_batch(batch)
+
+            if self.snapshot_fn and self._records_since_compaction >= self.compact_threshold:
+                stopping = self._compact() or stopping
+
+    def _write_batch(self, batch):
+        try:
+            self._file.write(b"".join(batch))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._records_since_compaction += len(batch)
+            self.stats["records_written"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:
+            print(f"❌ Relay log write failed: {e}")
+
+    def _compact(self):
+        """
+        Rewrite the log from a snapshot of the in-memory state
+        Returns True if a stop request was drained while compacting
+        """
+        stop_requested = False
+        started = time.perf_counter()
+        tmp_path = self.path + ".compact"
+        try:
+            with self.snapshot_lock:
+                records = [encode_record(record_type, payload) for record_type, payload in self.snapshot_fn()]
+                # Anything still queued was appended before the snapshot and is already in it
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop_requested = True
+
+            with open(tmp_path, "wb") as f:
+                f.write(b"".join(records))
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, "ab")
+            self._records_since_compaction = len(records)
+            self.stats["compactions"] += 1
+            print(f"🗜️ Relay log compacted to {len(records)} record(s) in {time.perf_counter() - started:.3f}s")
+        except Exception as e:
+            print(f"❌ Relay log compaction failed: {e}")
+            if self._file is None or self._file.closed:
+                self._file = open(self.path, "ab")
+        return stop_requested
@@ -0,0 +1,90 @@
+"""
+Short-TTL cache of Azure room participant lists
+GET /room/{room_id} is polled while a caller waits for the other party; this
+cache answers those polls without a list_participants round trip.
+
+Entries are written through by create_room / add_participant_to_room (and the
+background membership verification), and evicted when either the TTL passes
+or the Azure room itself has expired (valid_until). Rooms this process did not
+create (recovered from the relay log) get their valid_until from Azure on the
+first fill, and it is kept across later refreshes.
+"""
+
+import time
+from datetime import datetime, timezone
+
+
+class RoomParticipantCache:
+    def __init__(self, ttl=10.0):
+        self.ttl = ttl
+        # { roomId: { "participants": [userId, ...], "fetchedAt": monotonic, "validUntil": datetime | None } }
+        self._entries = {}
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "room_expired": 0, "writes": 0}
+
+    @staticmethod
+    def _room_expired(valid_until):
+        if not isinstance(valid_until, datetime):
+            return False
+        if valid_until.tzinfo is None:
+            valid_until = valid_until.replace(tzinfo=timezone.utc)
+        return valid_until <= datetime.now(timezone.utc)
+
+    def get(self, room_id):
+        """Cached participant IDs, or None if missing/stale"""
+        entry = self._entries.get(room_id)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        if self._room_expired(entry["validUntil"]):
+            del self._entries[room_id]
+            self.stats["room_expired"] += 1
+            self.stats["misses"] += 1
+            return None
+        if time.monotonic() - entry["fetchedAt"] > self.ttl:
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return list(entry["participants"])
+
+    def set(self, room_id, participant_ids, valid_until=None):
+        """Store a fresh participant list (keeps a previously known valid_until)"""
+        previous = self._entries.get(room_id)
+        if valid_until is None and previous is not None:
+            valid_until = previous["validUntil"]
+        self._entries[room_id] = {
+            "participants": list(dict.fromkeys(participant_ids)),
+            "fetchedAt": time.monotonic(),
+            "validUntil": valid_until,
+        }
+        self.stats["writes"] += 1
+
+    def valid_until(self, room_id):
+        """Known Azure validity end for a cached room, or None"""
+        entry = self._entries.get(room_id)
+        return entry["validUntil"] if entry is not None else None
+
+    def add(self, room_id, participant_ids):
+        """Write-through for participants just added; no-op if the room is not cached"""
+        entry = self._entries.get(room_id)
+        if entry is None:
+            return
+        entry["participants"] = list(dict.fromkeys(entry["participants"] + list(participant_ids)))
+        self.stats["writes"] += 1
+
+    def sweep(self):
+        """Drop entries for rooms whose Azure validity has ended"""
+        for room_id in [r for r, e in self._entries.items() if self._room_expired(e["validUntil"])]:
+            del self._entries[room_id]
+            self.stats["room_expired"] += 1
+
+    def report(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "size": len(self._entries),
+            "ttlSeconds": self.ttl,
+            **self.stats,
+            "hitRate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+            # Every hit is a list_participants call that did not go to Azure
+            "azureCallsSaved": self.stats["hits"],
+        }
@@ -0,0 +1,265 @@
+"""
+Room routes must not block the event loop while Azure is slow
+Drives main.app in-process against the fake ACS backend (fake_acs.py): while
+add_participant_to_room waits on a slow add_or_update_participants call,
+relay polls issued at the same time have to complete well before it returns.
+
+Usage:
+    pip install -r requirements-dev.txt
+    python -m pytest -q test_async_acs_routes.py
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+os.environ["ACS_BACKEND"] = "fake"
+os.environ.setdefault("TOKEN_POOL_SIZE", "0")  # No background refills competing with the test
+
+import httpx
+
+import main
+
+ADD_LATENCY_MS = 600
+POLLS = 5
+
+
+async def _run_app(scenario):
+    """Start main.app, run scenario(client) against it, shut it down -> scenario's result"""
+    for handler in main.app.router.on_startup:
+        await handler()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await scenario(client)
+    finally:
+        for task in list(main.verification_tasks):
+            task.cancel()
+        for handler in main.app.router.on_shutdown:
+            await handler()
+
+
+async def _create_room_and_user(client, room_id):
+    created = (await client.post("/room", json={"roomId": room_id})).json()
+    assert "azureRoomId" in created, created
+    token = (await client.post("/api/azure/token", json={})).json()
+    assert "userId" in token, token
+    return token["userId"]
+
+
+async def _timed(request):
+    started = time.perf_counter()
+    response = await request
+    return response, time.perf_counter() - started
+
+
+@pytest.mark.parametrize("fake_mode", ["async", "executor"])
+def test_relay_polls_served_during_add_participant(monkeypatch, fake_mode):
+    monkeypatch.setenv("ACS_FAKE_MODE", fake_mode)
+    monkeypatch.setenv("ACS_FAKE_LATENCY", "fixed:0")
+    monkeypatch.setenv("ACS_FAKE_LATENCY_ADD_OR_UPDATE_PARTICIPANTS", f"fixed:{ADD_LATENCY_MS}")
+
+    async def scenario(client):
+        room_id = f"ASYNC{fake_mode.upper()}"
+        user_id = await _create_room_and_user(client, room_id)
+
+        add = asyncio.create_task(_timed(client.post(
+            f"/room/{room_id}/add-participant", json={"communicationUserId": user_id},
+        )))
+        await asyncio.sleep(0.05)  # Let the add call reach Azure
+        polls = await asyncio.gather(*(_timed(client.get(f"/transcription/{room_id}?since=0")) for _ in range(POLLS)))
+        assert not add.done(), "relay polls were only served once add-participant had finished"
+        return await add, polls
+
+    (add_response, add_seconds), polls = asyncio.run(_run_app(scenario))
+
+    assert add_response.json()["message"] == "Participant added successfully"
+    assert add_seconds >= ADD_LATENCY_MS / 1000
+    for response, seconds in polls:
+        assert response.status_code == 200
+        assert seconds < add_seconds / 4, f"relay poll took {seconds * 1000:.0f} ms during a {add_seconds * 1000:.0f} ms add"
+
+
+def test_background_verification_confirms_participant(monkeypatch):
+    monkeypatch.setenv("ACS_FAKE_LATENCY", "fixed:0")
+    monkeypatch.setattr(main, "VERIFY_INITIAL_DELAY", 0.01)
+
+    async def scenario(client):
+        room_id = "VERIFY"
+        user_id = await _create_room_and_user(client, room_id)
+        added = (await client.post(f"/room/{room_id}/add-participant", json={"communicationUserId": user_id})).json()
+        assert added["message"] == "Participant added successfully"
+        await asyncio.gather(*main.verification_tasks)
+        status = (await client.get(f"/room/{room_id}/participants/status")).json()
+        return user_id, status
+
+    user_id, status = asyncio.run(_run_app(scenario))
+
+    assert status["participants"][user_id]["status"] == "confirmed"
+
+
+def test_bulk_add_invalid_duplicate_is_not_sent(monkeypatch):
+    monkeypatch.setenv("ACS_FAKE_LATENCY", "fixed:0")
+
+    async def scenario(client):
+        room_id = "BULKDUP"
+        user_id = await _create_room_and_user(client, room_id)
+        result = (await client.post(f"/room/{room_id}/participants", json={"participants": [
+            {"communicationUserId": user_id, "role": "attendee"},
+            {"communicationUserId": user_id, "role": "owner"},
+        ]})).json()
+        return user_id, result, main.acs.fake.report()["calls"]
+
+    user_id, result, calls = asyncio.run(_run_app(scenario))
+
+    assert result["participants"] == [{
+        "communicationUserId": user_id, "status": "invalid", "role": "owner", "error": "Unknown role: owner",
+    }]
+    assert (result["added"], result["invalid"], result["azureCalls"]) == (0, 1, 0)
+    assert "add_or_update_participants" not in calls
+
+
+def test_bulk_add_verifies_with_one_shared_listing(monkeypatch):
+    monkeypatch.setenv("ACS_FAKE_LATENCY", "fixed:0")
+    monkeypatch.setattr(main, "VERIFY_INITIAL_DELAY", 0.01)
+    monkeypatch.setattr(main, "ROOM_PARTICIPANTS_CHUNK_SIZE", 10)
+
+    async def scenario(client):
+        room_id = "BULKVERIFY"
+        await _create_room_and_user(client, room_id)
+        await asyncio.gather(*main.verification_tasks)  # The creator's own check
+        user_ids = [(await client.post("/api/azure/token", json={})).json()["userId"] for _ in range(25)]
+        listings_before = main.acs.fake.calls.get("list_participants", 0)
+
+        result = (await client.post(f"/room/{room_id}/participants", json={
+            "participants": [{"communicationUserId": user_id} for user_id in user_ids],
+        })).json()
+        tasks = len(main.verification_tasks)
+        await asyncio.gather(*main.verification_tasks)
+        status = (await client.get(f"/room/{room_id}/participants/status")).json()["participants"]
+        return user_ids, result, tasks, main.acs.fake.calls["list_participants"] - listings_before, status
+
+    user_ids, result, tasks, listings, status = asyncio.run(_run_app(scenario))
+
+    assert (result["added"], result["azureCalls"]) == (25, 3)
+    assert tasks == 1
+    assert listings == 1
+    assert all(status[user_id]["status"] == "confirmed" for user_id in user_ids)
+
+
+def test_bulk_add_already_in_room_counts_as_added(monkeypatch):
+    monkeypatch.setenv("ACS_FAKE_LATENCY", "fixed:0")
+
+    async def scenario(client):
+        room_id = "BULKCONFLICT"
+        user_id = await _create_room_and_user(client, room_id)
+
+        async def conflict(**kwargs):
+            raise RuntimeError("(409) Conflict: participant already exists")
+
+        monkeypatch.setattr(main.acs, "add_or_update_participants", conflict)
+        return (await client.post(f"/room/{room_id}/participants", json={
+            "participants": [{"communicationUserId": user_id}],
+        })).json()
+
+    result = asyncio.run(_run_app(scenario))
+
+    assert (result["added"], result["failed"]) == (1, 0)
+
+
+def test_bulk_add_rejects_non_string_user_ids(monkeypatch):
+    monkeypatch.setenv("ACS_FAKE_LATENCY", "fixed:0")
+
+    async def scenario(client):
+        room_id = "BULKTYPES"
+        await _create_room_and_user(client, room_id)
+        return (await client.post(f"/room/{room_id}/participants", json={"participants": [
+            {"communicationUserId": ["8:acs:a"]},
+            {"communicationUserId": {"id": "8:acs:b"}},
+            {"communicationUserId": ""},
+            "8:acs:c",
+        ]})).json()
+
+    result = asyncio.run(_run_app(scenario))
+
+    assert (result["invalid"], result["added"], result["azureCalls"]) == (4, 0, 0)
+    assert all(p["status"] == "invalid" for p in result["participants"])
+
+
+def test_coalesced_create_without_user_gets_own_identity(monkeypatch):
+    monkeypatch.setenv("ACS_FAKE_LATENCY", "fixed:0")
+    monkeypatch.setenv("ACS_FAKE_LATENCY_CREATE_ROOM", "fixed:200")
+
+    async def scenario(client):
+        responses = await asyncio.gather(*(client.post("/room", json={"roomId": "COALESCE"}) for _ in range(2)))
+        return [response.json() for response in responses]
+
+    first, second = asyncio.run(_run_app(scenario))
+
+    assert first["azureRoomId"] == second["azureRoomId"]
+    assert first["participants"] != second["participants"]
+
+
+def test_cancelled_room_creator_does_not_cancel_waiters(monkeypatch):
+    monkeypatch.setenv("ACS_FAKE_LATENCY", "fixed:0")
+    monkeypatch.setenv("ACS_FAKE_LATENCY_CREATE_ROOM", "fixed:200")
+
+    async def scenario(client):
+        creator = asyncio.create_task(client.post("/room", json={"roomId": "CANCELLED"}))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.create_task(client.post("/room", json={"roomId": "CANCELLED"}))
+        await asyncio.sleep(0.05)
+        creator.cancel()
+        return (await waiter).json()
+
+    result = asyncio.run(_run_app(scenario))
+
+    assert "azureRoomId" in result, result
+    assert result["message"] == "Azure room created successfully"
+
+
+def test_idle_verification_records_are_pruned(monkeypatch):
+    monkeypatch.setenv("ACS_FAKE_LATENCY", "fixed:0")
+    monkeypatch.setattr(main, "VERIFY_INITIAL_DELAY", 0.01)
+
+    async def scenario(client):
+        await _create_room_and_user(client, "PRUNED")
+        await asyncio.gather(*main.verification_tasks)
+        monkeypatch.setattr(main, "VERIFY_RETENTION_SECONDS", 0)
+        await _create_room_and_user(client, "FRESH")
+        return (await client.get("/room/PRUNED/participants/status")).json()["participants"]
+
+    assert asyncio.run(_run_app(scenario)) == {}
+    assert "PRUNED" not in main.participant_verification
+
+
+def test_prediction_buffers_evict_least_recently_used(monkeypatch):
+    monkeypatch.setattr(main, "PREDICTION_BUFFERS_MAX", 2)
+    monkeypatch.setattr(main, "prediction_buffers", main.OrderedDict())
+
+    main._publish_prediction("LRU", "a", "deaf", "letters", "A")
+    main._publish_prediction("LRU", "b", "deaf", "letters", "B")
+    main._publish_prediction("LRU", "a", "deaf", "letters", "A")
+    main._publish_prediction("LRU", "c", "deaf", "letters", "C")
+
+    assert list(main.prediction_buffers) == [("LRU", "a", "letters"), ("LRU", "c", "letters")]
+
+
+def test_cache_fill_records_room_validity(monkeypatch):
+    monkeypatch.setenv("ACS_FAKE_LATENCY", "fixed:0")
+
+    async def scenario(client):
+        room_id = "RECOVERED"
+        await _create_room_and_user(client, room_id)
+        # As after a restart: the mapping is known (relay log) but nothing is cached
+        monkeypatch.setattr(main, "room_participants_cache", main.RoomParticipantCache())
+        room = (await client.get(f"/room/{room_id}")).json()
+        azure_room = await main.acs.get_room(room["azureRoomId"])
+        return azure_room.valid_until, main.room_participants_cache.valid_until(room_id)
+
+    expected, cached = asyncio.run(_run_app(scenario))
+
+    assert cached is not None
+    assert cached == expected
@@ -0,0 +1,85 @@
+"""
+Per-user access token cache for reused communication user IDs
+When a reconnecting client sends its existing userId, /api/azure/token and
+create_room answer from this cache instead of calling identity get_token again.
+
+- Bounded LRU (max_size users)
+- Tokens are refreshed refresh_ahead seconds before their expires_on
+- Concurrent misses/refreshes for the same user share one get_token call
+"""
+
+import asyncio
+from collections import OrderedDict
+
+from acs_clients import token_seconds_left
+
+
+class TokenCache:
+    def __init__(self, acs, scopes, max_size=1000, refresh_ahead=600):
+        self.acs = acs
+        self.scopes = scopes
+        self.max_size = max_size
+        self.refresh_ahead = refresh_ahead
+
+        self._tokens = OrderedDict()  # { userId: AccessToken }
+        self._inflight = {}  # { userId: Future } for single-flight fetches
+
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "coalesced": 0, "evictions": 0, "fetches": 0}
+
+    def put(self, user_id, token_response):
+        """Cache a token we already have (e.g. one just issued for a new user)"""
+        self._tokens[user_id] = token_response
+        self._tokens.move_to_end(user_id)
+        while len(self._tokens) > self.max_size:
+            self._tokens.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def get_token(self, user_id, user_identifier):
+        """
+        A valid token for user_id, fetching (and caching) one if needed
+        Raises whatever get_token raises, e.g. when the user does not exist
+        """
+        token_response = self._tokens.get(user_id)
+        if token_response is not None:
+            if token_seconds_left(token_response) > self.refresh_ahead:
+                self._tokens.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return token_response
+            self.stats["refreshes"] += 1
+        else:
+            self.stats["misses"] += 1
+
+        future = self._inflight.get(user_id)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[user_id] = future
+        try:
+            self.stats["fetches"] += 1
+            token_response = await self.acs.get_token(user_identifier, scopes=self.scopes)
+            self.put(user_id, token_response)
+            future.set_result(token_response)
+            return token_response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self._tokens.pop(user_id, None)
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody else awaited does not log "never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._inflight[user_id]
+
+    def report(self):
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["refreshes"]
+        return {
+            "size": len(self._tokens),
+            "maxSize": self.max_size,
+            "refreshAheadSeconds": self.refresh_ahead,
+            **self.stats,
+            "hitRate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+        }
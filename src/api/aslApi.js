@@ -52,9 +52,12 @@ export const checkAPIStatus = async () => {
  * Supports both /predict (main.py) and /predict/alphabet, /predict/word (simple_test_api.py)
  * @param {string} mode - "alphabet" or "word"
  * @param {Array<number>} landmarks - For alphabet: 63 values, For word: 30×63 = 1890 values (sequence buffer)
- * @returns {Promise<{prediction: number, label: string}>} Prediction result with label
+ * @param {Object} [roomContext] - Optional { roomId, participantName } so the backend publishes
+ *   the prediction to the room's gesture relay itself (no separate /gesture POST needed)
+ * @returns {Promise<{prediction: number, label: string, published?: boolean}>} Prediction result with label
+ *   (published is only set when the backend handled relay publishing)
  */
-export const predictASL = async (mode, landmarks) => {
+export const predictASL = async (mode, landmarks, roomContext = null) => {
   if (mode !== "alphabet" && mode !== "word") {
     throw new Error("Invalid mode: must be 'alphabet' or 'word'");
   }
@@ -82,6 +85,11 @@ export const predictASL = async (mode, landmarks) => {
       body: JSON.stringify({
         mode,
         landmarks,
+        ...(roomContext?.roomId && {
+          roomId: roomContext.roomId,
+          participantName: roomContext.participantName,
+          participantType: "deaf",
+        }),
       }),
     });
 
@@ -115,6 +123,7 @@ export const predictASL = async (mode, landmarks) => {
       return {
         prediction: typeof data.prediction === 'number' ? data.prediction : parseInt(data.prediction),
         label: data.label,
+        published: data.published ?? undefined,
       };
     }
 
@@ -183,7 +183,10 @@ export const useGestureRecognition = ({
                   setError("");
 
                   try {
-                    const result = await predictASL("alphabet", flatLandmarks);
+                    const result = await predictASL("alphabet", flatLandmarks, {
+                      roomId,
+                      participantName,
+                    });
                     if (result && result.label && isMounted) {
                       setPrediction(result.prediction);
                       setPredictionLabel(result.label);
@@ -194,11 +197,14 @@ export const useGestureRecognition = ({
                         roomId
                       ) {
                         lastSentPredictionRef.current = result.label;
-                        gestureRelay
-                          .sendGesturePrediction(result.label)
-                          .catch((err) => {
-                            console.error("Error sending gesture prediction:", err);
-                          });
+                        // Backend publishes to the relay itself when it knows the room
+                        if (result.published === undefined) {
+                          gestureRelay
+                            .sendGesturePrediction(result.label)
+                            .catch((err) => {
+                              console.error("Error sending gesture prediction:", err);
+                            });
+                        }
                       }
                     } else if (isMounted) {
                       setError("No prediction received");
@@ -242,7 +248,10 @@ export const useGestureRecognition = ({
                     const sequenceBuffer = [...sequenceBufferRef.current];
 
                     try {
-                      const result = await predictASL("word", sequenceBuffer);
+                      const result = await predictASL("word", sequenceBuffer, {
+                        roomId,
+                        participantName,
+                      });
                       if (result && result.label && isMounted) {
                         setPrediction(result.prediction);
                         setPredictionLabel(result.label);
@@ -253,11 +262,14 @@ export const useGestureRecognition = ({
                           roomId
                         ) {
                           lastSentPredictionRef.current = result.label;
-                          gestureRelay
-                            .sendGesturePrediction(result.label)
-                            .catch((err) => {
-                              console.error("Error sending gesture prediction:", err);
-                            });
+                          // Backend publishes to the relay itself when it knows the room
+                          if (result.published === undefined) {
+                            gestureRelay
+                              .sendGesturePrediction(result.label)
+                              .catch((err) => {
+                                console.error("Error sending gesture prediction:", err);
+                              });
+                          }
                         }
                       } else if (isMounted) {
                         setError("No prediction received");
@@ -5,6 +5,7 @@
  */
 
 import { getApiUrl } from './apiConfig';
+import { expandDeltaMessages } from './relayDelta';
 
 class GestureRelay {
   constructor() {
@@ -108,14 +109,14 @@ class GestureRelay {
     this.pollingInterval = setInterval(async () => {
       try {
         const response = await fetch(
-          getApiUrl(`/gesture/${this.roomId}?since=${this.lastMessageId}`),
+          getApiUrl(`/gesture/${this.roomId}?since=${this.lastMessageId}&delta=true`),
           {
             method: "GET",
           }
         );
 
         if (response.ok) {
-          const messages = await response.json();
+          const messages = expandDeltaMessages(await response.json());
           
           if (messages && messages.length > 0) {
             console.log(`🤲 Received ${messages.length} gesture message(s)`);
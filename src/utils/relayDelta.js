@@ -0,0 +1,20 @@
+/**
+ * Relay Delta Decoding
+ * Shared by the transcription and gesture relays when polling with ?delta=true
+ */
+
+/**
+ * Expand a delta-encoded relay response (?delta=true): each message only
+ * carries the fields that changed from the previous one, so fill the rest in
+ * @param {Array} messages - Messages as returned by the backend
+ * @returns {Array} Messages with every field present
+ */
+export function expandDeltaMessages(messages) {
+  if (!Array.isArray(messages)) return [];
+  let previous = null;
+  return messages.map((msg) => {
+    const full = previous ? { ...previous, ...msg } : msg;
+    previous = full;
+    return full;
+  });
+}
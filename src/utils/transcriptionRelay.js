@@ -5,6 +5,7 @@
  */
 
 import { getApiUrl } from "./apiConfig";
+import { expandDeltaMessages } from "./relayDelta";
 
 class TranscriptionRelay {
   constructor() {
@@ -126,7 +127,7 @@ class TranscriptionRelay {
       try {
         const response = await fetch(
           getApiUrl(
-            `/transcription/${this.roomId}?since=${this.lastMessageId}`
+            `/transcription/${this.roomId}?since=${this.lastMessageId}&delta=true`
           ),
           {
             method: "GET",
@@ -134,7 +135,7 @@ class TranscriptionRelay {
         );
 
         if (response.ok) {
-          const messages = await response.json();
+          const messages = expandDeltaMessages(await response.json());
 
           if (messages && messages.length > 0) {
             messages.forEach((msg) => {